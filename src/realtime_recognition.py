@@ -5,6 +5,7 @@ PySide6 UI統合用に最適化
 faster_whisper_test.pyと同じロジック
 """
 
+import math
 import pyaudio
 import numpy as np
 import time
@@ -79,11 +80,24 @@ class RealtimeRecognizer:
                     num_workers=MODEL_CONFIG["num_workers"]
                 )
                 print("✅ モデルロード完了")
+                self._warmup()
             except Exception as e:
                 print(f"❌ モデルロードエラー: {e}")
                 self.model = None
                 raise
 
+    def _warmup(self):
+        """無音で一度認識を走らせ、初回呼び出しの遅延をロード時に済ませる"""
+        warm = np.zeros(AUDIO_CONFIG["rate"], dtype=np.float32)
+        segments, _ = self.model.transcribe(
+            warm,
+            language=TRANSCRIBE_CONFIG["language"],
+            beam_size=TRANSCRIBE_CONFIG["beam_size"],
+            without_timestamps=True
+        )
+        list(segments)
+        print("✅ ウォームアップ完了")
+
     def start_recognition(self):
         """音声認識を開始（録音開始）"""
         if self.is_recording:
@@ -95,21 +109,19 @@ class RealtimeRecognizer:
 
         self.audio = pyaudio.PyAudio()
         self.frames = []
+        self.is_recording = True
+        self.last_voice_time = time.time()
+
+        # 録音はPortAudioのコールバックで受け取る（stream.readで回す録音スレッド不要）
         self.stream = self.audio.open(
             format=AUDIO_CONFIG["format"],
             channels=AUDIO_CONFIG["channels"],
             rate=AUDIO_CONFIG["rate"],
             input=True,
-            frames_per_buffer=AUDIO_CONFIG["chunk"]
+            frames_per_buffer=AUDIO_CONFIG["chunk"],
+            stream_callback=self._pa_callback
         )
 
-        self.is_recording = True
-        self.last_voice_time = time.time()
-
-        # 録音スレッド開始
-        recording_thread = threading.Thread(target=self._recording_worker, daemon=True)
-        recording_thread.start()
-
         # 沈黙監視スレッド開始
         silence_thread = threading.Thread(target=self._silence_monitor, daemon=True)
         silence_thread.start()
@@ -135,24 +147,18 @@ class RealtimeRecognizer:
         # 録音データをファイルに保存して認識
         self._process_recording()
 
-    def _recording_worker(self):
-        """録音ワーカー"""
-        while self.is_recording and self.stream:
-            try:
-                data = self.stream.read(AUDIO_CONFIG["chunk"], exception_on_overflow=False)
-                self.frames.append(data)
-
-                # 音量チェック
-                audio_data = np.frombuffer(data, dtype=np.int16)
-                if len(audio_data) > 0:
-                    volume = np.sqrt(np.mean(audio_data.astype(np.float64)**2))
-                    if volume > self.voice_threshold:
-                        self.last_voice_time = time.time()
+    def _pa_callback(self, in_data, frame_count, time_info, status):
+        """録音コールバック（フレームを溜め、音量から最後に声があった時刻を更新）"""
+        if not self.is_recording:
+            return (None, pyaudio.paComplete)
+        self.frames.append(in_data)
 
-            except Exception as e:
-                if self.is_recording:
-                    print(f"❌ 録音エラー: {e}")
-                break
+        # 音量チェック（チャンク長は固定なので空チェック不要。二乗和はint64で積算しfloat64配列を作らない）
+        audio_data = np.frombuffer(in_data, dtype=np.int16)
+        volume = math.sqrt(int(np.einsum('i,i->', audio_data, audio_data, dtype=np.int64)) / audio_data.size)
+        if volume > self.voice_threshold:
+            self.last_voice_time = time.time()
+        return (None, pyaudio.paContinue)
 
     def _silence_monitor(self):
         """沈黙監視ワーカー"""
@@ -174,10 +180,10 @@ class RealtimeRecognizer:
             print("❌ 録音データがありません")
             return
 
-        # 一時ファイルに保存
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
+        # 一時ファイルに保存（1MBバッファでヘッダとPCMをまとめて書き出す）
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False, buffering=1 << 20) as temp_file:
             temp_filename = temp_file.name
-            wf = wave.open(temp_filename, 'wb')
+            wf = wave.open(temp_file, 'wb')
             wf.setnchannels(AUDIO_CONFIG["channels"])
             wf.setsampwidth(self.audio.get_sample_size(AUDIO_CONFIG["format"]) if self.audio else 2)
             wf.setframerate(AUDIO_CONFIG["rate"])
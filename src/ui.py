@@ -4,8 +4,12 @@ from PySide6.QtWidgets import QTextEdit, QPushButton, QLineEdit, QComboBox, QLab
 from wake_word import WakeWordDetector
 from voice_synthesis import VoiceSynthesizer
 from realtime_recognition import RealtimeRecognizer
+import os
 import time
+import shutil
+import tempfile
 import threading
+import subprocess
 import requests
 import json
 
@@ -29,7 +33,6 @@ class WakeWordController(QObject):
         print("🚀 ウェイクワード検出モデルを事前ロード中...")
 
         # バックグラウンドでモデルをロード
-        import threading
         load_thread = threading.Thread(target=self._preload_model_worker, daemon=True)
         load_thread.start()
 
@@ -114,8 +117,6 @@ class VoiceController(QObject):
 
     def _detect_audio_command(self):
         """利用可能な音声再生コマンドを検出"""
-        import shutil
-        
         # プラットフォーム別のコマンド優先順位
         commands = [
             'paplay',  # PulseAudio (Ubuntu/Linux preferred)
@@ -139,7 +140,6 @@ class VoiceController(QObject):
         print("🚀 音声認識モデルを事前ロード中...")
 
         # バックグラウンドでモデルをロード
-        import threading
         load_thread = threading.Thread(target=self._preload_model_worker, daemon=True)
         load_thread.start()
 
@@ -395,10 +395,6 @@ class VoiceController(QObject):
             return
         
         try:
-            import tempfile
-            import subprocess
-            import os
-            
             with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
                 temp_file.write(wav_data)
                 temp_file_path = temp_file.name
@@ -5,20 +5,105 @@ PySide6 UI統合用に最適化
 """
 
 import os
+import json
+import asyncio
+import functools
 import tempfile
 import subprocess
 import threading
+import queue
 import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
 from voicevox_core.blocking import Onnxruntime, OpenJtalk, Synthesizer, VoiceModelFile
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None  # 無い場合は常駐スレッド1本でrequests送信する
+
 # シリウス表情制御API
 SIRIUS_API_URL = "http://localhost:8080"
 
+# 口パターンは種類が少ないので、送信するJSONを事前にエンコードしておく
+_MOUTH_PAYLOADS = {
+    pattern: json.dumps({"mouth_pattern": pattern}).encode('utf-8')
+    for pattern in ('mouth_a', 'mouth_i', 'mouth_o', 'a', 'i', 'o', None)
+}
+
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+@functools.lru_cache(maxsize=1)
+def _get_http_session():
+    """口パターン送信用のKeep-Alive HTTPセッション（初回呼び出し時に1つだけ生成）
+
+    urllibは1リクエストごとに接続を張り直すので、接続プール付きのセッションを使い回す
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+    session.mount("http://", adapter)
+    session.headers.update(_JSON_HEADERS)
+    return session
+
+def _mouth_payload(pattern):
+    """口パターンの送信用JSONバイト列を返す（未知のパターンはその場でエンコード）"""
+    data = _MOUTH_PAYLOADS.get(pattern)
+    if data is None:
+        data = json.dumps({"mouth_pattern": pattern}).encode('utf-8')
+    return data
+
+# 送信スレッドの終了指示
+_STOP = object()
+
+# time.sleepが指定より長く眠ってしまう量（ns）の指数移動平均。次のスリープをその分短くする
+_sleep_drift_ns = 0
+# 寝過ごし量の1回分の上限（GCやデスケジュールによる長い停止で平均が跳ね上がらないようにする）
+_MAX_DRIFT_SAMPLE_NS = 2_000_000
+
+def _sleep_until_ns(deadline_ns):
+    """perf_counter_ns基準の期限まで待機
+
+    1.5ms以上残っていれば1ms手前までスリープし、残り（最大1ms）だけスピンで詰める。
+    スリープはOSの寝過ごし量を学習した分だけ短くする
+    """
+    global _sleep_drift_ns
+    remaining = deadline_ns - time.perf_counter_ns()
+    if remaining > 1_500_000:
+        intended = remaining - 1_000_000 - _sleep_drift_ns
+        if intended > 0:
+            before = time.perf_counter_ns()
+            time.sleep(intended / 1e9)
+            actual = time.perf_counter_ns() - before
+            sample = min(max(actual - intended, 0), _MAX_DRIFT_SAMPLE_NS)
+            _sleep_drift_ns = int(0.9 * _sleep_drift_ns + 0.1 * sample)
+        else:
+            # 学習値が大きすぎて眠れなかった場合も減衰させ、スピンし続けないようにする
+            _sleep_drift_ns = int(0.9 * _sleep_drift_ns)
+    while time.perf_counter_ns() < deadline_ns:
+        pass
+
 class VoiceSynthesizer:
     def __init__(self):
         self.synthesizer = None
         self._init_synthesizer()
 
+        # 非同期送信用のイベントループとaiohttpセッション（初回送信時に起動）
+        self._async_loop = None
+        self._aio_session = None
+        self._loop_lock = threading.Lock()  # 起動時のprewarmと発話の送信が同時に起動しないようにする
+        # aiohttpが無い場合の送信用常駐スレッド（初回送信時に起動）
+        self._send_pool = None
+        self._last_pattern = None  # 直前に送信に成功した口パターン（冗長リクエストを防ぐ）
+        self._pattern_lock = threading.Lock()  # 送信スレッド・UIスレッドから_last_patternを更新するため
+        self._send_seq = 0  # 口パターン送信の通し番号（最後に送った分の応答だけを記録する）
+        # リップシンク中の口パターン送信スレッドとキュー（タイミングループからHTTP処理を切り離す）
+        self._fire_queue = queue.SimpleQueue()
+        self._fire_thread = None
+        # 音声再生用の常駐スレッドとジョブキュー（発話ごとにスレッドを作らない）
+        self._play_queue = queue.SimpleQueue()
+        self._play_thread = None
+
         # リップシンク関連の初期化
         self.style_id = 54
         self.speed_scale = 1.0
@@ -114,79 +199,61 @@ class VoiceSynthesizer:
         # 同期イベント作成
         audio_start_event = threading.Event()
 
-        # 音声再生スレッド開始
-        audio_thread = threading.Thread(
-            target=self._play_audio_precise,
-            args=(wav_data, audio_start_event),
-            daemon=True
-        )
-        audio_thread.start()
+        # 常駐の再生スレッドへ再生ジョブを渡す
+        self._ensure_play_worker()
+        self._play_queue.put((wav_data, audio_start_event))
 
         # 音声再生開始を待機
         audio_start_event.wait()
-        actual_audio_start = time.time()
+        # 壁時計(time.time)はNTP補正で揺れるので単調増加のperf_counterを基準にする
+        actual_audio_start_ns = time.perf_counter_ns()
 
-        print(f"🔊 音声再生開始検知: {actual_audio_start:.6f}")
+        print(f"🔊 音声再生開始検知: {actual_audio_start_ns / 1e9:.6f}")
 
         # リップシンク実行
-        timing_stats = {'perfect': 0, 'good': 0, 'poor': 0}
-        first_mouth_pattern = True
+        # このスレッドは期限までの待機と送信キューへの投入だけを行い、HTTP送信は送信スレッドに任せる
+        self._ensure_fire_worker()
+        fire = self._fire_queue.put_nowait
+        fired = []  # (シーケンス時刻, 口形状, 誤差ms)
 
         for seq_time, mouth_shape, duration in mouth_sequence:
-            # 目標時間 = 音声開始時間 + シーケンス時間
-            target_time = actual_audio_start + seq_time
+            if not mouth_shape:
+                continue
 
-            # 高精度タイミング制御
-            while True:
-                current_time = time.time()
-                time_to_target = target_time - current_time
+            # 目標時刻 = 音声開始時刻 + シーケンス時間（ns）
+            target_ns = actual_audio_start_ns + int(seq_time * 1e9)
 
-                if time_to_target <= 0.0001:
-                    break
-                elif time_to_target > 0:
-                    if time_to_target < 0.001:
-                        pass
-                    else:
-                        time.sleep(max(0.0001, time_to_target - 0.0005))
-                else:
-                    break
+            # 高精度タイミング制御（スリープ + 直前だけスピン）
+            _sleep_until_ns(target_ns)
 
-            # 口パターン設定
-            server_pattern = f"mouth_{mouth_shape}" if mouth_shape else None
-            if server_pattern:
-                if first_mouth_pattern:
-                    success = self._set_mouth_pattern(server_pattern)
-                    if not success:
-                        print(f"⚠️ 口パターン設定失敗: {server_pattern}")
-                    first_mouth_pattern = False
-                else:
-                    self._set_mouth_pattern_async(server_pattern)
-
-                # タイミング精度評価
-                actual_time = time.time()
-                timing_error_ms = (actual_time - target_time) * 1000
-
-                if abs(timing_error_ms) <= 5:
-                    sync_indicator = "✓"
-                    timing_stats['perfect'] += 1
-                elif abs(timing_error_ms) <= 15:
-                    sync_indicator = "~"
-                    timing_stats['good'] += 1
-                else:
-                    sync_indicator = "⚠"
-                    timing_stats['poor'] += 1
+            # 誤差はキューに積む前に測る（送信にかかる時間は含めない）
+            fired.append((seq_time, mouth_shape, (time.perf_counter_ns() - target_ns) / 1e6))
+            fire(f"mouth_{mouth_shape}")
 
-                print(f"{sync_indicator} {seq_time:.2f}s: mouth_{mouth_shape} (誤差:{timing_error_ms:+.1f}ms)")
+        # タイミング精度評価（表示もタイミングループの外でまとめて行う）
+        timing_stats = {'perfect': 0, 'good': 0, 'poor': 0}
+        for seq_time, mouth_shape, timing_error_ms in fired:
+            if abs(timing_error_ms) <= 5:
+                sync_indicator = "✓"
+                timing_stats['perfect'] += 1
+            elif abs(timing_error_ms) <= 15:
+                sync_indicator = "~"
+                timing_stats['good'] += 1
+            else:
+                sync_indicator = "⚠"
+                timing_stats['poor'] += 1
 
-                # 統計表示
-        total_patterns = timing_stats['perfect'] + timing_stats['good'] + timing_stats['poor']
+            print(f"{sync_indicator} {seq_time:.2f}s: mouth_{mouth_shape} (誤差:{timing_error_ms:+.1f}ms)")
+
+        # 統計表示
+        total_patterns = len(fired)
         if total_patterns > 0:
             perfect_rate = timing_stats['perfect'] / total_patterns * 100
             print(f"📈 同期精度: ✓{timing_stats['perfect']} ~{timing_stats['good']} ⚠{timing_stats['poor']} ({perfect_rate:.1f}% が5ms以内の精度)")
 
-        # 終了時に口パターンをリセット
+        # 終了時に口パターンをリセット（送信順が前後しないよう同じ送信キューを通す）
         time.sleep(0.2)
-        self._set_mouth_pattern_async(None)
+        fire(None)
         print("✅ 発話完了\n")
 
         # プロセスは_play_audio_preciseで管理されているので、ここではNoneを返す
@@ -197,6 +264,7 @@ class VoiceSynthesizer:
         try:
             phoneme_timeline = []
             current_time = 0.0
+            inv_speed = 1.0 / speed_scale  # 音韻ごとの除算を乗算に置き換える
 
             # accent_phrasesから音韻情報を抽出
             if hasattr(audio_query, 'accent_phrases'):
@@ -207,7 +275,7 @@ class VoiceSynthesizer:
                             if hasattr(mora, 'consonant') and mora.consonant:
                                 consonant_phoneme = mora.consonant
                                 consonant_duration = getattr(mora, 'consonant_length', 0.1) or 0.1
-                                consonant_duration /= speed_scale
+                                consonant_duration *= inv_speed
 
                                 mouth_shape = self._phoneme_to_mouth_shape(consonant_phoneme)
                                 phoneme_timeline.append((current_time, mouth_shape, consonant_duration))
@@ -217,7 +285,7 @@ class VoiceSynthesizer:
                             if hasattr(mora, 'vowel') and mora.vowel:
                                 vowel_phoneme = mora.vowel
                                 vowel_duration = getattr(mora, 'vowel_length', 0.1) or 0.1
-                                vowel_duration /= speed_scale
+                                vowel_duration *= inv_speed
 
                                 mouth_shape = self._phoneme_to_mouth_shape(vowel_phoneme)
                                 phoneme_timeline.append((current_time, mouth_shape, vowel_duration))
@@ -227,7 +295,7 @@ class VoiceSynthesizer:
                     if hasattr(accent_phrase, 'pause_mora') and accent_phrase.pause_mora:
                         pause_duration = getattr(accent_phrase.pause_mora, 'vowel_length', 0.0) or 0.0
                         if pause_duration > 0:
-                            pause_duration /= speed_scale
+                            pause_duration *= inv_speed
                             phoneme_timeline.append((current_time, None, pause_duration))
                             current_time += pause_duration
 
@@ -251,42 +319,145 @@ class VoiceSynthesizer:
 
     def _set_mouth_pattern(self, pattern):
         """シリウスの口パターンを設定（同期版）"""
+        # 同じパターンの場合はスキップ（ただし、Noneの場合は必ず実行）
+        if self._already_sent(pattern):
+            return True
+        seq = self._begin_send()
         try:
-            import urllib.request
-            import json
-
-            data = json.dumps({"mouth_pattern": pattern}).encode('utf-8')
-            req = urllib.request.Request(
+            response = _get_http_session().post(
                 f"{SIRIUS_API_URL}/mouth_pattern",
-                data=data,
-                headers={'Content-Type': 'application/json'}
+                data=_mouth_payload(pattern),
+                timeout=0.5
             )
-            with urllib.request.urlopen(req, timeout=0.5) as response:
-                return response.getcode() == 200
+            if response.status_code != 200:
+                return False
+            self._record_sent(pattern, seq)
+            return True
         except Exception as e:
             print(f"❌ 口パターン設定エラー: {e}")
             return False
 
     def _set_mouth_pattern_async(self, pattern):
-        """シリウスの口パターンを非同期設定"""
-        def _set_pattern():
-            try:
-                import urllib.request
-                import json
-
-                data = json.dumps({"mouth_pattern": pattern}).encode('utf-8')
-                req = urllib.request.Request(
-                    f"{SIRIUS_API_URL}/mouth_pattern",
-                    data=data,
-                    headers={'Content-Type': 'application/json'}
-                )
-                with urllib.request.urlopen(req, timeout=0.05) as response:
-                    pass
-            except:
-                pass
-
-        thread = threading.Thread(target=_set_pattern, daemon=True)
-        thread.start()
+        """シリウスの口パターンを非同期設定（呼び出しごとにスレッドを作らない）"""
+        # 同じパターンの場合はスキップ（ただし、Noneの場合は必ず実行）
+        if self._already_sent(pattern):
+            return
+        seq = self._begin_send()
+        if aiohttp is None:
+            if self._send_pool is None:
+                self._send_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mouth_http')
+            self._send_pool.submit(self._post_pattern_quiet, pattern, seq)
+            return
+        self._ensure_async_loop()
+        asyncio.run_coroutine_threadsafe(self._post_pattern_aio(pattern, seq), self._async_loop)
+
+    def _already_sent(self, pattern):
+        """直前に送信に成功したパターンと同じならTrue（Noneは毎回送る）"""
+        with self._pattern_lock:
+            return pattern is not None and pattern == self._last_pattern
+
+    def _begin_send(self):
+        """送信の通し番号を発行する（応答が返るまでサーバー側のパターンは不明として扱う）"""
+        with self._pattern_lock:
+            self._send_seq += 1
+            self._last_pattern = None
+            return self._send_seq
+
+    def _record_sent(self, pattern, seq):
+        """サーバーが200を返したパターンを記録
+
+        失敗した送信は記録せず次回も送り直す。後から別のパターンを送っている場合、
+        この応答は古いので記録しない（同時に複数送信中だと応答の順序は入れ替わりうる）
+        """
+        with self._pattern_lock:
+            if seq == self._send_seq:
+                self._last_pattern = pattern
+
+    def _ensure_fire_worker(self):
+        """口パターン送信スレッドを起動（初回のみ）"""
+        if self._fire_thread is None:
+            self._fire_thread = threading.Thread(target=self._fire_worker, name='mouth_fire', daemon=True)
+            self._fire_thread.start()
+
+    def _fire_worker(self):
+        """送信キューの口パターンを順に送信する（溜まっている場合は最新のものだけ送る）"""
+        fire_queue = self._fire_queue
+        while True:
+            pattern = fire_queue.get()
+            stop = pattern is _STOP
+            while not stop:
+                try:
+                    newer = fire_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if newer is _STOP:
+                    stop = True
+                else:
+                    pattern = newer
+            if pattern is not _STOP:
+                self._set_mouth_pattern(pattern)
+            if stop:
+                break
+
+    def _post_pattern_quiet(self, pattern, seq):
+        """口パターンをKeep-Aliveセッションで送信（エラーは無視）"""
+        try:
+            response = _get_http_session().post(
+                f"{SIRIUS_API_URL}/mouth_pattern",
+                data=_mouth_payload(pattern),
+                timeout=0.05
+            )
+            if response.status_code == 200:
+                self._record_sent(pattern, seq)
+        except Exception:
+            pass
+
+    def _ensure_async_loop(self):
+        """非同期送信用のイベントループをバックグラウンドスレッドで起動"""
+        if self._async_loop is not None:
+            return
+        with self._loop_lock:
+            if self._async_loop is not None:
+                return  # 待っている間に別スレッドが起動した
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='mouth_aio', daemon=True).start()
+            self._aio_session = asyncio.run_coroutine_threadsafe(self._create_aio_session(), loop).result()
+            self._async_loop = loop  # セッションを作ってから公開する
+
+    async def _create_aio_session(self):
+        """Keep-Aliveで接続を使い回すaiohttpセッションを作成"""
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=2, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=0.05)
+        )
+
+    async def _post_pattern_aio(self, pattern, seq):
+        """口パターンをaiohttpで送信（エラーは無視）"""
+        try:
+            async with self._aio_session.post(
+                f"{SIRIUS_API_URL}/mouth_pattern",
+                data=_mouth_payload(pattern),
+                headers=_JSON_HEADERS
+            ) as response:
+                if response.status == 200:
+                    self._record_sent(pattern, seq)
+        except Exception:
+            pass
+
+    def _ensure_play_worker(self):
+        """音声再生用の常駐スレッドを起動（初回のみ）"""
+        if self._play_thread is None:
+            self._play_thread = threading.Thread(target=self._play_worker, name='audio_play', daemon=True)
+            self._play_thread.start()
+
+    def _play_worker(self):
+        """キューから (WAVデータ, 開始通知イベント) を取り出して順に再生する（Noneで終了）"""
+        while True:
+            job = self._play_queue.get()
+            if job is None:
+                break
+            wav_data, start_event = job
+            self._play_audio_precise(wav_data, start_event)
 
     def _play_audio_precise(self, wav_data, start_event):
         """音声を再生（精密同期版・クロスプラットフォーム対応）"""
@@ -301,9 +472,6 @@ class VoiceSynthesizer:
                 temp_file.write(wav_data)
                 temp_file_path = temp_file.name
 
-            # 再生開始を通知
-            start_event.set()
-
             # プラットフォーム別の音声再生
             if self.audio_command == 'ffplay':
                 # ffplay（ログ出力を抑制）
@@ -315,12 +483,17 @@ class VoiceSynthesizer:
                 process = subprocess.Popen([self.audio_command, temp_file_path],
                                          stdout=subprocess.DEVNULL,
                                          stderr=subprocess.DEVNULL)
-            
+
+            # 再生開始を通知（プロセス起動後に通知して起動時間分のずれを減らす）
+            start_event.set()
             process.wait()
             os.unlink(temp_file_path)
             return process
         except Exception as e:
             print(f"❌ 音声再生エラー: {e}")
+            # 待機側が止まらないように通知だけは行う
+            if start_event:
+                start_event.set()
             return None
 
     def speak_response(self, text: str):
@@ -330,6 +503,22 @@ class VoiceSynthesizer:
     def cleanup(self):
         """リソースのクリーンアップ"""
         try:
+            # 非同期送信用のワーカー・イベントループを停止
+            if self._send_pool is not None:
+                self._send_pool.shutdown(wait=False)
+                self._send_pool = None
+            if self._fire_thread is not None:
+                self._fire_queue.put(_STOP)
+                self._fire_thread = None
+            if self._play_thread is not None:
+                self._play_queue.put(None)
+                self._play_thread = None
+            if self._async_loop is not None:
+                asyncio.run_coroutine_threadsafe(self._aio_session.close(), self._async_loop).result(timeout=1.0)
+                self._async_loop.call_soon_threadsafe(self._async_loop.stop)
+                self._async_loop = None
+                self._aio_session = None
+
             if self.synthesizer:
                 # VOICEVOX Coreのクリーンアップ
                 # Synthesizerオブジェクトの明示的なクリーンアップ
@@ -23,10 +23,16 @@ except ImportError:
     print("❌ faster_whisperがインストールされていません。")
     exit(1)
 
+try:
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+except ImportError:
+    get_speech_timestamps = None  # 無い場合は事前VADなし（transcribe内のVADだけで判定）
+
 import time
 import threading
 import queue
 import os
+import re
 
 # =============================================================================
 # 🚀 高速化設定パラメータ
@@ -47,9 +53,10 @@ TRANSCRIBE_CONFIG = {
     "compression_ratio_threshold": 2.4,
     "log_prob_threshold": -1.0,
     "no_speech_threshold": 0.3,
-    "condition_on_previous_text": True,
-    "initial_prompt": "以下は日本語の音声です。ウェイクワード「シリウスくん」を聞いてください。",
+    "condition_on_previous_text": False,  # 窓ごとに独立して判定
+    "initial_prompt": None,  # プロンプトトークン分のデコードを省く
     "word_timestamps": False,
+    "without_timestamps": True,  # タイムスタンプトークンを出さない
     "vad_filter": True,
     "vad_parameters": {
         "min_silence_duration_ms": 300,
@@ -73,9 +80,20 @@ WAKE_WORD_CONFIG = {
     "confidence_threshold": 60.0,
     "cooldown_seconds": 2.0,
     "max_detection_history": 10,
+    "tail_chars": 20,
     "debug_mode": False
 }
 
+WAKE_WORD_VARIANTS = (
+    "シリウスくん", "シリウス", "しりうすくん", "しりうす",
+    "シリウス くん", "しりうす くん", "シリウスさん", "しりうすさん",
+    "ねえ，シリウスくん", "ねえシリウスくん", "ねえ、シリウスくん", "ねえ シリウスくん",
+    "おい、シリウスくん", "おいシリウスくん", "ちょっと、シリウスくん", "ちょっとシリウスくん"
+)
+
+_WAKE_WORD_RE = re.compile("|".join(map(re.escape, WAKE_WORD_VARIANTS)))
+_WAKE_WORD_STEM_RE = re.compile("シリウス|しりうす")
+
 # =============================================================================
 # ウェイクワード検出クラス
 # =============================================================================
@@ -87,14 +105,28 @@ class WakeWordDetector:
         self.stream = None
         self.is_running = False
         self.last_processed_time = 0
-        self.audio_buffer = np.array([], dtype=np.int16)
+        # バッファ管理（固定長のリングバッファ。録音ごとの再確保をしない）
+        self.process_samples = int(REALTIME_CONFIG["buffer_seconds"] * REALTIME_CONFIG["rate"])
+        self.overlap_samples = int(REALTIME_CONFIG["overlap_seconds"] * REALTIME_CONFIG["rate"])
+        self.max_samples = int(REALTIME_CONFIG["rate"] * (REALTIME_CONFIG["buffer_seconds"] + 1.0))
+        self.audio_buffer = np.zeros(self.max_samples, dtype=np.int16)
+        self.write_pos = 0      # 次に書き込む位置
+        self.valid_samples = 0  # 未処理（＋オーバーラップ）のサンプル数
+        self._scratch = np.empty(self.process_samples, dtype=np.int16)  # 処理窓の取り出し先
+        self._f32_scratch = np.empty(self.process_samples, dtype=np.float32)  # 正規化済み窓の書き込み先
         self.buffer_lock = threading.Lock()
+        self._buf_cv = threading.Condition(self.buffer_lock)  # 書き込みのたびに検出スレッドを起こす
         self.wake_word = WAKE_WORD_CONFIG["wake_word"]
         self.confidence_threshold = WAKE_WORD_CONFIG["confidence_threshold"]
         self.cooldown_seconds = WAKE_WORD_CONFIG["cooldown_seconds"]
         self.last_detection_time = 0
         self.detection_history = []
         self.debug_mode = WAKE_WORD_CONFIG.get("debug_mode", False)
+        self._prev_tail = ""  # 前の窓の認識結果の末尾（窓をまたいだウェイクワード用）
+        self._transcribe_kwargs = dict(TRANSCRIBE_CONFIG)  # transcribeの引数は一度だけ組み立てる
+        self._vad_options = VadOptions(**TRANSCRIBE_CONFIG["vad_parameters"]) if get_speech_timestamps else None
+        if self._vad_options is not None:
+            self._transcribe_kwargs["vad_filter"] = False  # 事前VADで切り出すので二重に掛けない
         self.wake_word_callback = wake_word_callback or self._default_wake_word_callback
 
     def _init_model(self):
@@ -109,6 +141,14 @@ class WakeWordDetector:
                 num_workers=MODEL_CONFIG["num_workers"]
             )
             print("✅ モデルロード完了")
+            self._warmup()
+
+    def _warmup(self):
+        """無音の窓で一度認識を走らせ、初回呼び出しの遅延を起動時に済ませる"""
+        warm = np.zeros(int(REALTIME_CONFIG["rate"] * REALTIME_CONFIG["buffer_seconds"]), dtype=np.float32)
+        segments, _ = self.model.transcribe(warm, **dict(self._transcribe_kwargs, vad_filter=False))
+        list(segments)
+        print("✅ ウォームアップ完了")
 
     def _default_wake_word_callback(self, detected_text, confidence):
         """デフォルトのウェイクワード検出時のコールバック"""
@@ -125,21 +165,19 @@ class WakeWordDetector:
         print(f"🎤 ウェイクワード検出を開始します...")
         print(f"💡 ウェイクワード: 「{self.wake_word}」")
 
+        self.is_running = True
+
+        # PortAudioのコールバックがリングバッファへ直接書き込む（stream.readで回す録音スレッド不要）
         self.audio = pyaudio.PyAudio()
         self.stream = self.audio.open(
             format=REALTIME_CONFIG["format"],
             channels=REALTIME_CONFIG["channels"],
             rate=REALTIME_CONFIG["rate"],
             input=True,
-            frames_per_buffer=REALTIME_CONFIG["chunk"]
+            frames_per_buffer=REALTIME_CONFIG["chunk"],
+            stream_callback=self._pa_callback
         )
 
-        self.is_running = True
-
-        # 録音スレッド開始
-        recording_thread = threading.Thread(target=self._recording_worker, daemon=True)
-        recording_thread.start()
-
         # 検出スレッド開始
         detection_thread = threading.Thread(target=self._detection_worker, daemon=True)
         detection_thread.start()
@@ -162,50 +200,30 @@ class WakeWordDetector:
 
         print("✅ ウェイクワード検出を終了しました")
 
-    def _recording_worker(self):
-        """音声録音ワーカー"""
-        while self.is_running and self.stream:
-            try:
-                data = self.stream.read(REALTIME_CONFIG["chunk"], exception_on_overflow=False)
-                audio_chunk = np.frombuffer(data, dtype=np.int16)
-
-                with self.buffer_lock:
-                    self.audio_buffer = np.concatenate([self.audio_buffer, audio_chunk])
-
-            except Exception as e:
-                if self.is_running:
-                    print(f"❌ 録音エラー: {e}")
-                break
+    def _pa_callback(self, in_data, frame_count, time_info, status):
+        """PyAudioの録音コールバック（バイト列をゼロコピーで読み、リングバッファへ書いて通知する）"""
+        audio_chunk = np.frombuffer(in_data, dtype=np.int16)
+        with self.buffer_lock:
+            self._ring_write(audio_chunk)
+        return (None, pyaudio.paContinue)
 
     def _detection_worker(self):
         """ウェイクワード検出ワーカー"""
         while self.is_running:
+            wait = max(self.last_processed_time + REALTIME_CONFIG["processing_interval"],
+                       self.last_detection_time + self.cooldown_seconds) - time.time()
+            if wait > 0:
+                time.sleep(wait)
+
+            with self._buf_cv:
+                while self.is_running and self.valid_samples < self.process_samples:
+                    self._buf_cv.wait(timeout=0.1)
+                if not self.is_running:
+                    break
+                audio_to_process = self._ring_read_latest()
+                self.valid_samples = self.overlap_samples
             current_time = time.time()
 
-            if current_time - self.last_processed_time < REALTIME_CONFIG["processing_interval"]:
-                time.sleep(0.05)
-                continue
-
-            if current_time - self.last_detection_time < self.cooldown_seconds:
-                time.sleep(0.05)
-                continue
-
-            with self.buffer_lock:
-                buffer_duration = len(self.audio_buffer) / REALTIME_CONFIG["rate"]
-
-                if buffer_duration < REALTIME_CONFIG["buffer_seconds"]:
-                    time.sleep(0.05)
-                    continue
-
-                process_samples = int(REALTIME_CONFIG["buffer_seconds"] * REALTIME_CONFIG["rate"])
-                overlap_samples = int(REALTIME_CONFIG["overlap_seconds"] * REALTIME_CONFIG["rate"])
-
-                audio_to_process = self.audio_buffer[-process_samples:]
-
-                keep_samples = overlap_samples
-                if len(self.audio_buffer) > keep_samples:
-                    self.audio_buffer = self.audio_buffer[-keep_samples:]
-
             try:
                 self._process_audio_for_wake_word(audio_to_process)
                 self.last_processed_time = current_time
@@ -214,43 +232,88 @@ class WakeWordDetector:
                 if self.is_running:
                     print(f"❌ 検出エラー: {e}")
 
+    def _ring_write(self, audio_chunk):
+        """リングバッファへチャンクを書き込み、待機中の検出スレッドへ通知する（buffer_lockを保持して呼ぶ）"""
+        n = len(audio_chunk)
+        pos = self.write_pos
+        first = min(n, self.max_samples - pos)
+        np.copyto(self.audio_buffer[pos:pos + first], audio_chunk[:first])
+        if first < n:
+            # 末尾を超えた分は先頭から書く
+            np.copyto(self.audio_buffer[:n - first], audio_chunk[first:])
+        self.write_pos = (pos + n) % self.max_samples
+        self.valid_samples = min(self.valid_samples + n, self.max_samples)
+        self._buf_cv.notify()
+
+    def _ring_read_latest(self):
+        """最新のprocess_samples分をスクラッチ配列へコピーして返す（buffer_lockを保持して呼ぶ）"""
+        n = self.process_samples
+        start = (self.write_pos - n) % self.max_samples
+        first = min(n, self.max_samples - start)
+        np.copyto(self._scratch[:first], self.audio_buffer[start:start + first])
+        if first < n:
+            np.copyto(self._scratch[first:], self.audio_buffer[:n - first])
+        return self._scratch
+
+    def _to_float32(self, audio_chunk):
+        """int16の窓を[-1, 1)のfloat32へ正規化する（スクラッチ配列へ1パスで書き込み、毎回の確保を避ける）"""
+        audio_np = self._f32_scratch[:len(audio_chunk)]
+        np.multiply(audio_chunk, np.float32(1.0 / 32768.0), out=audio_np)
+        return audio_np
+
+    def _speech_region(self, audio_np):
+        """Silero VADで発話区間を探し、最初から最後の発話までを返す（発話が無ければNone）"""
+        if self._vad_options is None:
+            return audio_np
+        speech = get_speech_timestamps(audio_np, self._vad_options)
+        if not speech:
+            return None
+        return audio_np[speech[0]["start"]:speech[-1]["end"]]
+
     def _process_audio_for_wake_word(self, audio_chunk):
         """音声チャンクからウェイクワードを検出"""
-        audio_np = audio_chunk.astype(np.float32) / 32768.0
+        audio_np = self._to_float32(audio_chunk)
 
-        volume = self._calculate_volume(audio_chunk)
+        volume = self._calculate_volume(audio_np)
         if volume < 100:
+            self._prev_tail = ""  # 無音・発話なしを挟んだら引き継がない
             return
 
-        segments, info = self.model.transcribe(
-            audio_np,
-            language=TRANSCRIBE_CONFIG["language"],
-            beam_size=TRANSCRIBE_CONFIG["beam_size"],
-            temperature=TRANSCRIBE_CONFIG["temperature"],
-            compression_ratio_threshold=TRANSCRIBE_CONFIG["compression_ratio_threshold"],
-            log_prob_threshold=TRANSCRIBE_CONFIG["log_prob_threshold"],
-            no_speech_threshold=TRANSCRIBE_CONFIG["no_speech_threshold"],
-            condition_on_previous_text=TRANSCRIBE_CONFIG["condition_on_previous_text"],
-            initial_prompt=TRANSCRIBE_CONFIG["initial_prompt"],
-            word_timestamps=TRANSCRIBE_CONFIG["word_timestamps"],
-            vad_filter=TRANSCRIBE_CONFIG["vad_filter"],
-            vad_parameters=TRANSCRIBE_CONFIG["vad_parameters"]
-        )
-
-        segments_list = list(segments)
-        if not segments_list:
+        audio_np = self._speech_region(audio_np)
+        if audio_np is None:
+            self._prev_tail = ""
             return
 
-        text = "".join(segment.text for segment in segments_list).strip()
+        segments, info = self.model.transcribe(audio_np, **self._transcribe_kwargs)
+
+        # セグメントは遅延生成されるので1回だけ回し、「シリウス」が出たら残りはデコードしない
+        segments_list = []
+        parts = []
+        for segment in segments:
+            segments_list.append(segment)
+            parts.append(segment.text)
+            if _WAKE_WORD_STEM_RE.search(segment.text):
+                break
+
+        text = "".join(parts).strip()
         if not text:
+            self._prev_tail = ""
             return
 
         confidence = self._calculate_simple_confidence(segments_list, info)
 
-        if self._check_wake_word(text, confidence):
+        detected_text = self._detect_with_tail(text, confidence)
+
+        # 検出した窓・確信度不足で捨てた窓の末尾は次の窓へ引き継がない
+        if detected_text is not None or (not self.debug_mode and confidence < self.confidence_threshold):
+            self._prev_tail = ""
+        else:
+            self._prev_tail = text[-WAKE_WORD_CONFIG["tail_chars"]:]
+
+        if detected_text is not None:
             detection_info = {
                 'timestamp': time.time(),
-                'text': text,
+                'text': detected_text,
                 'confidence': confidence,
                 'duration': len(audio_chunk) / REALTIME_CONFIG["rate"]
             }
@@ -259,9 +322,26 @@ class WakeWordDetector:
             if len(self.detection_history) > WAKE_WORD_CONFIG["max_detection_history"]:
                 self.detection_history.pop(0)
 
-            self.wake_word_callback(text, confidence)
+            self.wake_word_callback(detected_text, confidence)
             self.last_detection_time = time.time()
 
+    def _detect_with_tail(self, text, confidence):
+        """この窓単独、または前の窓の末尾とまたがってウェイクワードが出ていれば報告用テキストを返す（無ければNone）"""
+        if self._check_wake_word(text, confidence):
+            return text
+
+        tail = self._prev_tail
+        if not tail:
+            return None
+
+        # 境界をまたぐ一致だけを採用する（前の窓の中で完結する一致はその窓で判定済み）
+        combined = tail + text
+        boundary = len(tail)
+        if any(m.start() < boundary < m.end() for m in _WAKE_WORD_STEM_RE.finditer(combined)):
+            if self._check_wake_word(combined, confidence):
+                return combined
+        return None
+
     def _check_wake_word(self, text, confidence):
         """テキストにウェイクワードが含まれているかチェック"""
         if not self.debug_mode and confidence < self.confidence_threshold:
@@ -278,27 +358,19 @@ class WakeWordDetector:
         if self.wake_word in text:
             return True
 
-        wake_word_variants = [
-            "シリウスくん", "シリウス", "しりうすくん", "しりうす",
-            "シリウス くん", "しりうす くん", "シリウスさん", "しりうすさん",
-            "ねえ，シリウスくん", "ねえシリウスくん", "ねえ、シリウスくん", "ねえ シリウスくん",
-            "おい、シリウスくん", "おいシリウスくん", "ちょっと、シリウスくん", "ちょっとシリウスくん"
-        ]
-
-        for variant in wake_word_variants:
-            if variant in text_lower:
-                return True
+        if _WAKE_WORD_RE.search(text_lower):
+            return True
 
-        if "シリウス" in text or "しりうす" in text:
+        if _WAKE_WORD_STEM_RE.search(text):
             return True
 
         return False
 
-    def _calculate_volume(self, audio_chunk):
-        """音量を計算"""
-        if len(audio_chunk) == 0:
+    def _calculate_volume(self, audio_np):
+        """正規化済みfloat32から音量（int16スケールのRMS）を計算"""
+        if audio_np.size == 0:
             return 0
-        return np.sqrt(np.mean(audio_chunk.astype(np.float64)**2))
+        return np.sqrt(np.dot(audio_np, audio_np) / audio_np.size) * 32768.0
 
     def _calculate_simple_confidence(self, segments, info):
         """簡易的な信頼度計算"""
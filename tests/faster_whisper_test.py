@@ -2,16 +2,30 @@
 """
 Faster Whisper 音声認識テストプログラム
 コンソールで操作（start: 録音開始, stop: 録音終了・認識, quit: 終了）
+--mode fast|accurate で速度重視/精度重視の認識パラメータを切り替え
 """
 
 import os
-import tempfile
+import math
+import argparse
 import pyaudio
-import wave
 import numpy as np
 import time
-import threading
-from faster_whisper import WhisperModel
+
+# CTranslate2(OpenMP)のスレッド設定（faster_whisperのロード前に設定する必要がある）
+# 発話の合間もOpenMPスレッドをスピンさせておき、次の認識開始時の起床待ちをなくす
+os.environ.setdefault("OMP_NUM_THREADS", "8")
+os.environ.setdefault("OMP_WAIT_POLICY", "ACTIVE")
+# OpenMPスレッドを物理コアに固定し、SMTの兄弟スレッドで演算器を取り合わないようにする
+os.environ.setdefault("OMP_PROC_BIND", "close")
+os.environ.setdefault("OMP_PLACES", "cores")
+os.environ.setdefault("KMP_AFFINITY", "granularity=fine,compact,1,0")  # Intel OpenMP用
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+    print("⚠️  numbaがインストールされていません。信頼度統計と音量計算はNumPy版で行います。")
 
 # =============================================================================
 # 🚀 高速化設定パラメータ（ここを編集して速度と精度を調整）
@@ -19,29 +33,57 @@ from faster_whisper import WhisperModel
 
 # モデル設定（高速化の基盤）
 MODEL_CONFIG = {
-    "model_size": "medium",        # モデルサイズ: "tiny"|"base"|"small"|"medium"|"large" (大きいほど精度↑速度↓)
+    # モデルサイズ: "tiny"|"base"|"small"|"medium"|"large" (大きいほど精度↑速度↓)
+    # WHISPER_MODEL で変換済みCTranslate2モデルのディレクトリも指定可能
+    "model_size": os.environ.get("WHISPER_MODEL", "medium"),
     "device": "cpu",               # デバイス: "cpu"|"cuda" (GPU使用時は"cuda")
-    "compute_type": "int8",        # 計算精度: "int8"|"float16"|"float32" (int8が最速)
+    # 計算精度: "int8_float32"|"int8"|"float16"|"float32" (WHISPER_COMPUTE_TYPE で上書き可)
+    "compute_type": os.environ.get("WHISPER_COMPUTE_TYPE", "int8_float32"),
     "cpu_threads": 8,              # CPUスレッド数: 1-16 (物理コア数以内で多くするほど高速)
     "num_workers": 1               # ワーカー数: 1 (メモリ使用量を抑えるため1推奨)
 }
 
-# 認識パラメータ（速度重視のチューニング）
-TRANSCRIBE_CONFIG = {
-    "language": "ja",              # 言語指定（固定）
-    "beam_size": 1,                # ビームサーチサイズ: 1=greedy(最速), 5=高精度 (1が最速)
-    "temperature": 0.0,            # 温度: 0.0=決定論的(高速), 1.0=多様性重視
-    "compression_ratio_threshold": 2.0,  # 圧縮率閾値: 2.4(高精度)→2.0(高速)
-    "log_prob_threshold": -0.8,    # 確率閾値: -1.0(高精度)→-0.8(高速)
-    "no_speech_threshold": 0.4,    # 無音判定閾値: 0.6(高精度)→0.4(高速)
-    "condition_on_previous_text": False,  # 前のテキスト依存: False(高速)
-    "initial_prompt": "以下は日本語の音声です。",  # 言語コンテキスト
-    "word_timestamps": False,      # 単語タイムスタンプ: False(高速), True(高精度)
-    "vad_filter": True,           # Voice Activity Detection: True(高速)
-    "vad_parameters": {            # VAD詳細設定
-        "min_silence_duration_ms": 800,  # 無音区間: 500ms(高精度)→800ms(高速)
-        "speech_pad_ms": 50,       # 音声パディング: 100ms→50ms(高速)
-        "threshold": 0.5           # VAD閾値: 0.5(積極的フィルタリング)
+# 認識パラメータ（--mode で切り替え: fast=速度重視, accurate=精度重視）
+TRANSCRIBE_CONFIGS = {
+    "fast": {
+        "language": "ja",              # 言語指定（固定）
+        "beam_size": 1,                # ビームサーチサイズ: 1=greedy(最速), 5=高精度 (1が最速)
+        "temperature": 0.0,            # 温度: 0.0=決定論的(高速), 1.0=多様性重視
+        "compression_ratio_threshold": 2.0,  # 圧縮率閾値: 2.4(高精度)→2.0(高速)
+        "log_prob_threshold": -0.8,    # 確率閾値: -1.0(高精度)→-0.8(高速)
+        "no_speech_threshold": 0.4,    # 無音判定閾値: 0.6(高精度)→0.4(高速)
+        "condition_on_previous_text": False,  # 前のテキスト依存: False(高速)
+        "initial_prompt": None,        # 言語コンテキスト: なし(高速, デコーダのプレフィックス処理を省略)
+        "word_timestamps": False,      # 単語タイムスタンプ: False(高速), True(高精度)
+        "without_timestamps": True,    # セグメントのタイムスタンプトークンを出力しない(高速)
+        "chunk_length": 30,            # メル特徴量の窓長(秒): 固定長にしてパディング/切り詰めの形状を一定に
+        "short_chunk_length": 10,      # この秒数未満の録音は短い窓でエンコード（Noneで無効）
+        "vad_filter": True,           # Voice Activity Detection: True(高速)
+        "vad_parameters": {            # VAD詳細設定
+            "min_silence_duration_ms": 800,  # 無音区間: 500ms(高精度)→800ms(高速)
+            "speech_pad_ms": 50,       # 音声パディング: 100ms→50ms(高速)
+            "threshold": 0.5           # VAD閾値: 0.5(積極的フィルタリング)
+        }
+    },
+    "accurate": {
+        "language": "ja",
+        "beam_size": 5,                # 高精度ビームサーチ
+        "temperature": 0.0,
+        "compression_ratio_threshold": 2.4,
+        "log_prob_threshold": -1.0,
+        "no_speech_threshold": 0.6,
+        "condition_on_previous_text": False,
+        "initial_prompt": "以下は日本語の音声です。",
+        "word_timestamps": True,       # 単語レベルの信頼度を取得
+        "without_timestamps": False,
+        "chunk_length": 30,
+        "short_chunk_length": None,
+        "vad_filter": True,
+        "vad_parameters": {
+            "min_silence_duration_ms": 500,
+            "speech_pad_ms": 100,
+            "threshold": 0.5
+        }
     }
 }
 
@@ -50,50 +92,64 @@ AUDIO_CONFIG = {
     "chunk": 1024,
     "format": pyaudio.paInt16,
     "channels": 1,
-    "rate": 16000  # Whisper推奨16kHz
+    "rate": 16000,  # Whisper推奨16kHz
+    "max_seconds": 60  # 最大録音時間（秒）: 超えたら自動で録音を打ち切る
 }
 
+# 最大録音時間に相当するサンプル数（録音バッファの容量）
+MAX_SAMPLES = AUDIO_CONFIG["rate"] * AUDIO_CONFIG["max_seconds"]
+
+# 信頼度メトリクスの詳細計算（SHOW_CONFIDENCE=1 で有効）
+DEBUG_CONFIDENCE = os.environ.get("SHOW_CONFIDENCE") == "1"
+
 # =============================================================================
 # 以下はプログラム本体（高速化設定は上部で変更してください）
 # =============================================================================
 
-def calculate_confidence_metrics(segments, info):
-    """セグメントから信頼度メトリクスを計算"""
+if njit:
+    @njit(cache=True, fastmath=True)
+    def _confidence_stats(scores):
+        """対数確率を信頼度(%)へその場で変換し、平均・標準偏差・最小・最大を1パスで計算"""
+        total = 0.0
+        total_sq = 0.0
+        lo = 100.0
+        hi = 0.0
+        for i in range(scores.shape[0]):
+            c = min(100.0, max(0.0, (scores[i] + 5.0) * 20.0))
+            scores[i] = c
+            total += c
+            total_sq += c * c
+            lo = min(lo, c)
+            hi = max(hi, c)
+        n = scores.shape[0]
+        mean = total / n
+        return mean, max(0.0, total_sq / n - mean * mean) ** 0.5, lo, hi
+else:
+    def _confidence_stats(scores):
+        """対数確率を信頼度(%)へその場で変換し、平均・標準偏差・最小・最大を計算（NumPy版）"""
+        np.clip((scores + 5.0) * 20.0, 0.0, 100.0, out=scores)
+        return scores.mean(), scores.std(), scores.min(), scores.max()
+
+def calculate_confidence_metrics(word_probs, segment_logprobs, segment_count, info):
+    """単語確率・セグメント平均対数確率から信頼度メトリクスを計算
+
+    セグメントの走査はテキスト抽出と同じループで済ませておき、ここでは数値だけを扱う
+    """
     try:
-        word_confidences = []
-        word_count = 0
-        total_duration = 0
-        
-        for segment in segments:
-            if hasattr(segment, 'words') and segment.words:
-                # 単語レベルの信頼度を取得
-                for word in segment.words:
-                    if hasattr(word, 'probability') and word.probability is not None:
-                        # 対数確率を信頼度パーセンテージに変換
-                        confidence = min(100.0, max(0.0, (word.probability + 5.0) / 5.0 * 100))
-                        word_confidences.append(confidence)
-                        word_count += 1
-        
-            # セグメントレベルの情報
-            if hasattr(segment, 'avg_logprob') and segment.avg_logprob is not None:
-                # 平均対数確率を信頼度に変換
-                segment_confidence = min(100.0, max(0.0, (segment.avg_logprob + 5.0) / 5.0 * 100))
-                word_confidences.append(segment_confidence)
-        
-            total_duration += getattr(segment, 'end', 0) - getattr(segment, 'start', 0)
+        log_probs = np.array(word_probs + segment_logprobs, dtype=np.float64)
+        word_count = len(word_probs)
         
         # 全体的な信頼度を計算
-        if word_confidences:
-            overall_confidence = sum(word_confidences) / len(word_confidences)
-            min_confidence = min(word_confidences)
-            max_confidence = max(word_confidences)
-            std_confidence = (sum((x - overall_confidence) ** 2 for x in word_confidences) / len(word_confidences)) ** 0.5
+        if log_probs.size:
+            overall_confidence, std_confidence, min_confidence, max_confidence = _confidence_stats(log_probs)
+            word_confidences = log_probs.tolist()
         else:
             # フォールバック: 言語確率を使用
             overall_confidence = info.language_probability * 100 if hasattr(info, 'language_probability') else 50.0
             min_confidence = max_confidence = overall_confidence
             std_confidence = 0.0
-            word_count = len(segments)
+            word_count = segment_count
+            word_confidences = []
         
         return {
             'overall_confidence': overall_confidence,
@@ -101,8 +157,8 @@ def calculate_confidence_metrics(segments, info):
             'max_confidence': max_confidence,
             'std_confidence': std_confidence,
             'word_count': word_count,
-            'segment_count': len(segments),
-            'audio_duration': getattr(info, 'duration', total_duration),
+            'segment_count': segment_count,
+            'audio_duration': getattr(info, 'duration', 0.0),
             'language_probability': getattr(info, 'language_probability', 0.0) * 100,
             'word_confidences': word_confidences
         }
@@ -116,66 +172,86 @@ def calculate_confidence_metrics(segments, info):
             'max_confidence': 50.0,
             'std_confidence': 0.0,
             'word_count': 0,
-            'segment_count': len(segments) if segments else 0,
+            'segment_count': segment_count,
             'audio_duration': 0.0,
             'language_probability': 50.0,
             'word_confidences': []
         }
 
+if njit:
+    @njit(cache=True, fastmath=True)
+    def _rms_i16(samples):
+        """int16サンプルのRMS（二乗和をそのまま整数で積算するSIMD向けループ）"""
+        total = 0
+        for i in range(samples.shape[0]):
+            total += samples[i] * samples[i]
+        return (total / samples.shape[0]) ** 0.5
+else:
+    def _rms_i16(samples):
+        """int16サンプルのRMS（NumPy版: 二乗和をint64で積算して1回で求める）"""
+        # int16同士のdotはint16でオーバーフローするので、einsumの積算型をint64にする（一時配列なし）
+        return math.sqrt(int(np.einsum('i,i->', samples, samples, dtype=np.int64)) / samples.size)
+
 class AudioRecorder:
     def __init__(self):
         self.audio = pyaudio.PyAudio()
         self.stream = None
-        self.frames = []
+        # 録音バッファ（最大録音時間分を事前確保し、posまで書き込み済み）
+        self.buffer = np.empty(MAX_SAMPLES, dtype=np.int16)
+        self.pos = 0
         self.is_recording = False
+        self.limit_reached = False  # 最大録音時間に達したかどうか
 
     def start_recording(self):
         if self.is_recording:
             print("すでに録音中です。")
             return
 
-        self.frames = []
+        self.pos = 0
+        self.limit_reached = False
+        self.is_recording = True
+        # コールバックモード: PortAudioのスレッドからチャンクが届くのでポーリング不要
         self.stream = self.audio.open(
             format=AUDIO_CONFIG["format"],
             channels=AUDIO_CONFIG["channels"],
             rate=AUDIO_CONFIG["rate"],
             input=True,
-            frames_per_buffer=AUDIO_CONFIG["chunk"]
+            frames_per_buffer=AUDIO_CONFIG["chunk"],
+            stream_callback=self._on_audio
         )
-        self.is_recording = True
         print("録音を開始しました。'stop' と入力して終了してください。")
-        
-        # 録音開始後、バックグラウンドで音声データを継続取得
-        import threading
-        self.recording_thread = threading.Thread(target=self._continuous_recording, daemon=True)
-        self.recording_thread.start()
-
-    def _continuous_recording(self):
-        """バックグラウンドで録音を継続する"""
-        frame_count = 0
-        while self.is_recording:
-            try:
-                data = self.stream.read(AUDIO_CONFIG["chunk"], exception_on_overflow=False)
-                self.frames.append(data)
-                frame_count += 1
-                
-                # 音声レベルをチェック
-                import numpy as np
-                audio_data = np.frombuffer(data, dtype=np.int16)
-                if len(audio_data) > 0:
-                    volume = np.sqrt(np.mean(audio_data.astype(np.float64)**2))
-                    if np.isnan(volume):
-                        volume = 0
-                else:
-                    volume = 0
-                    
-                if frame_count % 10 == 0:  # 10フレームごとに表示
-                    print(f"録音中... フレーム数: {frame_count}, 音量: {volume:.0f}")
-            except Exception as e:
-                print(f"録音エラー: {e}")
-                break
-            import time
-            time.sleep(0.01)  # 10ms待機
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        """PyAudioのコールバック"""
+        if not self._process_chunk(in_data):
+            return (None, pyaudio.paComplete)
+        return (None, pyaudio.paContinue)
+
+    def _process_chunk(self, data):
+        """チャンクを録音バッファに書き込み、10フレームごとに音量を表示
+
+        Returns:
+            bool: 録音を続けられる場合True（最大録音時間に達したらFalse）
+        """
+        chunk = np.frombuffer(data, dtype=np.int16)
+        end = self.pos + chunk.size
+        if end > MAX_SAMPLES:
+            self._on_limit_reached()
+            return False
+        self.buffer[self.pos:end] = chunk
+        self.pos = end
+
+        frames = self.pos // AUDIO_CONFIG["chunk"]
+        if frames % 10 == 0:  # 10フレームごとに表示
+            # 表示するフレームだけ音声レベルを計算
+            volume = _rms_i16(chunk)
+            print(f"録音中... フレーム数: {frames}, 音量: {volume:.0f}")
+        return True
+
+    def _on_limit_reached(self):
+        """最大録音時間に達したら録音データの追加を止める"""
+        self.limit_reached = True
+        print(f"⚠️ 最大録音時間（{AUDIO_CONFIG['max_seconds']}秒）に達しました。次のコマンド入力で認識を実行します。")
 
     def stop_recording(self):
         if not self.is_recording:
@@ -183,45 +259,16 @@ class AudioRecorder:
             return None
 
         self.is_recording = False
-        
-        # スレッドの終了を待つ
-        if hasattr(self, 'recording_thread') and self.recording_thread.is_alive():
-            self.recording_thread.join(timeout=1.0)
-        
         self.stream.stop_stream()
         self.stream.close()
 
-        # 一時ファイルに保存
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            temp_filename = temp_file.name
-            wf = wave.open(temp_filename, 'wb')
-            wf.setnchannels(AUDIO_CONFIG["channels"])
-            wf.setsampwidth(self.audio.get_sample_size(AUDIO_CONFIG["format"]))
-            wf.setframerate(AUDIO_CONFIG["rate"])
-            wf.writeframes(b''.join(self.frames))
-            wf.close()
+        # WAVファイルを経由せず、Whisperが直接受け取れるfloat32配列に変換
+        # 型変換と正規化を1回の走査で行う（中間のfloat32配列を作らない）
+        audio = np.empty(self.pos, dtype=np.float32)
+        np.multiply(self.buffer[:self.pos], np.float32(1.0 / 32768.0), out=audio, dtype=np.float32, casting='unsafe')
 
         print("録音を終了しました。音声認識中...")
-        return temp_filename
-
-    def record_chunk(self):
-        if self.is_recording:
-            try:
-                data = self.stream.read(AUDIO_CONFIG["chunk"], exception_on_overflow=False)
-                self.frames.append(data)
-                # 音声レベルをチェック
-                import numpy as np
-                audio_data = np.frombuffer(data, dtype=np.int16)
-                if len(audio_data) > 0:
-                    volume = np.sqrt(np.mean(audio_data.astype(np.float64)**2))
-                    if np.isnan(volume):
-                        volume = 0
-                else:
-                    volume = 0
-                if len(self.frames) % 10 == 0:  # 10フレームごとに表示
-                    print(f"録音中... フレーム数: {len(self.frames)}, 音量: {volume:.0f}")
-            except Exception as e:
-                print(f"録音エラー: {e}")
+        return audio
 
     def close(self):
         self.audio.terminate()
@@ -237,8 +284,19 @@ def list_audio_devices():
     p.terminate()
     print()
 
+def parse_args():
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(description="Faster Whisper 音声認識テスト")
+    parser.add_argument("--mode", choices=sorted(TRANSCRIBE_CONFIGS), default="fast",
+                        help="認識モード: fast=速度重視, accurate=精度重視 (デフォルト: fast)")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    transcribe_config = TRANSCRIBE_CONFIGS[args.mode]
+
     print("🎤 Faster Whisper 音声認識テスト")
+    print(f"認識モード: {args.mode}")
     print("コマンド: start (録音開始), stop (録音終了・認識), quit (終了)")
     print("-" * 50)
     
@@ -247,6 +305,8 @@ def main():
 
     # Whisperモデルをロード（高速化設定）
     print("Whisperモデルをロード中...")
+    # CTranslate2の共有ライブラリ読み込みが重いので、--helpやデバイス一覧表示の後まで遅らせる
+    from faster_whisper import WhisperModel
     model = WhisperModel(
         MODEL_CONFIG["model_size"],
         device=MODEL_CONFIG["device"],
@@ -256,14 +316,30 @@ def main():
     )
     print("モデルロード完了")
 
+    # ウォームアップ: 1秒の無音で一度認識を回し、スレッドプールの起動と
+    # 初回のカーネル解決を済ませて初回認識の遅延をなくす
+    # （VADを通すと無音は全て除かれてエンコーダもデコーダも動かないので、ここではVADを切る）
+    print("モデルをウォームアップ中...")
+    warmup_segments, _ = model.transcribe(
+        np.zeros(AUDIO_CONFIG["rate"], dtype=np.float32),
+        language=transcribe_config["language"],
+        vad_filter=False
+    )
+    list(warmup_segments)
+    # 音量メーターもここで一度呼んでおく（numba使用時はJITコンパイルが走る）
+    _rms_i16(np.zeros(AUDIO_CONFIG["chunk"], dtype=np.int16))
+    print("ウォームアップ完了")
+
     recorder = AudioRecorder()
 
     try:
-        import time
-        
         while True:
             command = input("コマンド: ").strip().lower()
 
+            # 最大録音時間に達していたら入力に関わらず認識処理へ進む
+            if recorder.limit_reached and recorder.is_recording and command != "quit":
+                command = "stop"
+
             if command == "start":
                 if not recorder.is_recording:
                     recorder.start_recording()
@@ -276,52 +352,75 @@ def main():
                     # stopコマンド入力時の時間を記録
                     stop_command_time = time.time()
                     
-                    temp_file = recorder.stop_recording()
-                    if temp_file:
-                        # ファイルサイズをチェック
-                        file_size = os.path.getsize(temp_file)
-                        print(f"音声ファイルサイズ: {file_size} bytes")
+                    audio = recorder.stop_recording()
+                    if audio is not None:
+                        # 録音長をチェック
+                        print(f"録音時間: {audio.size / AUDIO_CONFIG['rate']:.2f}秒")
                         
-                        if file_size < 1000:  # 1KB未満の場合は警告
+                        if audio.size < AUDIO_CONFIG["rate"] // 2:  # 0.5秒未満の場合は警告
                             print("⚠️ 音声データが短すぎます。マイクが正しく動作していない可能性があります。")
                         
                         # 音声認識（sync_siriusface.pyを参考にしたパラメータチューニング）
                         print("音声認識処理中...")
                         
+                        # 短い発話は短い窓でエンコードし、30秒分のパディングを避ける
+                        chunk_length = transcribe_config["chunk_length"]
+                        short_chunk_length = transcribe_config["short_chunk_length"]
+                        if short_chunk_length and audio.size < AUDIO_CONFIG["rate"] * short_chunk_length:
+                            chunk_length = short_chunk_length
+                        
                         try:
                             segments, info = model.transcribe(
-                                temp_file,
-                                language=TRANSCRIBE_CONFIG["language"],
-                                beam_size=TRANSCRIBE_CONFIG["beam_size"],
-                                temperature=TRANSCRIBE_CONFIG["temperature"],
-                                compression_ratio_threshold=TRANSCRIBE_CONFIG["compression_ratio_threshold"],
-                                log_prob_threshold=TRANSCRIBE_CONFIG["log_prob_threshold"],
-                                no_speech_threshold=TRANSCRIBE_CONFIG["no_speech_threshold"],
-                                condition_on_previous_text=TRANSCRIBE_CONFIG["condition_on_previous_text"],
-                                initial_prompt=TRANSCRIBE_CONFIG["initial_prompt"],
-                                word_timestamps=TRANSCRIBE_CONFIG["word_timestamps"],
-                                vad_filter=TRANSCRIBE_CONFIG["vad_filter"],
-                                vad_parameters=TRANSCRIBE_CONFIG["vad_parameters"]
+                                audio,
+                                language=transcribe_config["language"],
+                                beam_size=transcribe_config["beam_size"],
+                                temperature=transcribe_config["temperature"],
+                                compression_ratio_threshold=transcribe_config["compression_ratio_threshold"],
+                                log_prob_threshold=transcribe_config["log_prob_threshold"],
+                                no_speech_threshold=transcribe_config["no_speech_threshold"],
+                                condition_on_previous_text=transcribe_config["condition_on_previous_text"],
+                                initial_prompt=transcribe_config["initial_prompt"],
+                                word_timestamps=transcribe_config["word_timestamps"],
+                                without_timestamps=transcribe_config["without_timestamps"],
+                                chunk_length=chunk_length,
+                                vad_filter=transcribe_config["vad_filter"],
+                                vad_parameters=transcribe_config["vad_parameters"]
                             )
                             
                             # セグメントからテキストを抽出
-                            segments_list = list(segments)
-                            text = "".join(segment.text for segment in segments_list).strip()
+                            # 1回の走査でテキストと信頼度計算用の値をまとめて取り出す
+                            # （list()で一度に実体化せず、デコーダが次のセグメントを
+                            #   生成する合間に取り出し処理を進める）
+                            texts = []
+                            word_probs = []
+                            segment_logprobs = []
+                            for segment in segments:
+                                texts.append(segment.text)
+                                if not DEBUG_CONFIDENCE:
+                                    continue
+                                if segment.avg_logprob is not None:
+                                    segment_logprobs.append(segment.avg_logprob)
+                                if segment.words:
+                                    word_probs.extend(w.probability for w in segment.words if w.probability is not None)
+                            text = "".join(texts).strip()
                             
                             # stopコマンドから認識完了までの時間を計算
                             recognition_end = time.time()
                             total_time_from_stop = recognition_end - stop_command_time
                             
                             # 簡潔なデバッグ情報（速度優先）
-                            print(f"セグメント数: {len(segments_list)}")
-                            
-                            # 信頼度情報を計算（簡略化）
-                            confidence_info = calculate_confidence_metrics(segments_list, info)
+                            print(f"セグメント数: {len(texts)}")
                             
                             print(f"認識結果: {text}")
                             print(f"言語: {info.language} (確信度: {info.language_probability:.2f})")
                             print(f"音声時間: {info.duration:.2f}秒")
-                            print(f"認識精度: {confidence_info['overall_confidence']:.1f}% (単語数: {confidence_info['word_count']})")
+                            if DEBUG_CONFIDENCE:
+                                # 信頼度情報を計算（SHOW_CONFIDENCE=1 のときのみ）
+                                confidence_info = calculate_confidence_metrics(word_probs, segment_logprobs, len(texts), info)
+                                print(f"認識精度: {confidence_info['overall_confidence']:.1f}% (単語数: {confidence_info['word_count']})")
+                            else:
+                                # 簡易推定: 言語確率をそのまま使う
+                                print(f"認識精度(簡易): {info.language_probability * 100:.1f}%")
                             print(f"⏱️  stopコマンドから完了まで: {total_time_from_stop:.2f}秒")
                             
                             # 処理効率の計算
@@ -334,12 +433,6 @@ def main():
                             
                         except Exception as transcribe_error:
                             print(f"❌ 音声認識エラー: {transcribe_error}")
-                        
-                        # 一時ファイルを削除
-                        try:
-                            os.unlink(temp_file)
-                        except:
-                            pass
                     print("-" * 50)
                 else:
                     print("録音中ではありません。")
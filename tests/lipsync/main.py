@@ -5,12 +5,21 @@ VOICEVOX音声合成 + 音韻解析 + 口の形制御
 """
 
 import os
+import re
+import sys
+import ctypes
+import contextlib
 import time as time_module
 import threading
-import urllib.request
-import urllib.parse
-import json
+import struct
+from concurrent.futures import ThreadPoolExecutor, wait
 from pprint import pprint
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None  # numbaが無い場合は通常のPython関数として実行
 
 try:
     import requests
@@ -22,12 +31,157 @@ except ImportError:
 
 # 分割されたモジュールをインポート
 from speech_synthesis import SpeechSynthesizer
-from phoneme_analysis import PhonemeAnalyzer
-from mouth_control import MouthController, TalkingModeController, AudioPlayer
+from phoneme_analysis import PhonemeAnalyzer, _SHAPE_NAMES, _kana_shape_code, _kanji_reading
+from mouth_control import MouthController, TalkingModeController, AudioPlayer, LIPSYNC_DEBUG, get_shared_session
 
 # シリウス表情制御API
 SIRIUS_API_URL = "http://localhost:8080"
 
+# 単語分割用の正規表現（かなの連続 / かな以外の連続 / 句読点1文字、空白は読み飛ばす）
+_WORD_RE = re.compile(r'[\u3040-\u309f\u30a0-\u30ff]+|[^\u3040-\u309f\u30a0-\u30ff、。,.！？!?\s]+|[、。,.！？!?]')
+
+# 句読点として扱う単語
+_PUNCT = frozenset(',、。.!！?？')
+
+# 口形状コード → 単語ベース用の母音（かな以外は'a'）
+_WORD_VOWELS = ('a', 'a', 'i', 'o')
+
+# prctl(2)でスレッドのタイマースラック（スリープ起床の許容遅れ、既定50µs）を設定する番号
+_PR_SET_TIMERSLACK = 29
+_PR_GET_TIMERSLACK = 30
+# タイミングループ中のリアルタイム優先度（SCHED_FIFO、root/CAP_SYS_NICEが必要）
+_TIMING_FIFO_PRIORITY = 10
+
+# 寝過ごし量の1回分の上限（GCやデスケジュールによる長い停止で平均が跳ね上がらないようにする）
+_MAX_DRIFT_SAMPLE_NS = 2_000_000
+
+_libc = None
+if sys.platform.startswith('linux'):
+    try:
+        _libc = ctypes.CDLL(None, use_errno=True)
+    except OSError:
+        _libc = None
+
+@contextlib.contextmanager
+def _timing_priority():
+    """呼び出したスレッドの起床精度を一時的に上げる（Linuxのみ、権限が無ければできる範囲で）
+
+    タイマースラックを1nsにし、可能ならSCHED_FIFOにする。権限不足でFIFOにできない場合は
+    nice値を下げることを試みる。抜けるときに元の設定へ戻す。
+    """
+    old_slack = None
+    old_policy = None
+    old_nice = None
+    if _libc is not None:
+        old_slack = _libc.prctl(_PR_GET_TIMERSLACK, 0, 0, 0, 0)
+        if old_slack < 0 or _libc.prctl(_PR_SET_TIMERSLACK, 1, 0, 0, 0) != 0:
+            old_slack = None
+    if hasattr(os, 'sched_setscheduler'):
+        try:
+            old_policy = (os.sched_getscheduler(0), os.sched_getparam(0))
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(_TIMING_FIFO_PRIORITY))
+        except (PermissionError, OSError):
+            old_policy = None
+            try:
+                tid = threading.get_native_id()
+                nice = os.getpriority(os.PRIO_PROCESS, tid)
+                os.setpriority(os.PRIO_PROCESS, tid, -10)
+                old_nice = (tid, nice)
+            except (PermissionError, OSError):
+                pass  # 一般ユーザーでは優先度を上げられないのでタイマースラックだけ使う
+    try:
+        yield
+    finally:
+        if old_policy is not None:
+            try:
+                os.sched_setscheduler(0, *old_policy)
+            except OSError:
+                pass
+        if old_nice is not None:
+            os.setpriority(os.PRIO_PROCESS, *old_nice)
+        if old_slack is not None:
+            _libc.prctl(_PR_SET_TIMERSLACK, old_slack, 0, 0, 0)
+
+def _scan_wav_duration(wav_data):
+    """RIFFチャンクを順に辿り、fmtとdataチャンクから音声の長さ（秒）を求める"""
+    if wav_data[0:4] != b'RIFF' or wav_data[8:12] != b'WAVE':
+        raise ValueError("RIFF/WAVEヘッダではありません")
+    
+    offset = 12
+    bytes_per_second = None
+    end = len(wav_data) - 8
+    while offset <= end:
+        chunk_id = wav_data[offset:offset + 4]
+        chunk_size, = struct.unpack_from('<I', wav_data, offset + 4)
+        if chunk_id == b'fmt ':
+            channels, rate = struct.unpack_from('<HI', wav_data, offset + 10)
+            bits_per_sample, = struct.unpack_from('<H', wav_data, offset + 22)
+            bytes_per_second = rate * channels * (bits_per_sample // 8)
+        elif chunk_id == b'data':
+            if not bytes_per_second:
+                raise ValueError("dataチャンクより前にfmtチャンクがありません")
+            return chunk_size / float(bytes_per_second)
+        offset += 8 + chunk_size + (chunk_size & 1)  # チャンクは2バイト境界に揃う
+    
+    raise ValueError("dataチャンクが見つかりません")
+
+def _compute_word_durations(char_counts, is_punct, total_duration, base_duration_per_char,
+                            min_duration_per_word, punctuation_duration):
+    """文字数に比例して単語ごとの時間を分配し、総時間に合うよう実単語の時間を調整する"""
+    n = char_counts.shape[0]
+    durations = np.empty(n, dtype=np.float64)
+    punctuation_count = 0
+    current_word_total = 0.0
+    
+    # 句読点は固定時間、実単語はベース時間 + 文字数ボーナス
+    for i in range(n):
+        if is_punct[i]:
+            durations[i] = punctuation_duration
+            punctuation_count += 1
+        else:
+            duration = max(char_counts[i] * base_duration_per_char, min_duration_per_word)
+            durations[i] = duration
+            current_word_total += duration
+    
+    # 実単語の総時間
+    word_total_time = total_duration - punctuation_count * punctuation_duration
+    if word_total_time < 0:
+        word_total_time = total_duration * 0.8  # 最低でも80%は単語に
+    
+    # 実単語の時間を調整してフィットさせる
+    if current_word_total > 0 and word_total_time > 0:
+        scale_factor = word_total_time / current_word_total
+        for i in range(n):
+            if not is_punct[i]:
+                durations[i] *= scale_factor
+    
+    return durations
+
+def _compute_word_durations_vectorized(char_counts, is_punct, total_duration, base_duration_per_char,
+                                       min_duration_per_word, punctuation_duration):
+    """_compute_word_durations と同じ計算をNumPyのufuncでまとめて行う（numba無し環境用）"""
+    is_word = ~is_punct
+    durations = np.where(is_punct, punctuation_duration,
+                         np.maximum(char_counts * base_duration_per_char, min_duration_per_word))
+    current_word_total = durations[is_word].sum()
+    
+    # 実単語の総時間
+    word_total_time = total_duration - np.count_nonzero(is_punct) * punctuation_duration
+    if word_total_time < 0:
+        word_total_time = total_duration * 0.8  # 最低でも80%は単語に
+    
+    # 実単語の時間を調整してフィットさせる
+    if current_word_total > 0 and word_total_time > 0:
+        durations[is_word] *= word_total_time / current_word_total
+    
+    return durations
+
+if njit:
+    _compute_word_durations = njit(cache=True)(_compute_word_durations)
+else:
+    # numbaが無い場合、要素ごとのPythonループはNumPyスカラー演算で遅いのでベクトル版を使う
+    _compute_word_durations = _compute_word_durations_vectorized
+
 class LipSyncController:
     def __init__(self):
         # 分割されたモジュールの初期化
@@ -37,6 +191,20 @@ class LipSyncController:
         self.audio_player = AudioPlayer()
         self.talking_controller = TalkingModeController() if requests else None
         
+        # 口パターン送信用のHTTPセッション（各コントローラーと同じKeep-Alive接続プールを共有）
+        self.http = get_shared_session()
+        # 非同期送信用の常駐ワーカー
+        self._http_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='mouth_http')
+        # 音声再生用の常駐スレッド（発話ごとにスレッドを作らない）
+        self._audio_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='audio')
+        # time.sleepの寝過ごし量（ns）の指数移動平均（_wait_until_nsで次のスリープから差し引く）
+        self._sleep_drift_ns = 0
+        # サーバーが一括スケジュールに対応していれば口パターンを1リクエストで送る
+        self._schedule_supported = self._detect_mouth_schedule()
+        # 音声出力デバイスと口パターン送信の接続を裏で温めておく（初回発話のコールドスタート対策）
+        self._audio_pool.submit(self.audio_player.prewarm)
+        self._http_pool.submit(self.mouth_controller.prewarm)
+        
         # 音声パラメータ（ハードコードされた設定）
         self.style_id = 54
         self.speed_scale = 1.0
@@ -45,6 +213,19 @@ class LipSyncController:
         
         print(f"✅ 音声設定: style_id={self.style_id}, speed={self.speed_scale}, pitch={self.pitch_scale}, intonation={self.intonation_scale}")
     
+    def close(self):
+        """常駐ワーカーとコントローラーを終了"""
+        self._audio_pool.shutdown(wait=False)
+        self._http_pool.shutdown(wait=False)
+        self.mouth_controller.close()
+        # self.httpはプロセス共有のセッションなので閉じない（終了時にget_shared_sessionが閉じる）
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
     def phoneme_to_mouth_shape(self, phoneme):
         """音韻から口の形にマッピング"""
         mouth_mapping = {
@@ -68,53 +249,22 @@ class LipSyncController:
         return mouth_mapping.get(phoneme, None)
 
     def play_audio_precise(self, wav_data, start_event):
-        """音声を再生（精密同期版）"""
-        try:
-            import tempfile
-            import subprocess
-            
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_file.write(wav_data)
-                temp_file_path = temp_file.name
-            
-            # 再生開始を通知
-            start_event.set()
-            
-            # afplayで再生
-            process = subprocess.Popen(['afplay', temp_file_path], 
-                                     stdout=subprocess.DEVNULL, 
-                                     stderr=subprocess.DEVNULL)
-            process.wait()
-            os.unlink(temp_file_path)
-        except Exception as e:
-            print(f"❌ 音声再生エラー: {e}")
+        """音声を再生（精密同期版）
+
+        一時ファイルを書かずに済むよう、標準入力パイプ対応のAudioPlayerに任せる
+        """
+        self.audio_player.play_audio_precise(wav_data, start_event)
 
     def get_current_mouth_pattern(self):
-        """現在のシリウス口パターンを取得"""
-        try:
-            req = urllib.request.Request(f"{SIRIUS_API_URL}/mouth_pattern")
-            with urllib.request.urlopen(req, timeout=0.1) as response:
-                if response.getcode() == 200:
-                    data = json.loads(response.read().decode('utf-8'))
-                    return data.get('mouth_pattern')
-        except Exception as e:
-            print(f"⚠️ 現在の口パターン取得エラー: {e}")
-        return None  # 取得できない場合はNone
+        """現在のシリウス口パターンを取得（取得できない場合はNone）"""
+        return self.mouth_controller.get_current_mouth_pattern()
 
     def set_mouth_pattern(self, pattern):
-        """シリウスの口パターンを設定（同期版）"""
-        try:
-            data = json.dumps({"mouth_pattern": pattern}).encode('utf-8')
-            req = urllib.request.Request(
-                f"{SIRIUS_API_URL}/mouth_pattern",
-                data=data,
-                headers={'Content-Type': 'application/json'}
-            )
-            with urllib.request.urlopen(req, timeout=0.5) as response:
-                return response.getcode() == 200
-        except Exception as e:
-            print(f"❌ 口パターン設定エラー: {e}")
-            return False
+        """シリウスの口パターンを設定（同期版）
+
+        直前と同じパターンの送信はMouthController側で省かれる
+        """
+        return self.mouth_controller.set_mouth_pattern(pattern)
 
     def reset_to_neutral(self):
         """全設定をニュートラルにリセット（口パターンを元の表情の自然な口に戻す）"""
@@ -129,23 +279,139 @@ class LipSyncController:
             return False
 
     def set_mouth_pattern_async(self, pattern):
-        """シリウスの口パターンを非同期設定"""
-        def _set_pattern():
-            try:
-                data = json.dumps({"mouth_pattern": pattern}).encode('utf-8')
-                req = urllib.request.Request(
-                    f"{SIRIUS_API_URL}/mouth_pattern",
-                    data=data,
-                    headers={'Content-Type': 'application/json'}
-                )
-                with urllib.request.urlopen(req, timeout=0.05) as response:
-                    return response.getcode() == 200
-            except:
+        """シリウスの口パターンを非同期設定（直前と同じパターンは送信しない）"""
+        self.mouth_controller.set_mouth_pattern_async(pattern)
+
+    def _wait_until_ns(self, deadline_ns):
+        """perf_counter_ns基準の期限まで待機
+
+        スピン待機はGILを握ってHTTP送信スレッドを止めるだけなので、1回のスリープで待つ。
+        OSの寝過ごし量を指数移動平均で学習し、その分だけ早めに起きるようにする
+        """
+        remaining = deadline_ns - time_module.perf_counter_ns()
+        intended = remaining - self._sleep_drift_ns
+        if intended > 0:
+            before = time_module.perf_counter_ns()
+            time_module.sleep(intended / 1e9)
+            actual = time_module.perf_counter_ns() - before
+            sample = min(max(actual - intended, 0), _MAX_DRIFT_SAMPLE_NS)
+            self._sleep_drift_ns = int(0.9 * self._sleep_drift_ns + 0.1 * sample)
+        else:
+            # 学習値が大きすぎて眠れなかった場合も減衰させ、早起きし続けないようにする
+            self._sleep_drift_ns = int(0.9 * self._sleep_drift_ns)
+
+    def _detect_mouth_schedule(self):
+        """サーバーが/mouth_schedule（一括スケジュール）に対応しているか確認"""
+        if not self.http:
+            return False
+        try:
+            response = self.http.head(f"{SIRIUS_API_URL}/mouth_schedule", timeout=0.2)
+            return response.status_code < 400
+        except Exception:
+            return False
+
+    def _post_mouth_schedule(self, audio_start_ns, seq_times, patterns):
+        """口パターン（mouth_形式）のスケジュール全体を1リクエストで送信
+
+        基準時刻はサーバーと共有できるようにエポック秒（time.time）に換算して渡す
+        """
+        t0 = time_module.time() + (audio_start_ns - time_module.perf_counter_ns()) / 1e9
+        events = [[seq_time, pattern] for seq_time, pattern in zip(seq_times, patterns)]
+        try:
+            response = self.http.post(
+                f"{SIRIUS_API_URL}/mouth_schedule",
+                json={"t0": t0, "events": events},
+                timeout=1.0
+            )
+            if response.status_code == 404:
+                # エンドポイントが無くなった場合は以降の発話でも逐次送信にする
+                self._schedule_supported = False
                 return False
-        
-        # 非同期実行
-        thread = threading.Thread(target=_set_pattern, daemon=True)
-        thread.start()
+            if response.status_code != 200:
+                return False
+            # サーバー側の実測値があれば表示
+            stats = response.json().get("stats")
+            if stats:
+                print(f"📈 サーバー同期精度: {stats}")
+            return True
+        except Exception as e:
+            print(f"❌ スケジュール送信エラー: {e}")
+            return False
+
+    def _wait_until_audio_time(self, seq_time, deadline_ns):
+        """再生位置がseq_time（秒）に達するまで待機し、その時点の再生位置を返す
+
+        sounddeviceで再生していない場合はperf_counter_ns基準の期限まで待ってNoneを返す
+        """
+        position = self.audio_player.playback_position()
+        while position is not None and position < seq_time:
+            # 再生位置はコールバック単位でしか進まないので、残り時間と数msの短い方だけ眠る
+            time_module.sleep(min(seq_time - position, 0.005))
+            position = self.audio_player.playback_position()
+        if position is None:
+            self._wait_until_ns(deadline_ns)
+        return position
+
+    def _run_mouth_sequence(self, shapes, seq_times, targets, ends):
+        """口パターンを目標時刻（perf_counter_ns）ごとに逐次送信し、同期精度を表示
+
+        区間の終了時刻（ends）を過ぎてしまったパターンは送らずに次へ進む
+        """
+        # 前回の発話後はおしゃべりモード側で口をクリアしているので送信記録を捨てる
+        self.mouth_controller.forget_last_pattern()
+        actuals = np.full(len(shapes), np.nan)  # 実際に口パターンを設定した時刻（ns）
+        
+        # 同期送信するかどうかを事前に決めておく
+        # 最初の0.5秒間と最初の口パターンは同期版でタイミングを確実にし、その後は非同期版で高速化
+        sync_flags = seq_times < 0.5
+        first_real = next((i for i, shape in enumerate(shapes) if shape), None)
+        if first_real is not None:
+            sync_flags[first_real] = True
+        skipped = 0
+        # sounddevice再生中は再生済みフレーム数（オーディオクロック）で区間の終わりを判定する
+        seq_ends = seq_times + (ends - targets) / 1e9
+        
+        # タイミングループの間だけスレッドの優先度とタイマー精度を上げる
+        with _timing_priority():
+            for i, mouth_shape in enumerate(shapes):
+                target_ns = int(targets[i])
+            
+                # オーディオクロックで待つ（再生していなければperf_counterの期限まで待つ）
+                position = self._wait_until_audio_time(seq_times[i], target_ns)
+            
+                # 区間が終わるほど遅れている場合は送信を省いて追いつく
+                if (position > seq_ends[i]) if position is not None else (time_module.perf_counter_ns() > ends[i]):
+                    skipped += 1
+                    continue
+            
+                # 口パターン設定
+                if mouth_shape:
+                    server_pattern = f"mouth_{mouth_shape}"
+                    if sync_flags[i]:
+                        success = self.mouth_controller.set_mouth_pattern(server_pattern)
+                        if not success:
+                            print(f"⚠️ 口パターン設定失敗: {server_pattern}")
+                    else:
+                        self.mouth_controller.set_mouth_pattern_async(server_pattern)
+                
+                    # 設定時刻を記録（精度評価はループ後にまとめて行う）
+                    actuals[i] = time_module.perf_counter_ns()
+                    if LIPSYNC_DEBUG:
+                        print(f"{seq_times[i]:.2f}s: {server_pattern} (誤差:{(actuals[i] - target_ns) / 1e6:+.1f}ms)")
+        
+        # 同期統計を表示
+        sent = ~np.isnan(actuals)
+        errors_ms = np.abs(actuals[sent] - targets[sent]) / 1e6
+        total_patterns = errors_ms.size
+        if total_patterns > 0:
+            perfect = int((errors_ms <= 5).sum())
+            good = int((errors_ms <= 15).sum()) - perfect
+            poor = total_patterns - perfect - good
+            perfect_rate = perfect / total_patterns * 100
+            print(f"📈 同期精度: ✓{perfect} ~{good} ⚠{poor} "
+                  f"({perfect_rate:.1f}% が5ms以内の精度)")
+        if skipped:
+            print(f"⏭️ 遅延により{skipped}個の口パターンをスキップ")
 
     def speak_with_lipsync(self, text, style_id=None, speed_scale=None, restore_original_mouth=True):
         """音声合成 + リップシンク（超精密同期版）
@@ -163,43 +429,32 @@ class LipSyncController:
         print(f"�🎤 合成: 「{text}」 (速度: {speed_scale}x, スタイル: {style_id})")
         print(f"📏 文字数: {len(text)}文字")
         
-        # 1. 発話前の元の口パターンを保存
-        original_mouth_pattern = None
-        if restore_original_mouth:
-            original_mouth_pattern = self.mouth_controller.get_current_mouth_pattern()
-            print(f"💾 元の口パターン保存: {original_mouth_pattern}")
-        
         # AudioQuery音韻解析を使用
         try:
             audio_query = self.speech_synthesizer.create_audio_query(text, style_id)
             self.speech_synthesizer.set_speed_scale(audio_query, speed_scale)
-            mouth_sequence = self.phoneme_analyzer.get_mouth_shape_sequence(audio_query, speed_scale)
+            # 時刻・長さ・口形状を別々の配列（SoA）で受け取り、タイミングループでそのまま使う
+            # （同じ口形状の連続は解析側でまとめ済み）
+            seq_times, durations, shapes = self.phoneme_analyzer.get_mouth_shape_arrays(
+                audio_query, speed_scale, cache_key=(text, style_id)
+            )
             print("✅ AudioQuery音韻解析成功")
         except Exception as e:
             print(f"❌ AudioQuery音韻解析エラー: {e}")
             print("🔄 文字ベース解析にフォールバック")
             return self.speak_with_lipsync_fallback(text, style_id, speed_scale, restore_original_mouth)
         
-        print("📝 口パターンシーケンス:")
-        mouth_pattern_count = 0
-        none_pattern_count = 0
-        for i, (seq_time, mouth_shape, duration) in enumerate(mouth_sequence[:10]):  # 最初の10個まで表示
-            print(f"  {seq_time:.2f}s: {mouth_shape} ({duration:.2f}s)")
-            if mouth_shape is not None:
-                mouth_pattern_count += 1
-            else:
-                none_pattern_count += 1
+        mouth_pattern_count = sum(1 for mouth_shape in shapes if mouth_shape is not None)
+        none_pattern_count = len(shapes) - mouth_pattern_count
         
-        if len(mouth_sequence) > 10:
-            remaining = len(mouth_sequence) - 10
-            for seq_time, mouth_shape, duration in mouth_sequence[10:]:
-                if mouth_shape is not None:
-                    mouth_pattern_count += 1
-                else:
-                    none_pattern_count += 1
-            print(f"  ... 他{remaining}個")
+        if LIPSYNC_DEBUG:
+            print("📝 口パターンシーケンス:")
+            for i in range(min(10, len(shapes))):  # 最初の10個まで表示
+                print(f"  {seq_times[i]:.2f}s: {shapes[i]} ({durations[i]:.2f}s)")
+            if len(shapes) > 10:
+                print(f"  ... 他{len(shapes) - 10}個")
         
-        print(f"📊 統計: 総パターン数{len(mouth_sequence)}, 口パターン{mouth_pattern_count}個, None{none_pattern_count}個")
+        print(f"📊 統計: 総パターン数{len(shapes)}, 口パターン{mouth_pattern_count}個, None{none_pattern_count}個")
         
         # 音声合成
         try:
@@ -212,107 +467,77 @@ class LipSyncController:
         # 超精密同期モード
         print("🎯 超精密同期モード開始...")
         
-        # 2. 同期イベントを作成
-        audio_start_event = threading.Event()
-        
-        # 3. 音声再生スレッドを開始
-        audio_thread = threading.Thread(target=self.audio_player.play_audio_precise, args=(wav_data, audio_start_event))
-        audio_thread.daemon = True
-        audio_thread.start()
+        # 2. オーディオクロック基準で再生開始（DAC出力時刻をそのまま基準にする）
+        actual_audio_start_ns = self.audio_player.start_clocked_playback(wav_data)
+        clocked = actual_audio_start_ns is not None  # 再生位置（オーディオクロック）を参照できる
         
-        # 4. 音声再生開始を待機
-        audio_start_event.wait()
-        actual_audio_start = time_module.time()
+        if not clocked:
+            # sounddeviceが使えない場合は外部コマンド再生 + 同期イベント
+            audio_start_event = threading.Event()
+            
+            # 3. 音声再生スレッドを開始
+            self._audio_pool.submit(self.audio_player.play_audio_precise, wav_data, audio_start_event)
+            
+            # 4. 音声再生開始を待機
+            audio_start_event.wait()
+            # 壁時計(time.time)はNTP補正で揺れるので単調増加のperf_counterを基準にする
+            actual_audio_start_ns = time_module.perf_counter_ns()
         
-        print(f"🔊 音声再生開始検知: {actual_audio_start:.6f}")
+        print(f"🔊 音声再生開始検知: {actual_audio_start_ns / 1e9:.6f}")
         
         # 6. リップシンク実行（音声開始と完全同期）
-        timing_stats = {'perfect': 0, 'good': 0, 'poor': 0}
-        first_mouth_pattern = True  # 最初の口パターン設定フラグ
+        # 目標時刻 = 音声開始時刻 + シーケンス時刻 をループ前にまとめて計算しておく（ns）
+        targets = actual_audio_start_ns + (seq_times * 1e9).astype(np.int64)
+        ends = targets + (durations * 1e9).astype(np.int64)
         
-        for seq_time, mouth_shape, duration in mouth_sequence:
-            # 目標時間 = 音声開始時間 + シーケンス時間
-            target_time = actual_audio_start + seq_time
-            
-            # 高精度なタイミング制御
-            while True:
-                current_time = time_module.time()
-                time_to_target = target_time - current_time
-                
-                if time_to_target <= 0.0001:  # 0.1ms以内の精度
-                    break
-                elif time_to_target > 0:
-                    # 短い時間はスピンウェイト
-                    if time_to_target < 0.001:
-                        pass  # スピン
-                    else:
-                        time_module.sleep(max(0.0001, time_to_target - 0.0005))
-                else:
-                    # 遅延が発生
-                    break
-            
-            # 最初の口パターン設定前におしゃべりモードを有効化
-            if first_mouth_pattern and self.talking_controller:
-                self.talking_controller.set_talking_mode(True)
-                print("🎭 おしゃべりモード有効化（最初の口パターン設定前）")
-                # おしゃべりモード有効化の処理を待つ
-                time_module.sleep(0.02)  # 20msの短い待機
-            
-            # 口パターン設定（同期版で確実に設定）
-            server_pattern = f"mouth_{mouth_shape}" if mouth_shape else None
-            if server_pattern:
-                # 最初のパターン設定時は同期版を使用してタイミングを確実にする
-                if first_mouth_pattern or seq_time < 0.5:  # 最初の0.5秒間は同期版
-                    success = self.mouth_controller.set_mouth_pattern(server_pattern)
-                    if not success:
-                        print(f"⚠️ 口パターン設定失敗: {server_pattern}")
-                    if first_mouth_pattern:
-                        first_mouth_pattern = False
-                else:
-                    # その後は非同期版で高速化
-                    self.mouth_controller.set_mouth_pattern_async(server_pattern)
-                
-                # タイミング精度評価
-                actual_time = time_module.time()
-                timing_error_ms = (actual_time - target_time) * 1000
-                
-                if abs(timing_error_ms) <= 5:
-                    sync_indicator = "✓"
-                    timing_stats['perfect'] += 1
-                elif abs(timing_error_ms) <= 15:
-                    sync_indicator = "~"
-                    timing_stats['good'] += 1
-                else:
-                    sync_indicator = "⚠"
-                    timing_stats['poor'] += 1
-                
-                print(f"{sync_indicator} {seq_time:.2f}s: {server_pattern} (誤差:{timing_error_ms:+.1f}ms)")
-        
-        # 5. 同期統計を表示
-        total_patterns = timing_stats['perfect'] + timing_stats['good'] + timing_stats['poor']
-        if total_patterns > 0:
-            perfect_rate = timing_stats['perfect'] / total_patterns * 100
-            print(f"📈 同期精度: ✓{timing_stats['perfect']} ~{timing_stats['good']} ⚠{timing_stats['poor']} "
-                  f"({perfect_rate:.1f}% が5ms以内の精度)")
+        # 最初の口パターン設定前におしゃべりモードを有効化
+        if self.talking_controller:
+            self.talking_controller.set_talking_mode(True)
+            print("🎭 おしゃべりモード有効化（最初の口パターン設定前）")
+            # おしゃべりモード有効化の処理を待つ
+            time_module.sleep(0.02)  # 20msの短い待機
+        
+        # サーバー側スケジュールはMouthControllerを経由しないので送信済み記録を破棄しておく
+        self.mouth_controller.forget_last_pattern()
+        patterns = [f"mouth_{shape}" for shape in shapes]
+        scheduled = False
+        if self._schedule_supported and shapes:
+            # スケジュールを一括送信し、タイミング制御はサーバー側に任せる
+            scheduled = self._post_mouth_schedule(actual_audio_start_ns, seq_times.tolist(), patterns)
+            if not scheduled:
+                print("🔄 スケジュール送信失敗のため逐次送信に切り替えます")
+        
+        if not scheduled:
+            # sounddeviceで再生中は再生位置で刻む逐次送信を使う（非同期スケジュールはperf_counterだけで刻むため）
+            # それ以外でaiohttpが使える場合はイベントループ上で送信し、HTTPの往復を待機と重ねる
+            schedule_future = None if clocked else self.mouth_controller.run_schedule_async(
+                actual_audio_start_ns, seq_times.tolist(), patterns
+            )
+            if schedule_future is not None:
+                sent_count = schedule_future.result()
+                print(f"📡 非同期スケジュール送信完了: {sent_count}個")
+            else:
+                self._run_mouth_sequence(shapes, seq_times, targets, ends)
         
-        # 6. 終了時に口パターンをリセット（表情の自然な口パターンに戻す）
-        time_module.sleep(0.2)
+        # 6. 最後の口形状が終わるまで待ってから口パターンをリセット（表情の自然な口パターンに戻す）
+        if shapes:
+            self._wait_until_ns(int(ends[-1]))
         
         # おしゃべりモードを無効化（audioqueryの実装と同じ）
         if self.talking_controller:
-            self.talking_controller.set_talking_mode(False)
+            # おしゃべりモード無効化と口パターンクリアを並行して送信し、両方の応答だけ待つ
+            talking_future = self._http_pool.submit(self.talking_controller.set_talking_mode, False)
+            clear_future = self._http_pool.submit(self.talking_controller.set_mouth_pattern_fast, None)
+            done, _ = wait((talking_future, clear_future), timeout=0.2)
             print("🎭 おしゃべりモード無効化")
-            # 明示的に口パターンをクリア
-            time_module.sleep(0.1)  # おしゃべりモード無効化の処理を待つ
-            success = self.talking_controller.set_mouth_pattern_fast(None)
-            if success:
+            if clear_future in done and clear_future.result():
                 print("✅ 口パターンをクリアしました（元の表情の自然な口パターンに戻る）")
             else:
                 # フォールバック: 直接設定
                 self.mouth_controller.set_mouth_pattern(None)
                 print("✅ 口パターンをクリアしました（フォールバック処理で戻る）")
-        else:
-            # talking_controllerがない場合は従来の方法
+        elif not self.mouth_controller.is_neutral:
+            # talking_controllerがない場合は従来の方法（最後がNoneなら送信不要）
             if restore_original_mouth:
                 print("🔄 口パターンをリセット（元の表情の自然な口パターンに戻す）")
                 self.mouth_controller.set_mouth_pattern_async(None)
@@ -327,24 +552,35 @@ class LipSyncController:
         print(f"🎤 単語ベース合成: 「{text}」")
         print(f"📏 文字数: {len(text)}文字")
         
-        # 1. 音声合成（AudioQueryから総時間を取得）
-        try:
+        # 1. 音声合成（VOICEVOXへのHTTP）を裏で始め、待っている間にテキスト側の解析を進める
+        def _synthesize():
             audio_query = self.synthesizer.create_audio_query(text, style_id)
-            wav_data = self.synthesizer.synthesis(audio_query, style_id)
+            return self.synthesizer.synthesis(audio_query, style_id)
+        synth_future = self._http_pool.submit(_synthesize)
+        
+        # 2. テキストを単語に分割
+        words = self._split_text_into_words(text)
+        print(f"📝 単語分割: {words}")
+        
+        # 3. 各単語の口パターンを決定（音声の長さに依存しない）
+        word_mouth_patterns = []
+        for word in words:
+            pattern = self._get_word_mouth_pattern(word)
+            word_mouth_patterns.append(pattern)
+            print(f"🔤 単語 '{word}' → 口パターン: {pattern}")
+        
+        # 4. 音声合成の完了を待ち、総発音時間を取得
+        try:
+            wav_data = synth_future.result()
             print("✅ 音声合成成功")
         except Exception as e:
             print(f"❌ 音声合成エラー: {e}")
             return
         
-        # 2. 総発音時間を取得
         total_duration = self._get_audio_duration_from_wav(wav_data)
         print(f"📊 総発音時間: {total_duration:.2f}秒")
         
-        # 3. テキストを単語に分割
-        words = self._split_text_into_words(text)
-        print(f"📝 単語分割: {words}")
-        
-        # 4. 各単語の発音時間を推定
+        # 5. 各単語の発音時間を推定
         word_durations = self._estimate_word_durations(words, total_duration)
         print("📝 単語タイミング:")
         current_time = 0.0
@@ -352,40 +588,38 @@ class LipSyncController:
             print(f"  {current_time:.2f}s - {current_time + duration:.2f}s: '{word}' ({duration:.2f}s)")
             current_time += duration
         
-        # 5. 各単語の口パターンを決定
-        word_mouth_patterns = []
-        for word in words:
-            pattern = self._get_word_mouth_pattern(word)
-            word_mouth_patterns.append(pattern)
-            print(f"🔤 単語 '{word}' → 口パターン: {pattern}")
-        
         # 6. 音声再生開始
-        audio_thread = threading.Thread(target=self.play_audio, args=(wav_data,))
-        audio_thread.daemon = True
-        audio_thread.start()
+        self._audio_pool.submit(self.audio_player.play_audio, wav_data)
         
         # 7. 単語ベースリップシンク実行
-        start_time = time_module.time()
+        # 単調増加のperf_counterで各単語の終了期限を積み上げる（処理時間の遅れが蓄積しない）
+        start_ns = time_module.perf_counter_ns()
         current_time = 0.0
         
-        for word, duration, mouth_pattern in zip(words, word_durations, word_mouth_patterns):
-            # 単語の発音期間中に口パターンを設定
-            pattern_start_time = current_time
+        # タイミングループの間だけスレッドの優先度とタイマー精度を上げる
+        with _timing_priority():
+            for word, duration, mouth_pattern in zip(words, word_durations, word_mouth_patterns):
+                # 単語の発音期間中に口パターンを設定
+                pattern_start_time = current_time
+                current_time += duration
+                deadline_ns = start_ns + int(current_time * 1e9)
             
-            # 口パターンがNoneの場合はスキップ（句読点など）
-            if mouth_pattern is None:
-                print(f"⏭️  {pattern_start_time:.2f}s: スキップ (単語: '{word}', 期間: {duration:.2f}s)")
-            else:
-                server_pattern = f"mouth_{mouth_pattern}"
-                success = self.set_mouth_pattern(server_pattern)
-                print(f"👄 {pattern_start_time:.2f}s: {server_pattern} (単語: '{word}', 期間: {duration:.2f}s)")
+                # 口パターンがNoneの場合はスキップ（句読点など）
+                if mouth_pattern is None:
+                    if LIPSYNC_DEBUG:
+                        print(f"⏭️  {pattern_start_time:.2f}s: スキップ (単語: '{word}', 期間: {duration:.2f}s)")
+                elif time_module.perf_counter_ns() > deadline_ns:
+                    # 単語の区間が既に終わっている場合は送信しない
+                    if LIPSYNC_DEBUG:
+                        print(f"⏭️  {pattern_start_time:.2f}s: 遅延のためスキップ (単語: '{word}')")
+                else:
+                    server_pattern = f"mouth_{mouth_pattern}"
+                    success = self.set_mouth_pattern(server_pattern)
+                    if LIPSYNC_DEBUG:
+                        print(f"👄 {pattern_start_time:.2f}s: {server_pattern} (単語: '{word}', 期間: {duration:.2f}s)")
             
-            # 次の単語まで待機
-            current_time += duration
-            elapsed = time_module.time() - start_time
-            wait_time = current_time - elapsed
-            if wait_time > 0:
-                time_module.sleep(wait_time)
+                # 次の単語まで待機
+                self._wait_until_ns(deadline_ns)
         
         # 8. 終了時に口をリセット
         time_module.sleep(0.5)
@@ -403,12 +637,6 @@ class LipSyncController:
         """
         print(f"🔄 フォールバック処理: 「{text}」 (速度: {speed_scale}x)")
         
-        # 1. 発話前の元の口パターンを保存
-        original_mouth_pattern = None
-        if restore_original_mouth:
-            original_mouth_pattern = self.mouth_controller.get_current_mouth_pattern()
-            print(f"💾 元の口パターン保存: {original_mouth_pattern}")
-        
         # 音声合成（シンプル版）
         try:
             wav_data = self.speech_synthesizer.synthesize_simple(text, style_id)
@@ -417,59 +645,65 @@ class LipSyncController:
             return
         
         # シンプルな音韻解析（文字ベース）
-        mouth_sequence = self.phoneme_analyzer.text_to_mouth_sequence(text)
-        
-        print("📝 口パターンシーケンス (フォールバック):")
-        mouth_pattern_count = 0
-        none_pattern_count = 0
-        for i, (time, shape, duration) in enumerate(mouth_sequence[:15]):
-            print(f"  {time:.2f}s: {shape} ({duration:.2f}s)")
-            if shape is not None:
-                mouth_pattern_count += 1
-            else:
-                none_pattern_count += 1
+        # 時刻・長さ・口形状コードを別々の配列（SoA）で受け取り、タイミングループでは添字で参照する
+        seq_times, durations, shape_codes = self.phoneme_analyzer.text_to_mouth_arrays(text)
+        patterns = [_SHAPE_NAMES[code] for code in shape_codes.tolist()]
+        count = len(patterns)
         
-        if len(mouth_sequence) > 15:
-            remaining = len(mouth_sequence) - 15
-            for time, shape, duration in mouth_sequence[15:]:
-                if shape is not None:
-                    mouth_pattern_count += 1
-                else:
-                    none_pattern_count += 1
-            print(f"  ... 他{remaining}個")
+        mouth_pattern_count = int(np.count_nonzero(shape_codes))
+        none_pattern_count = count - mouth_pattern_count
+        
+        if LIPSYNC_DEBUG:
+            print("📝 口パターンシーケンス (フォールバック):")
+            for i in range(min(15, count)):
+                print(f"  {seq_times[i]:.2f}s: {patterns[i]} ({durations[i]:.2f}s)")
+            if count > 15:
+                print(f"  ... 他{count - 15}個")
         
-        print(f"📊 統計: 総パターン数{len(mouth_sequence)}, 口パターン{mouth_pattern_count}個, None{none_pattern_count}個")
-        print(f"📊 比率: 文字数{len(text)} vs パターン数{len(mouth_sequence)} = {len(mouth_sequence)/len(text):.2f}倍")
+        print(f"📊 統計: 総パターン数{count}, 口パターン{mouth_pattern_count}個, None{none_pattern_count}個")
+        print(f"📊 比率: 文字数{len(text)} vs パターン数{count} = {count/len(text):.2f}倍")
         
         # 音声再生開始
-        audio_thread = threading.Thread(target=self.audio_player.play_audio, args=(wav_data,))
-        audio_thread.daemon = True
-        audio_thread.start()
+        self._audio_pool.submit(self.audio_player.play_audio, wav_data)
         
         # リップシンク実行
-        start_time = time_module.time()
-        
-        for seq_time, mouth_shape, duration in mouth_sequence:
-            # タイミング待機
-            elapsed = time_module.time() - start_time
-            wait_time = seq_time - elapsed
-            if wait_time > 0:
-                time_module.sleep(wait_time)
+        start_ns = time_module.perf_counter_ns()
+        
+        if self._schedule_supported and count:
+            # スケジュールを一括送信できればサーバー側に任せ、終了時刻まで待つだけにする
+            if self._post_mouth_schedule(start_ns, seq_times.tolist(), patterns):
+                self.mouth_controller.forget_last_pattern()
+                self._wait_until_ns(start_ns + int((seq_times[-1] + durations[-1]) * 1e9))
+                count = 0
+            else:
+                print("🔄 スケジュール送信失敗のため逐次送信に切り替えます")
+        
+        # 目標時刻と区間終了時刻（perf_counter_ns）はループ前にまとめて計算しておく
+        targets = start_ns + (seq_times * 1e9).astype(np.int64)
+        ends = targets + (durations * 1e9).astype(np.int64)
+        
+        # タイミングループの間だけスレッドの優先度とタイマー精度を上げる
+        with _timing_priority():
+            for i in range(count):
+                # タイミング待機（単調増加クロック基準の期限まで）
+                self._wait_until_ns(int(targets[i]))
             
-            # 口パターン設定（正しい形式に変換）
-            server_pattern = mouth_shape  # 既にmouth_形式になっているはず
+                # 区間が終わるほど遅れている場合は送信を省いて追いつく
+                if time_module.perf_counter_ns() > ends[i]:
+                    continue
             
-            self.mouth_controller.set_mouth_pattern(server_pattern)
+                server_pattern = patterns[i]
+                self.mouth_controller.set_mouth_pattern(server_pattern)
             
-            # デバッグ出力
-            if server_pattern:
-                print(f"👄 {seq_time:.2f}s: {server_pattern}")
+                # デバッグ出力
+                if LIPSYNC_DEBUG and server_pattern:
+                    print(f"👄 {seq_times[i]:.2f}s: {server_pattern}")
         
         # 終了時に口パターンをリセット（元の表情の自然な口パターンに戻す）
         time_module.sleep(0.2)
         
-        # 明示的に口パターンをNoneに設定
-        success = self.mouth_controller.set_mouth_pattern(None)
+        # 明示的に口パターンをNoneに設定（最後の口形状が既にNoneなら送信を省く）
+        success = self.mouth_controller.is_neutral or self.mouth_controller.set_mouth_pattern(None)
         if success:
             if restore_original_mouth:
                 print("🔄 口パターンをリセット（元の表情の自然な口パターンに戻す）")
@@ -481,33 +715,23 @@ class LipSyncController:
         print()
 
     def text_to_mouth_sequence(self, text):
-        """テキストから口の動きシーケンスを生成（簡易版）"""
-        sequence = []
-        current_time = 0.0
-        char_duration = 0.15  # 1文字あたりの時間
-        
-        for char in text:
-            mouth_shape = self.char_to_mouth_shape(char)
-            sequence.append((current_time, mouth_shape, char_duration))
-            current_time += char_duration
-        
-        return sequence
+        """テキストから口の動きシーケンスを生成（簡易版）
+
+        読みへの変換・口形状の分類・同じ口形状の連続のまとめはPhonemeAnalyzerに任せる
+        """
+        return self.phoneme_analyzer.text_to_mouth_sequence(text)
 
     def char_to_mouth_shape(self, char):
         """文字から口の形を推定（pykakasi漢字読み対応版）"""
         # 漢字の場合はpykakasiで読みに変換
-        if self.kakasi_converter and self._is_kanji(char):
+        if self._is_kanji(char):
             try:
-                # 新しいpykakasiのAPI使用
-                converted = self.kakasi_converter.convert(char)
-                if converted:
-                    # 変換結果から'hira'（ひらがな）を取得
-                    hiragana_reading = ''.join([item['hira'] for item in converted])
-                    if hiragana_reading and hiragana_reading != char:
-                        # 読みの最初の文字で口の形を判定
-                        first_char = hiragana_reading[0]
-                        print(f"🔤 漢字変換: '{char}' → '{hiragana_reading}' → 判定文字:'{first_char}'")
-                        return self._hiragana_to_mouth_shape(first_char)
+                hiragana_reading = _kanji_reading(char)
+                if hiragana_reading and hiragana_reading != char:
+                    # 読みの最初の文字で口の形を判定
+                    first_char = hiragana_reading[0]
+                    print(f"🔤 漢字変換: '{char}' → '{hiragana_reading}' → 判定文字:'{first_char}'")
+                    return self._hiragana_to_mouth_shape(first_char)
             except Exception as e:
                 print(f"⚠️  漢字読み変換エラー: {char} - {e}")
         
@@ -520,142 +744,69 @@ class LipSyncController:
     
     def _hiragana_to_mouth_shape(self, char):
         """ひらがな・カタカナから口の形を判定"""
-        # ひらがな・カタカナの母音判定
-        a_sounds = 'あかがさざただなはばぱまやらわアカガサザタダナハバパマヤラワ'
-        i_sounds = 'いきぎしじちぢにひびぴみりイキギシジチヂニヒビピミリ'
-        o_sounds = 'うえおこごそぞとどのほぼぽもよろをンウエオコゴソゾトドノホボポモヨロヲン'
-        
-        if char in a_sounds:
-            return 'mouth_a'
-        elif char in i_sounds:
-            return 'mouth_i' 
-        elif char in o_sounds:
-            return 'mouth_o'
-        else:
-            return None
+        return _SHAPE_NAMES[_kana_shape_code(char)]
 
     def _get_audio_duration_from_wav(self, wav_data):
         """WAVデータから音声の長さを取得"""
         try:
-            import io
-            import wave
+            # 標準的な44バイトヘッダ（RIFF/WAVE + fmt + data）ならヘッダを直接読む
+            if (wav_data[0:4] == b'RIFF' and wav_data[8:12] == b'WAVE'
+                    and wav_data[12:16] == b'fmt ' and wav_data[36:40] == b'data'):
+                channels, rate = struct.unpack_from('<HI', wav_data, 22)
+                bits_per_sample, = struct.unpack_from('<H', wav_data, 34)
+                data_size, = struct.unpack_from('<I', wav_data, 40)
+                return data_size / float(rate * channels * (bits_per_sample // 8))
             
-            # WAVデータをメモリから読み込み
-            wav_buffer = io.BytesIO(wav_data)
-            with wave.open(wav_buffer, 'rb') as wav_file:
-                frames = wav_file.getnframes()
-                rate = wav_file.getframerate()
-                duration = frames / float(rate)
-                return duration
+            # LISTチャンク等を含む非標準ヘッダの場合はチャンクを辿って fmt / data を探す
+            return _scan_wav_duration(wav_data)
         except Exception as e:
             print(f"⚠️  WAV時間取得エラー: {e}")
-            # フォールバック: 文字数ベースの推定
-            return len(wav_data) / 44100.0  # 仮定のサンプリングレート
+            return 0.0
 
     def _split_text_into_words(self, text):
         """テキストを単語に分割（日本語対応）"""
-        import re
-        
-        # 句読点で分割し、空の要素を除去
-        words = re.split(r'([、。,.！？!?\s]+)', text)
-        words = [word.strip() for word in words if word.strip()]
-        
-        # さらに細かく分割（漢字や長い単語を分割）
-        refined_words = []
-        for word in words:
-            if len(word) > 3:  # 3文字以上の単語はさらに分割
-                # 漢字とひらがなの境界で分割
-                parts = re.split(r'([^\u3040-\u309f\u30a0-\u30ff]+)', word)
-                parts = [part for part in parts if part]
-                refined_words.extend(parts)
-            else:
-                refined_words.append(word)
-        
-        return refined_words
+        # 1回のfinditerで、かなと漢字などの境界および句読点で区切った単語を取り出す
+        return [m.group(0) for m in _WORD_RE.finditer(text)]
 
     def _estimate_word_durations(self, words, total_duration):
         """各単語の発音時間を推定"""
         if not words:
             return []
         
-        # 各単語の文字数に基づいて時間を分配
-        total_chars = 0
-        punctuation_words = []
-        
-        for word in words:
-            if word in [',', '、', '。', '.', '!', '！', '?', '？']:
-                punctuation_words.append(word)
-            else:
-                total_chars += len(word)
-        
-        # 句読点の時間（固定で短く）
-        punctuation_duration = 0.15  # 句読点1つあたり0.15秒
-        punctuation_total_time = len(punctuation_words) * punctuation_duration
-        
-        # 実単語の総時間
-        word_total_time = total_duration - punctuation_total_time
-        if word_total_time < 0:
-            word_total_time = total_duration * 0.8  # 最低でも80%は単語に
-            punctuation_total_time = total_duration * 0.2
-        
-        # 文字数に比例して時間を分配（ベース時間 + 文字数ボーナス）
-        base_duration_per_char = 0.08  # 1文字あたりの基本時間
-        min_duration_per_word = 0.2    # 単語の最小時間
-        
-        word_durations = []
-        for word in words:
-            if word in [',', '、', '。', '.', '!', '！', '?', '？']:
-                # 句読点は固定時間
-                word_durations.append(punctuation_duration)
-            else:
-                char_based_duration = len(word) * base_duration_per_char
-                duration = max(char_based_duration, min_duration_per_word)
-                word_durations.append(duration)
-        
-        # 実単語の時間を調整してフィットさせる
-        current_word_total = sum(d for w, d in zip(words, word_durations) 
-                               if w not in [',', '、', '。', '.', '!', '！', '?', '？'])
-        
-        if current_word_total > 0 and word_total_time > 0:
-            scale_factor = word_total_time / current_word_total
-            word_durations = [d * scale_factor if w not in [',', '、', '。', '.', '!', '！', '?', '？'] else d 
-                            for w, d in zip(words, word_durations)]
-        
-        return word_durations
+        # 文字数と句読点フラグを配列にしてから数値計算部分に渡す
+        n = len(words)
+        char_counts = np.fromiter(map(len, words), dtype=np.int32, count=n)
+        is_punct = np.fromiter((word in _PUNCT for word in words), dtype=np.bool_, count=n)
+        
+        durations = _compute_word_durations(
+            char_counts, is_punct, total_duration,
+            0.08,  # 1文字あたりの基本時間
+            0.2,   # 単語の最小時間
+            0.15   # 句読点1つあたりの時間
+        )
+        return durations.tolist()
 
     def _get_word_mouth_pattern(self, word):
         """単語から口パターンを決定"""
-        if not word or word in [',', '、', '。', '.', '!', '！', '?', '？']:
+        if not word or word in _PUNCT:
             return None  # 句読点や空文字の場合は口パターンを設定しない
         
         # 単語の最初の文字でパターンを決定
         first_char = word[0]
         
         # 漢字の場合は読みに変換
-        if self.kakasi_converter and self._is_kanji(first_char):
+        if self._is_kanji(first_char):
             try:
-                converted = self.kakasi_converter.convert(first_char)
-                if converted:
-                    hiragana_reading = ''.join([item['hira'] for item in converted])
-                    if hiragana_reading:
-                        first_char = hiragana_reading[0]
+                hiragana_reading = _kanji_reading(first_char)
+                if hiragana_reading:
+                    first_char = hiragana_reading[0]
             except Exception as e:
                 pass  # 変換失敗時は元の文字を使用
         
-        # 母音でパターンを決定
-        if first_char in 'あかがさざただなはばぱまやらわアカガサザタダナハバパマヤラワ':
-            return 'a'
-        elif first_char in 'いきぎしじちぢにひびぴみりイキギシジチヂニヒビピミリ':
-            return 'i'
-        elif first_char in 'うえおこごそぞとどのほぼぽもよろをンウエオコゴソゾトドノホボポモヨロヲン':
-            return 'o'
-        else:
-            # その他の文字の場合は'a'をデフォルトに
-            return 'a'
+        # 母音でパターンを決定（その他の文字の場合は'a'をデフォルトに）
+        return _WORD_VOWELS[_kana_shape_code(first_char)]
 
 def main():
-    import sys
-    
     print("🎭 精密リップシンクテスト（ハードコード設定・元の口パターン復元機能付き）")
     print("=" * 60)
     
@@ -724,6 +875,8 @@ def main():
         print(f"❌ エラー: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        controller.close()
 
 if __name__ == "__main__":
     main()
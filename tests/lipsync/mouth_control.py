@@ -5,81 +5,387 @@
 """
 
 import os
-import urllib.request
+import io
+import shutil
+import tempfile
+import functools
+import importlib.util
+import asyncio
+import atexit
+import ctypes
+import wave
+import subprocess
 import json
 import threading
+import queue
 import time as time_module
+import numpy as np
+
+# requestsはimportが重いので、有無だけ確認して実際の読み込みは初回のセッション生成まで遅らせる
+_REQUESTS_AVAILABLE = importlib.util.find_spec("requests") is not None
+if not _REQUESTS_AVAILABLE:
+    print("⚠️  requestsがインストールされていません。おしゃべりモード制御は利用できません。")
 
 try:
-    import requests
-    from typing import Optional
+    import aiohttp
 except ImportError:
-    requests = None
-    Optional = object  # ダミーオブジェクト
-    print("⚠️  requestsがインストールされていません。おしゃべりモード制御は利用できません。")
+    aiohttp = None  # 無い場合は非同期送信をスレッドで行う
+
+try:
+    import sounddevice as sd
+except ImportError:
+    sd = None  # 無い場合は外部コマンドで再生（開始時刻は推定になる）
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windowsでは無い（パイプ容量は既定値とみなす）
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # 無い場合は標準のjsonで解析する
+
+# レスポンスJSONの解析（orjsonはbytesをそのまま受け取れるのでデコードも省ける）
+_json_loads = orjson.loads if orjson else json.loads
 
 # シリウス表情制御API
 SIRIUS_API_URL = "http://localhost:8080"
 
+# HTTP/2（prior knowledge）で送信する（SIRIUS_HTTP2=1 で有効、httpxとh2が必要）
+# 1本の接続で口パターンとおしゃべりモード切替を多重化できるが、HTTP/1.1のみのサーバーでは使えない
+SIRIUS_HTTP2 = bool(os.environ.get("SIRIUS_HTTP2"))
+_HTTPX_AVAILABLE = importlib.util.find_spec("httpx") is not None and importlib.util.find_spec("h2") is not None
+
+# パイプ再生で開始を検知するために最初に書き込むバイト数（パイプ容量を問い合わせられない場合）
+# 既定のパイプバッファ（64KiB）より大きいので、再生コマンドが読み始めるまで書き込みがブロックする
+_PIPE_PRIME_BYTES = 68 * 1024
+# パイプ容量を超えて書き込む分（この分が読まれるまで書き込みが返らない）
+_PIPE_PRIME_MARGIN = 4 * 1024
+
+def _pipe_prime_bytes(pipe):
+    """再生コマンドが読み始めるまでブロックさせるのに必要な書き込みバイト数を返す
+
+    Linuxではパイプを1ページまで縮めてから容量を問い合わせるので、短いクリップでも開始を検知できる。
+    """
+    if fcntl is None or not hasattr(fcntl, 'F_GETPIPE_SZ'):
+        return _PIPE_PRIME_BYTES
+    try:
+        fd = pipe.fileno()
+        fcntl.fcntl(fd, fcntl.F_SETPIPE_SZ, os.sysconf('SC_PAGE_SIZE'))
+        return fcntl.fcntl(fd, fcntl.F_GETPIPE_SZ) + _PIPE_PRIME_MARGIN
+    except (OSError, ValueError):
+        return _PIPE_PRIME_BYTES
+
+# sounddeviceの最初の出力バッファを待つ上限（秒）。これを過ぎたら外部コマンドで再生する
+_FIRST_BUFFER_TIMEOUT = 1.0
+
+# 口パターン送信ごとの詳細ログ（LIPSYNC_DEBUG=1 で有効、通常はタイミングを乱さないよう出力しない）
+LIPSYNC_DEBUG = bool(os.environ.get("LIPSYNC_DEBUG"))
+
+# 口パターン送信用のヘッダーとJSONペイロード（パターン数が少ないので事前にエンコードしておく）
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+_PAYLOAD_CACHE = {
+    pattern: json.dumps({"mouth_pattern": pattern}).encode('utf-8')
+    for pattern in ("mouth_a", "mouth_i", "mouth_o", "a", "i", "o", None)
+}
+_TALKING_MODE_PAYLOADS = {
+    enabled: json.dumps({'talking_mouth_mode': enabled}).encode('utf-8')
+    for enabled in (True, False)
+}
+
+# 「まだ何も送っていない」ことを表す値（Noneは口パターンのリセットとして使うため区別する）
+_SENTINEL = object()
+
+def _mouth_payload(pattern):
+    """口パターンのJSONペイロード（bytes）を返す"""
+    data = _PAYLOAD_CACHE.get(pattern)
+    if data is None:
+        data = json.dumps({"mouth_pattern": pattern}).encode('utf-8')
+    return data
+
+def _create_http2_client(pool_maxsize):
+    """HTTP/2のhttpxクライアントを生成（requests.Sessionと同じ data=bytes の呼び出しを受け付ける）"""
+    import httpx
+
+    class _Http2Client(httpx.Client):
+        def post(self, url, data=None, **kwargs):
+            if isinstance(data, bytes):
+                return super().post(url, content=data, **kwargs)
+            return super().post(url, data=data, **kwargs)
+
+    return _Http2Client(
+        http1=False,
+        http2=True,
+        timeout=0.1,
+        headers={'Content-Type': 'application/json'},
+        limits=httpx.Limits(max_keepalive_connections=pool_maxsize, max_connections=pool_maxsize * 2)
+    )
+
+def _create_http_session(pool_maxsize):
+    """Keep-AliveのHTTPセッションを生成（requestsが無い場合はNone）"""
+    if SIRIUS_HTTP2 and _HTTPX_AVAILABLE:
+        return _create_http2_client(pool_maxsize)
+    if not _REQUESTS_AVAILABLE:
+        return None
+    import requests
+    session = requests.Session()
+    session.headers.update({
+        'Content-Type': 'application/json',
+        'Connection': 'keep-alive'
+    })
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=pool_maxsize,
+        max_retries=0  # リトライしない（高速化のため）
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+@functools.lru_cache(maxsize=1)
+def get_shared_session():
+    """プロセス全体で共有するKeep-AliveのHTTPセッションを返す（初回呼び出し時に生成）
+
+    口パターン・おしゃべりモード・スケジュール送信が同じ接続プールを使い回す。
+    各コントローラーは借りているだけなので閉じず、プロセス終了時にここで一度だけ閉じる。
+    """
+    session = _create_http_session(pool_maxsize=8)
+    if session is not None:
+        atexit.register(session.close)
+    return session
+
 class MouthController:
     """シリウスの口パターンを制御するクラス"""
 
     def __init__(self, server_url="http://localhost:8080"):
         self.server_url = server_url
         self.current_mouth_pattern = None
+        self._last_pattern = _SENTINEL  # 最後に送信成功した口パターン（冗長リクエスト防止）
+        self._pattern_lock = threading.Lock()  # 送信スレッド・イベントループから_last_patternを更新するため
+        self._send_seq = 0  # 口パターン送信の通し番号（最後に送った分の応答だけを記録する）
+        # 非同期送信用のイベントループとaiohttpセッション（初回送信時に起動）
+        self._async_loop = None
+        self._aio_session = None
+        self._loop_lock = threading.Lock()  # 起動時のprewarmと発話の送信が同時に起動しないようにする
+        # aiohttpが無い場合の非同期送信用ワーカーとキュー（初回送信時に起動）
+        self._send_queue = queue.Queue(maxsize=8)
+        self._send_worker = None
+        # 口パターン送信用のHTTPセッション（初回アクセス時に生成）
+        self._session = None
+
+    @property
+    def session(self):
+        """Keep-AliveのHTTPセッション（プロセス共有、初回アクセス時に生成）"""
+        if self._session is None:
+            self._session = get_shared_session()
+        return self._session
 
     def get_current_mouth_pattern(self):
         """現在のシリウス口パターンを取得"""
+        if not self.session:
+            return None
         try:
-            req = urllib.request.Request(f"{self.server_url}/mouth_pattern")
-            with urllib.request.urlopen(req, timeout=0.1) as response:
-                if response.getcode() == 200:
-                    data = json.loads(response.read().decode('utf-8'))
-                    return data.get('mouth_pattern')
+            response = self.session.get(f"{self.server_url}/mouth_pattern", timeout=0.1)
+            if response.status_code == 200:
+                return _json_loads(response.content).get('mouth_pattern')
         except Exception as e:
             print(f"⚠️ 現在の口パターン取得エラー: {e}")
         return None
 
+    def forget_last_pattern(self):
+        """送信済みパターンの記録を破棄（他の経路で口パターンが変わった後に使う）"""
+        self._begin_send()  # 送信中の応答が後から記録しないよう通し番号も進める
+
+    def _begin_send(self):
+        """送信の通し番号を発行する（応答が返るまでサーバー側のパターンは不明として扱う）"""
+        with self._pattern_lock:
+            self._send_seq += 1
+            self._last_pattern = _SENTINEL
+            return self._send_seq
+
+    def _record_sent(self, pattern, seq):
+        """サーバーが200を返したパターンを記録（後から別のパターンを送っていれば古い応答なので記録しない）"""
+        with self._pattern_lock:
+            if seq == self._send_seq:
+                self.current_mouth_pattern = pattern
+                self._last_pattern = pattern
+
+    @property
+    def is_neutral(self):
+        """最後に送信したパターンがNone（元の表情の自然な口）かどうか"""
+        return self._last_pattern is None
+
     def set_mouth_pattern(self, pattern):
         """シリウスの口パターンを設定（同期版）"""
+        # 同じパターンの場合はスキップ（ただし、Noneの場合は必ず実行）
+        if pattern == self._last_pattern and pattern is not None:
+            return True
+        if not self.session:
+            return False
+        seq = self._begin_send()
         try:
-            data = json.dumps({"mouth_pattern": pattern}).encode('utf-8')
-            req = urllib.request.Request(
+            response = self.session.post(
                 f"{self.server_url}/mouth_pattern",
-                data=data,
-                headers={'Content-Type': 'application/json'}
+                data=_mouth_payload(pattern),
+                timeout=0.5
             )
-            with urllib.request.urlopen(req, timeout=0.5) as response:
-                success = response.getcode() == 200
-                if success:
-                    self.current_mouth_pattern = pattern
-                return success
+            success = response.status_code == 200
+            if success:
+                self._record_sent(pattern, seq)
+            return success
         except Exception as e:
             print(f"❌ 口パターン設定エラー: {e}")
             return False
 
     def set_mouth_pattern_async(self, pattern):
         """シリウスの口パターンを非同期設定"""
-        def _set_pattern():
+        # 同じパターンの場合はスキップ（ただし、Noneの場合は必ず実行）
+        if pattern == self._last_pattern and pattern is not None:
+            return
+
+        if aiohttp is None:
+            if not self.session:
+                return
+            # 常駐ワーカーのキューに積む（詰まっている場合はリアルタイム性優先で捨てる）
+            self._ensure_send_worker()
             try:
-                data = json.dumps({"mouth_pattern": pattern}).encode('utf-8')
-                req = urllib.request.Request(
+                self._send_queue.put_nowait((pattern, self._begin_send()))
+            except queue.Full:
+                pass
+            return
+
+        # 常駐イベントループに投げる（結果は待たない）
+        self._ensure_async_loop()
+        asyncio.run_coroutine_threadsafe(self._post_pattern_aio(pattern, self._begin_send()), self._async_loop)
+
+    def _ensure_send_worker(self):
+        """非同期送信用のワーカースレッドを起動"""
+        if self._send_worker is not None:
+            return
+        self._send_worker = threading.Thread(target=self._send_loop, name='mouth_send', daemon=True)
+        self._send_worker.start()
+
+    def _send_loop(self):
+        """キューから口パターンを取り出して順に送信"""
+        while True:
+            item = self._send_queue.get()
+            if item is _SENTINEL:
+                break
+            pattern, seq = item
+            try:
+                response = self.session.post(
                     f"{self.server_url}/mouth_pattern",
-                    data=data,
-                    headers={'Content-Type': 'application/json'}
+                    data=_mouth_payload(pattern),
+                    timeout=0.05
                 )
-                with urllib.request.urlopen(req, timeout=0.05) as response:
-                    if response.getcode() == 200:
-                        self.current_mouth_pattern = pattern
+                if response.status_code == 200:
+                    self._record_sent(pattern, seq)
             except:
                 pass
 
-        # 非同期実行
-        thread = threading.Thread(target=_set_pattern, daemon=True)
-        thread.start()
+    def _ensure_async_loop(self):
+        """非同期送信用のイベントループをバックグラウンドスレッドで起動"""
+        if self._async_loop is not None:
+            return
+        with self._loop_lock:
+            if self._async_loop is not None:
+                return  # 待っている間に別スレッドが起動した
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='mouth_aio', daemon=True).start()
+            self._aio_session = asyncio.run_coroutine_threadsafe(self._create_aio_session(), loop).result()
+            self._async_loop = loop  # セッションを作ってから公開する
+
+    async def _create_aio_session(self):
+        """Keep-Aliveで接続を使い回すaiohttpセッションを作成"""
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=4, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=0.05)
+        )
+
+    def prewarm(self):
+        """口パターン送信に使う接続を事前に張っておく（最初の口パターンが接続確立を待たないように）"""
+        if aiohttp is not None:
+            self._ensure_async_loop()
+            future = asyncio.run_coroutine_threadsafe(self._prewarm_aio(), self._async_loop)
+            try:
+                future.result(timeout=1.0)
+            except Exception:
+                pass
+        elif self.session:
+            self._ensure_send_worker()
+            try:
+                self.session.get(f"{self.server_url}/mouth_pattern", timeout=0.2)
+            except Exception:
+                pass
+
+    async def _prewarm_aio(self):
+        """aiohttpセッションでGETを1回送り、Keep-Alive接続をプールに残す"""
+        try:
+            async with self._aio_session.get(f"{self.server_url}/mouth_pattern") as response:
+                await response.read()
+        except Exception:
+            pass
+
+    async def _post_pattern_aio(self, pattern, seq):
+        """口パターンをaiohttpで送信"""
+        try:
+            async with self._aio_session.post(
+                f"{self.server_url}/mouth_pattern",
+                data=_mouth_payload(pattern),
+                headers=_JSON_HEADERS
+            ) as response:
+                if response.status == 200:
+                    self._record_sent(pattern, seq)
+        except Exception:
+            pass
+
+    def run_schedule_async(self, start_ns, seq_times, patterns):
+        """口パターンの送信スケジュールをイベントループ上で実行（aiohttpが無い場合はNone）
+
+        start_nsはperf_counter_ns基準の開始時刻。各送信はタスクとして投げるだけなので、
+        HTTPの往復が次の口パターンまでの待機を遅らせない。完了を待つFutureを返す。
+        """
+        if aiohttp is None:
+            return None
+        self._ensure_async_loop()
+        return asyncio.run_coroutine_threadsafe(
+            self._run_schedule(start_ns, seq_times, patterns), self._async_loop
+        )
+
+    async def _run_schedule(self, start_ns, seq_times, patterns):
+        """各口パターンの時刻まで待ってから送信タスクを起動"""
+        tasks = []
+        for seq_time, pattern in zip(seq_times, patterns):
+            delay = (start_ns + seq_time * 1e9 - time_module.perf_counter_ns()) / 1e9
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(self._post_pattern_aio(pattern, self._begin_send())))
+        await asyncio.gather(*tasks)
+        return len(tasks)
+
+    def close(self):
+        """HTTPセッションと非同期送信用のワーカー・イベントループを停止"""
+        if self._send_worker is not None:
+            self._send_queue.put(_SENTINEL)
+            self._send_worker.join(timeout=1.0)
+            self._send_worker = None
+        self._session = None  # 共有セッションは閉じない（プロセス終了時にget_shared_sessionが閉じる）
+        if self._async_loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._aio_session.close(), self._async_loop).result(timeout=1.0)
+        except Exception as e:
+            print(f"⚠️ aiohttpセッション終了エラー: {e}")
+        self._async_loop.call_soon_threadsafe(self._async_loop.stop)
+        self._async_loop = None
+        self._aio_session = None
 
     def reset_to_neutral(self):
         """全設定をニュートラルにリセット（口パターンを元の表情の自然な口に戻す）"""
+        # 既にNoneを送信済みならリクエストを省く
+        if self.is_neutral:
+            return True
         try:
             # 口パターンをNoneに設定
             success = self.set_mouth_pattern(None)
@@ -97,25 +403,15 @@ class TalkingModeController:
         self.server_url = server_url
         self.is_talking_mode_active = False
         self.last_mouth_pattern = None  # 冗長リクエストを防ぐ
+        # 高速化のためのHTTPセッション（初回アクセス時に生成）
+        self._session = None
 
-        # 高速化のためのHTTPセッション設定
-        if requests:
-            self.session = requests.Session()
-            self.session.headers.update({
-                'Content-Type': 'application/json',
-                'Connection': 'keep-alive'  # Keep-Aliveを有効にする
-            })
-
-            # コネクションプールの設定
-            adapter = requests.adapters.HTTPAdapter(
-                pool_connections=1,  # プール内の接続数
-                pool_maxsize=1,      # プールの最大サイズ
-                max_retries=0        # リトライしない（高速化のため）
-            )
-            self.session.mount('http://', adapter)
-            self.session.mount('https://', adapter)
-        else:
-            self.session = None
+    @property
+    def session(self):
+        """Keep-AliveのHTTPセッション（プロセス共有、初回アクセス時に生成）"""
+        if self._session is None:
+            self._session = get_shared_session()
+        return self._session
 
     def set_talking_mode(self, enabled: bool) -> bool:
         """おしゃべりモードを設定"""
@@ -128,7 +424,7 @@ class TalkingModeController:
         try:
             response = self.session.post(
                 f"{self.server_url}/talking_mouth_mode",
-                json={'talking_mouth_mode': enabled},
+                data=_TALKING_MODE_PAYLOADS[bool(enabled)],
                 timeout=0.1  # タイムアウトを極短に
             )
 
@@ -147,23 +443,26 @@ class TalkingModeController:
         """高速口形状設定（冗長リクエスト排除）"""
         # 同じパターンの場合はスキップ（ただし、Noneの場合は必ず実行）
         if self.last_mouth_pattern == pattern and pattern is not None:
-            print(f"🔧 同じ口パターン ({pattern}) のためスキップ")
+            if LIPSYNC_DEBUG:
+                print(f"🔧 同じ口パターン ({pattern}) のためスキップ")
             return True
 
         if not self.session:
             return False
 
         try:
-            print(f"🔧 口パターン設定リクエスト: {pattern}")
+            if LIPSYNC_DEBUG:
+                print(f"🔧 口パターン設定リクエスト: {pattern}")
             response = self.session.post(
                 f"{self.server_url}/mouth_pattern",
-                json={'mouth_pattern': pattern},
+                data=_mouth_payload(pattern),
                 timeout=0.1  # タイムアウトを少し長くして確実に処理
             )
 
             if response.status_code == 200:
                 self.last_mouth_pattern = pattern
-                print(f"✅ 口パターン設定成功: {pattern}")
+                if LIPSYNC_DEBUG:
+                    print(f"✅ 口パターン設定成功: {pattern}")
                 return True
             else:
                 print(f"❌ 口パターン設定失敗: HTTP {response.status_code}, レスポンス: {response.text}")
@@ -199,23 +498,18 @@ class TalkingModeController:
             return False
 
     def cleanup_session(self):
-        """セッションのクリーンアップ（メモリリーク防止）"""
+        """発話ごとの状態をリセット（接続プールは使い回すため作り直さない）"""
+        self.last_mouth_pattern = None
+
+    def _hard_reset_session(self):
+        """専用のセッションに作り直す（接続プールも破棄したい場合のみ明示的に呼ぶ）
+
+        共有セッションは他のコントローラーも使っているので閉じず、このインスタンスだけ新しい接続プールに切り替える。
+        """
         try:
-            if self.session:
-                self.session.close()
-                self.session = requests.Session()
-                self.session.headers.update({
-                    'Content-Type': 'application/json',
-                    'Connection': 'keep-alive'
-                })
-                # アダプターも再設定
-                adapter = requests.adapters.HTTPAdapter(
-                    pool_connections=1,
-                    pool_maxsize=1,
-                    max_retries=0
-                )
-                self.session.mount('http://', adapter)
-                self.session.mount('https://', adapter)
+            if self._session is not None and self._session is not get_shared_session():
+                self._session.close()  # 以前に作り直した専用セッションは自分で閉じる
+            self._session = _create_http_session(pool_maxsize=2)
             self.last_mouth_pattern = None
         except Exception as e:
             print(f"セッションクリーンアップエラー: {e}")
@@ -226,12 +520,15 @@ class AudioPlayer:
     def __init__(self):
         """利用可能な音声再生コマンドを検出"""
         self.audio_command = self._detect_audio_command()
+        self._stream = None  # sounddeviceの出力ストリーム
+        # コールバックがデバイスへ渡したフレーム数（64bit整数の代入は1命令なのでロック不要で読める）
+        self.played_frames = ctypes.c_int64(0)
+        self._latency_frames = 0  # 渡してからDACで鳴るまでの遅延（フレーム数）
+        self._sample_rate = 0
         print(f"🔊 音声再生コマンド: {self.audio_command}")
 
     def _detect_audio_command(self):
         """利用可能な音声再生コマンドを検出"""
-        import shutil
-        
         # プラットフォーム別のコマンド優先順位
         commands = [
             'paplay',  # PulseAudio (Ubuntu/Linux preferred)
@@ -259,25 +556,129 @@ class AudioPlayer:
             return
 
         try:
-            import tempfile
+            # 標準入力から読める再生コマンドはパイプで直接渡す（一時ファイルの書き出しを省略）
+            stdin_command = self._stdin_audio_command()
+            if stdin_command:
+                process = subprocess.Popen(stdin_command, stdin=subprocess.PIPE,
+                                         stdout=subprocess.DEVNULL,
+                                         stderr=subprocess.DEVNULL)
+                process.communicate(wav_data)
+                return
+
+            # afplay / PowerShell は標準入力に対応していないため一時ファイル経由
             with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
                 temp_file.write(wav_data)
                 temp_file_path = temp_file.name
 
             if self.audio_command == 'powershell':
                 # Windows PowerShell
-                os.system(f'powershell.exe -c "(New-Object Media.SoundPlayer \\"{temp_file_path}\\").PlaySync()"')
-            elif self.audio_command == 'ffplay':
-                # ffplay（ログ出力を抑制）
-                os.system(f"{self.audio_command} -nodisp -autoexit -loglevel quiet {temp_file_path}")
+                subprocess.run([
+                    'powershell.exe', '-c',
+                    f'(New-Object Media.SoundPlayer \\"{temp_file_path}\\").PlaySync()'
+                ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
             else:
-                # aplay, paplay, afplay
-                os.system(f"{self.audio_command} {temp_file_path}")
+                # afplay（シェルを介さず直接起動）
+                subprocess.run([self.audio_command, temp_file_path],
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL,
+                               check=False)
             
             os.unlink(temp_file_path)
         except Exception as e:
             print(f"❌ 音声再生エラー: {e}")
 
+    def start_clocked_playback(self, wav_data):
+        """sounddeviceで再生を開始し、先頭サンプルがDACから出る時刻を返す
+
+        戻り値はperf_counter_ns基準の時刻（ns）。オーディオ側のクロック
+        （outputBufferDacTime）から換算するので、外部コマンドの起動待ちによる
+        ずれが入らない。sounddeviceが使えない場合はNoneを返す。
+        """
+        if sd is None:
+            return None
+
+        try:
+            with wave.open(io.BytesIO(wav_data), 'rb') as wf:
+                channels = wf.getnchannels()
+                rate = wf.getframerate()
+                frames = wf.readframes(wf.getnframes())
+            pcm = np.frombuffer(frames, dtype=np.int16).reshape(-1, channels)
+
+            # 前回のストリームが残っていれば閉じる
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
+
+            first_buffer = threading.Event()
+            anchor = {}
+            pos = 0
+            played_frames = self.played_frames
+            played_frames.value = 0
+            self._sample_rate = rate
+
+            def _callback(outdata, frame_count, time_info, status):
+                nonlocal pos
+                if not first_buffer.is_set():
+                    # 最初のバッファの出力時刻をperf_counter基準に換算
+                    dac_delay = time_info.outputBufferDacTime - time_info.currentTime
+                    anchor['start_ns'] = time_module.perf_counter_ns() + int(dac_delay * 1e9)
+                    self._latency_frames = int(dac_delay * rate)
+                    first_buffer.set()
+                chunk = pcm[pos:pos + frame_count]
+                outdata[:len(chunk)] = chunk
+                pos += frame_count
+                played_frames.value = pos  # 再生位置をメインスレッドへ公開
+                if len(chunk) < frame_count:
+                    outdata[len(chunk):] = 0
+                    raise sd.CallbackStop
+
+            self._stream = sd.OutputStream(
+                samplerate=rate,
+                channels=channels,
+                dtype='int16',
+                callback=_callback
+            )
+            self._stream.start()
+            if not first_buffer.wait(timeout=_FIRST_BUFFER_TIMEOUT):
+                # デバイスがコールバックを呼ばない（停止中・切断など）ので諦めて外部コマンドに任せる
+                print("⚠️ sounddeviceの出力が始まりません（外部コマンドで再生します）")
+                self._stream.close()
+                self._stream = None
+                return None
+            return anchor['start_ns']
+        except Exception as e:
+            print(f"⚠️ sounddevice再生エラー（外部コマンドで再生します）: {e}")
+            return None
+
+    def playback_position(self):
+        """sounddevice再生中の現在位置（秒）を返す（再生中でなければNone）
+
+        壁時計ではなくデバイスが消費したフレーム数から求めるので、再生との間にずれが蓄積しない
+        """
+        stream = self._stream
+        if stream is None or not stream.active or not self._sample_rate:
+            return None
+        return (self.played_frames.value - self._latency_frames) / self._sample_rate
+
+    def prewarm(self):
+        """20ms分の無音を再生して出力デバイスを起こしておく（初回発話の再生開始遅れを防ぐ）"""
+        if sd is None:
+            return
+        try:
+            rate = 24000  # VOICEVOXの出力レート
+            sd.play(np.zeros(rate // 50, dtype=np.int16), samplerate=rate, blocking=True)
+        except Exception as e:
+            print(f"⚠️ 音声出力のウォームアップに失敗: {e}")
+
+    def _stdin_audio_command(self):
+        """標準入力からWAVを読める再生コマンドを返す（非対応ならNone）"""
+        if self.audio_command == 'ffplay':
+            return ['ffplay', '-nodisp', '-autoexit', '-loglevel', 'quiet', '-i', 'pipe:0']
+        if self.audio_command in ('aplay', 'paplay'):
+            # ファイル指定なしで標準入力から読み込む
+            return [self.audio_command]
+        return None
+
     def play_audio_precise(self, wav_data, start_event):
         """音声を再生（精密同期版）"""
         if not self.audio_command:
@@ -287,36 +688,54 @@ class AudioPlayer:
             return
 
         try:
-            import tempfile
-            import subprocess
-
+            # 標準入力から読める再生コマンドはパイプで直接渡す（一時ファイルの書き出しを省略）
+            stdin_command = self._stdin_audio_command()
+            if stdin_command:
+                process = subprocess.Popen(stdin_command, stdin=subprocess.PIPE,
+                                         stdout=subprocess.DEVNULL,
+                                         stderr=subprocess.DEVNULL)
+                view = memoryview(wav_data)
+                prime = _pipe_prime_bytes(process.stdin)
+                if len(view) > prime:
+                    # パイプ容量を超える先頭部分の書き込みが終わる = 再生コマンドが読み始めた
+                    process.stdin.write(view[:prime])
+                    process.stdin.flush()
+                    if start_event:
+                        start_event.set()
+                    process.stdin.write(view[prime:])
+                else:
+                    # パイプに収まる短いクリップは読み始めを検知できないので、起動直後に通知する
+                    if start_event:
+                        start_event.set()
+                    process.stdin.write(view)
+                process.stdin.close()
+                process.wait()
+                return
+
+            # afplay / PowerShell は標準入力に対応していないため一時ファイル経由
             with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
                 temp_file.write(wav_data)
                 temp_file_path = temp_file.name
 
-            # 再生開始を通知
-            if start_event:
-                start_event.set()
-
-            # プラットフォーム別の音声再生
             if self.audio_command == 'powershell':
                 # Windows PowerShell
                 process = subprocess.Popen([
                     'powershell.exe', '-c', 
                     f'(New-Object Media.SoundPlayer \\"{temp_file_path}\\").PlaySync()'
                 ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            elif self.audio_command == 'ffplay':
-                # ffplay（ログ出力を抑制）
-                process = subprocess.Popen([
-                    'ffplay', '-nodisp', '-autoexit', '-loglevel', 'quiet', temp_file_path
-                ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             else:
-                # aplay, paplay, afplay
+                # afplay
                 process = subprocess.Popen([self.audio_command, temp_file_path],
                                          stdout=subprocess.DEVNULL,
                                          stderr=subprocess.DEVNULL)
-            
+
+            # 再生開始を通知（プロセス起動後に通知して起動時間分のずれを減らす）
+            if start_event:
+                start_event.set()
             process.wait()
             os.unlink(temp_file_path)
         except Exception as e:
-            print(f"❌ 音声再生エラー: {e}")
\ No newline at end of file
+            print(f"❌ 音声再生エラー: {e}")
+            # 待機側が止まらないように通知だけは行う
+            if start_event:
+                start_event.set()
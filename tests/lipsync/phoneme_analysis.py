@@ -4,109 +4,282 @@
 AudioQuery から音韻情報を抽出し、口の形制御用に変換
 """
 
+import re
+import sys
+import functools
+import importlib.util
+import numpy as np
+
+# pykakasiはimport時に辞書を読み込むので、有無だけ確認して読み込みは初回の漢字変換まで遅らせる
+_PYKAKASI_AVAILABLE = importlib.util.find_spec("pykakasi") is not None
+if not _PYKAKASI_AVAILABLE:
+    print("⚠️  pykakasiがインストールされていません。漢字の読み変換は利用できません。")
+
 try:
-    import pykakasi
+    from numba import njit
 except ImportError:
-    pykakasi = None
-    print("⚠️  pykakasiがインストールされていません。漢字の読み変換は利用できません。")
+    njit = None  # numbaが無い場合は通常のPython関数として実行
+
+# 母音ごとのかな集合（口形状 a / i / o）
+_A_KANA = frozenset('あかがさざただなはばぱまやらわアカガサザタダナハバパマヤラワ')
+_I_KANA = frozenset('いきぎしじちぢにひびぴみりイキギシジチヂニヒビピミリ')
+_O_KANA = frozenset('うえおこごそぞとどのほぼぽもよろをンウエオコゴソゾトドノホボポモヨロヲン')
+
+# BMP（U+0000〜U+FFFF）の文字コード → 口形状コードの表
+# 0: None, 1: mouth_a, 2: mouth_i, 3: mouth_o
+_SHAPE_NAMES = (None, 'mouth_a', 'mouth_i', 'mouth_o')
+_KANA_LUT = bytearray(0x10000)
+for _sounds, _code in ((_A_KANA, 1), (_I_KANA, 2), (_O_KANA, 3)):
+    for _char in _sounds:
+        _KANA_LUT[ord(_char)] = _code
+del _sounds, _code, _char
+_KANA_LUT = bytes(_KANA_LUT)
+# 文字列全体を一括変換するためのNumPy版（同じメモリを参照）
+_KANA_SHAPE_TABLE = np.frombuffer(_KANA_LUT, dtype=np.uint8)
+
+def _kana_shape_code(char):
+    """1文字の口形状コードを返す（かな以外・BMP外は0）"""
+    code = ord(char)
+    return _KANA_LUT[code] if code < 0x10000 else 0
+
+# 漢字読み変換用のpykakasi（全インスタンスで共有）
+_KAKASI = None
+
+def _get_kakasi():
+    """pykakasiの変換器を返す（初回呼び出し時にimportして生成、利用できない場合はNone）"""
+    global _KAKASI, _PYKAKASI_AVAILABLE
+    if _KAKASI is None and _PYKAKASI_AVAILABLE:
+        try:
+            import pykakasi
+            _KAKASI = pykakasi.kakasi()
+            print("✅ pykakasi漢字読み変換準備完了")
+        except Exception as e:
+            print(f"⚠️  pykakasi初期化エラー: {e}")
+            _PYKAKASI_AVAILABLE = False
+    return _KAKASI
+
+@functools.lru_cache(maxsize=4096)
+def _kanji_reading(char):
+    """漢字のひらがな読みを返す（同じ漢字は変換結果を使い回す）"""
+    kakasi = _get_kakasi()
+    if kakasi is None:
+        return None
+    converted = kakasi.convert(char)
+    if not converted:
+        return None
+    return ''.join([item['hira'] for item in converted])
+
+# 漢字（CJK統合漢字）の検出用
+_KANJI_RE = re.compile(r'[\u4e00-\u9faf]')
+
+@functools.lru_cache(maxsize=256)
+def _text_reading(text):
+    """テキスト全体をpykakasiで1回だけ変換し、ひらがな読みを返す
+
+    漢字を含まない場合や変換できない場合は元のテキストをそのまま返す
+    """
+    if not _KANJI_RE.search(text):
+        return text
+    kakasi = _get_kakasi()
+    if kakasi is None:
+        return text
+    try:
+        return ''.join([item['hira'] for item in kakasi.convert(text)])
+    except Exception as e:
+        print(f"⚠️  漢字読み変換エラー: {e}")
+        return text
+
+def _run_length_encode(starts, durations, codes):
+    """連続する同じ口形状コードを1つにまとめる（送信リクエスト数を削減）
+
+    まとめたエントリの長さは後続エントリの終了時刻まで延長する
+    """
+    n = len(codes)
+    if n == 0:
+        return starts, durations, codes
+    change = np.empty(n, dtype=np.bool_)
+    change[0] = True
+    np.not_equal(codes[1:], codes[:-1], out=change[1:])
+    heads = np.flatnonzero(change)
+    lasts = np.append(heads[1:] - 1, n - 1)
+    merged = starts[lasts] + durations[lasts] - starts[heads]
+    return starts[heads], merged, codes[heads]
+
+# これより短い間隔で口形状を切り替えてもOSのタイマー分解能では間に合わないので1つにまとめる（秒）
+MIN_TICK_SECONDS = 0.008
+
+def _coalesce_within_tick(starts, durations, codes, min_dt=MIN_TICK_SECONDS):
+    """開始時刻が先頭エントリからmin_dt未満のエントリを1つにまとめる
+
+    まとめた区間の口形状は最も長いエントリのものを使い、最後に同じ口形状の連続を再統合する
+    """
+    n = len(codes)
+    if n < 2 or not (np.diff(starts) < min_dt).any():
+        return starts, durations, codes
+
+    start_list = starts.tolist()
+    ends = (starts + durations).tolist()
+    duration_list = durations.tolist()
+    heads = []
+    lasts = []
+    dominant = []
+    head = 0
+    for i in range(1, n + 1):
+        if i < n and start_list[i] - start_list[head] < min_dt:
+            continue
+        heads.append(head)
+        lasts.append(i - 1)
+        dominant.append(max(range(head, i), key=duration_list.__getitem__))
+        head = i
+
+    heads = np.array(heads)
+    merged = np.asarray(ends)[lasts] - starts[heads]
+    return _run_length_encode(starts[heads], merged, codes[dominant])
+
+# 口形状シーケンスのキャッシュ件数（超えたら古い順に捨てる）
+SEQUENCE_CACHE_SIZE = 512
+
+# 日本語音韻から口形状への詳細マッピング（読み取り専用、全インスタンスで共有）
+PHONEME_TO_MOUTH = {
+    # 母音
+    'a': 'a',    # あ
+    'i': 'i',    # い
+    'u': 'o',    # う（oに統合）
+    'e': 'a',    # え（aに近い）
+    'o': 'o',    # お
+
+    # 子音（口の形に影響を与えるもの）
+    'k': 'a',    # か行（aに近い）
+    'g': 'a',    # が行
+    's': 'i',    # さ行（iに近い）
+    'z': 'i',    # ざ行
+    't': 'a',    # た行
+    'd': 'a',    # だ行
+    'n': 'o',    # な行（oに近い）
+    'h': 'o',    # は行
+    'b': 'o',    # ば行
+    'p': 'o',    # ぱ行
+    'm': 'o',    # ま行
+    'y': 'a',    # や行
+    'r': 'a',    # ら行
+    'w': 'o',    # わ行
+    'f': 'o',    # ふ
+    'v': 'o',    # ヴ
+    'ch': 'i',   # ち（iに近い）
+    'sh': 'i',   # し
+    'j': 'i',    # じ
+    'ts': 'a',   # つ
+
+    # 子音＋母音の組み合わせ
+    # あ系
+    'ka': 'a', 'ga': 'a', 'sa': 'a', 'za': 'a', 'ta': 'a', 'da': 'a',
+    'na': 'a', 'ha': 'a', 'ba': 'a', 'pa': 'a', 'ma': 'a', 'ya': 'a',
+    'ra': 'a', 'wa': 'a', 'fa': 'a', 'va': 'a',
+
+    # い系
+    'ki': 'i', 'gi': 'i', 'si': 'i', 'shi': 'i', 'zi': 'i', 'ji': 'i',
+    'ti': 'i', 'chi': 'i', 'di': 'i', 'ni': 'i', 'hi': 'i', 'bi': 'i',
+    'pi': 'i', 'mi': 'i', 'ri': 'i', 'wi': 'i', 'fi': 'i', 'vi': 'i',
+
+    # う系（oに統合）
+    'ku': 'o', 'gu': 'o', 'su': 'o', 'zu': 'o', 'tu': 'o', 'tsu': 'o',
+    'du': 'o', 'nu': 'o', 'hu': 'o', 'fu': 'o', 'bu': 'o', 'pu': 'o',
+    'mu': 'o', 'yu': 'o', 'ru': 'o', 'wu': 'o',
+
+    # え系（aに近い）
+    'ke': 'a', 'ge': 'a', 'se': 'a', 'ze': 'a', 'te': 'a', 'de': 'a',
+    'ne': 'a', 'he': 'a', 'be': 'a', 'pe': 'a', 'me': 'a', 're': 'a',
+    'we': 'a', 'fe': 'a', 've': 'a',
+
+    # お系
+    'ko': 'o', 'go': 'o', 'so': 'o', 'zo': 'o', 'to': 'o', 'do': 'o',
+    'no': 'o', 'ho': 'o', 'bo': 'o', 'po': 'o', 'mo': 'o', 'yo': 'o',
+    'ro': 'o', 'wo': 'o', 'fo': 'o', 'vo': 'o',
+
+    # 特殊音韻
+    'sil': None,    # 無音
+    'pau': None,    # ポーズ
+    'cl': None,     # 閉鎖音
+    'q': None,      # 促音
+    'N': 'o',       # ん
+
+    # 長音・その他
+    'ー': None,
+    'っ': None,
+    ',': None,      # 句読点
+    '、': None,
+    '。': None,
+    '.': None,
+    ' ': None,      # スペース
+}
+# キーをinternしておき、同じ音韻文字列との比較を参照比較で済ませる
+PHONEME_TO_MOUTH = {sys.intern(key): value for key, value in PHONEME_TO_MOUTH.items()}
+
+# 口形状の整数コード（0: None, 1: a, 2: i, 3: o）と音韻 → コードの表
+# 解析結果を数値配列で持ち、無音の除外や連続の統合を配列演算で行う
+_MOUTH_NAMES = (None, 'a', 'i', 'o')
+_PHONEME_TO_CODE = {key: _MOUTH_NAMES.index(value) for key, value in PHONEME_TO_MOUTH.items()}
+_DEFAULT_CODE = 1  # 未知の音韻は 'a' として扱う
+
+def _codes_to_shapes(codes):
+    """口形状コード配列を口形状名のリストに戻す"""
+    return [_MOUTH_NAMES[code] for code in codes.tolist()]
+
+def _build_timeline(durations, speed_scale):
+    """速度スケール適用後の長さと開始時刻を1パスで計算し、総時間も返す"""
+    n = len(durations)
+    starts = np.empty(n, dtype=np.float64)
+    scaled = np.empty(n, dtype=np.float64)
+    inv_speed = 1.0 / speed_scale
+    acc = 0.0
+    for i in range(n):
+        starts[i] = acc
+        scaled[i] = durations[i] * inv_speed
+        acc += scaled[i]
+    return starts, scaled, acc
+
+if njit:
+    _build_timeline = njit(cache=True)(_build_timeline)
+else:
+    def _build_timeline(durations, speed_scale):
+        """numbaが無い場合は累積和で同じ計算を行う"""
+        scaled = durations / speed_scale
+        ends = np.cumsum(scaled)
+        starts = np.concatenate(([0.0], ends[:-1]))
+        return starts, scaled, float(ends[-1]) if len(ends) else 0.0
 
 class PhonemeAnalyzer:
     """AudioQueryから音韻情報を抽出してリップシンク用に変換"""
 
     def __init__(self):
-        # pykakasi初期化（漢字読み変換用）
-        self.kakasi_converter = None
-        if pykakasi:
-            try:
-                # 新しいpykakasiのAPI使用
-                kks = pykakasi.kakasi()
-                self.kakasi_converter = kks
-                print("✅ pykakasi漢字読み変換準備完了")
-            except Exception as e:
-                print(f"⚠️  pykakasi初期化エラー: {e}")
-                self.kakasi_converter = None
-
-        # 日本語音韻から口形状への詳細マッピング
-        self.phoneme_to_mouth = {
-            # 母音
-            'a': 'a',    # あ
-            'i': 'i',    # い
-            'u': 'o',    # う（oに統合）
-            'e': 'a',    # え（aに近い）
-            'o': 'o',    # お
-
-            # 子音（口の形に影響を与えるもの）
-            'k': 'a',    # か行（aに近い）
-            'g': 'a',    # が行
-            's': 'i',    # さ行（iに近い）
-            'z': 'i',    # ざ行
-            't': 'a',    # た行
-            'd': 'a',    # だ行
-            'n': 'o',    # な行（oに近い）
-            'h': 'o',    # は行
-            'b': 'o',    # ば行
-            'p': 'o',    # ぱ行
-            'm': 'o',    # ま行
-            'y': 'a',    # や行
-            'r': 'a',    # ら行
-            'w': 'o',    # わ行
-            'f': 'o',    # ふ
-            'v': 'o',    # ヴ
-            'ch': 'i',   # ち（iに近い）
-            'sh': 'i',   # し
-            'j': 'i',    # じ
-            'ts': 'a',   # つ
-
-            # 子音＋母音の組み合わせ
-            # あ系
-            'ka': 'a', 'ga': 'a', 'sa': 'a', 'za': 'a', 'ta': 'a', 'da': 'a',
-            'na': 'a', 'ha': 'a', 'ba': 'a', 'pa': 'a', 'ma': 'a', 'ya': 'a',
-            'ra': 'a', 'wa': 'a', 'fa': 'a', 'va': 'a',
-
-            # い系
-            'ki': 'i', 'gi': 'i', 'si': 'i', 'shi': 'i', 'zi': 'i', 'ji': 'i',
-            'ti': 'i', 'chi': 'i', 'di': 'i', 'ni': 'i', 'hi': 'i', 'bi': 'i',
-            'pi': 'i', 'mi': 'i', 'ri': 'i', 'wi': 'i', 'fi': 'i', 'vi': 'i',
-
-            # う系（oに統合）
-            'ku': 'o', 'gu': 'o', 'su': 'o', 'zu': 'o', 'tu': 'o', 'tsu': 'o',
-            'du': 'o', 'nu': 'o', 'hu': 'o', 'fu': 'o', 'bu': 'o', 'pu': 'o',
-            'mu': 'o', 'yu': 'o', 'ru': 'o', 'wu': 'o',
-
-            # え系（aに近い）
-            'ke': 'a', 'ge': 'a', 'se': 'a', 'ze': 'a', 'te': 'a', 'de': 'a',
-            'ne': 'a', 'he': 'a', 'be': 'a', 'pe': 'a', 'me': 'a', 're': 'a',
-            'we': 'a', 'fe': 'a', 've': 'a',
-
-            # お系
-            'ko': 'o', 'go': 'o', 'so': 'o', 'zo': 'o', 'to': 'o', 'do': 'o',
-            'no': 'o', 'ho': 'o', 'bo': 'o', 'po': 'o', 'mo': 'o', 'yo': 'o',
-            'ro': 'o', 'wo': 'o', 'fo': 'o', 'vo': 'o',
-
-            # 特殊音韻
-            'sil': None,    # 無音
-            'pau': None,    # ポーズ
-            'cl': None,     # 閉鎖音
-            'q': None,      # 促音
-            'N': 'o',       # ん
-
-            # 長音・その他
-            'ー': None,
-            'っ': None,
-            ',': None,      # 句読点
-            '、': None,
-            '。': None,
-            '.': None,
-            ' ': None,      # スペース
-        }
+        # 日本語音韻から口形状への詳細マッピング（モジュール定数を共有）
+        self.phoneme_to_mouth = PHONEME_TO_MOUTH
 
-    def analyze_from_audio_query(self, audio_query, speed_scale: float = 1.0):
-        """AudioQueryから音韻情報を抽出してリップシンク用に変換"""
+        # (キャッシュキー, 速度) → 口形状シーケンス（同じ文の再発話で解析を省く）
+        self._seq_cache = {}
+
+    @property
+    def kakasi_converter(self):
+        """漢字読み変換用のpykakasi（初めて漢字を変換する時に読み込む）"""
+        return _get_kakasi()
+
+    def analyze_phoneme_arrays(self, audio_query, speed_scale: float = 1.0):
+        """AudioQueryから音韻情報を抽出し、(開始時刻配列, 長さ配列, 口形状リスト) で返す"""
+        starts, durations, codes = self.analyze_phoneme_codes(audio_query, speed_scale)
+        return starts, durations, _codes_to_shapes(codes)
+
+    def analyze_phoneme_codes(self, audio_query, speed_scale: float = 1.0):
+        """AudioQueryから音韻情報を抽出し、(開始時刻配列, 長さ配列, 口形状コード配列) で返す"""
         try:
             print(f"🔍 AudioQuery音韻解析開始 (速度: {speed_scale}x)")
 
-            phoneme_timeline = []
-            current_time = 0.0
+            # 1パス目: 口形状コードと長さ（速度スケール適用前）だけを集める
+            shapes = []
+            durations = []
+            # ループ内の属性参照を避けるためメソッドをローカルに束縛
+            to_code = _PHONEME_TO_CODE.get
+            add_shape = shapes.append
+            add_duration = durations.append
 
             # accent_phrasesから音韻情報を抽出
             if hasattr(audio_query, 'accent_phrases'):
@@ -115,85 +288,116 @@ class PhonemeAnalyzer:
                         for mora in accent_phrase.moras:
                             # 子音処理
                             if hasattr(mora, 'consonant') and mora.consonant:
-                                consonant_phoneme = mora.consonant
-                                consonant_duration = getattr(mora, 'consonant_length', 0.1) or 0.1
-
-                                # 速度スケールを適用
-                                consonant_duration /= speed_scale
-
-                                mouth_shape = self.phoneme_to_mouth.get(consonant_phoneme, 'a')
-                                phoneme_timeline.append((current_time, mouth_shape, consonant_duration))
-                                current_time += consonant_duration
+                                add_shape(to_code(mora.consonant, _DEFAULT_CODE))
+                                add_duration(getattr(mora, 'consonant_length', 0.1) or 0.1)
 
                             # 母音処理
                             if hasattr(mora, 'vowel') and mora.vowel:
-                                vowel_phoneme = mora.vowel
-                                vowel_duration = getattr(mora, 'vowel_length', 0.1) or 0.1
-
-                                # 速度スケールを適用
-                                vowel_duration /= speed_scale
-
-                                mouth_shape = self.phoneme_to_mouth.get(vowel_phoneme, 'a')
-                                phoneme_timeline.append((current_time, mouth_shape, vowel_duration))
-                                current_time += vowel_duration
+                                add_shape(to_code(mora.vowel, _DEFAULT_CODE))
+                                add_duration(getattr(mora, 'vowel_length', 0.1) or 0.1)
 
                     # ポーズ処理
                     if hasattr(accent_phrase, 'pause_mora') and accent_phrase.pause_mora:
                         pause_duration = getattr(accent_phrase.pause_mora, 'vowel_length', 0.0) or 0.0
                         if pause_duration > 0:
-                            # 速度スケールを適用
-                            pause_duration /= speed_scale
-                            phoneme_timeline.append((current_time, None, pause_duration))
-                            current_time += pause_duration
+                            add_shape(0)
+                            add_duration(pause_duration)
 
-            print(f"✅ AudioQuery音韻解析完了: {len(phoneme_timeline)}音韻, 総時間: {current_time:.2f}秒")
-            return phoneme_timeline
+            # 速度スケール適用と開始時刻の累積は数値ループにまとめる（numbaがあればJIT）
+            starts, scaled, current_time = _build_timeline(
+                np.asarray(durations, dtype=np.float64), float(speed_scale)
+            )
+
+            print(f"✅ AudioQuery音韻解析完了: {len(shapes)}音韻, 総時間: {current_time:.2f}秒")
+            return starts, scaled, np.asarray(shapes, dtype=np.uint8)
 
         except Exception as e:
             print(f"❌ AudioQuery音韻解析エラー: {e}")
-            return []
+            return np.empty(0), np.empty(0), np.empty(0, dtype=np.uint8)
 
-    def get_mouth_shape_sequence(self, audio_query, speed_scale: float = 1.0):
+    def analyze_from_audio_query(self, audio_query, speed_scale: float = 1.0):
+        """AudioQueryから音韻情報を抽出してリップシンク用に変換
+
+        連続する同じ口形状（Noneを含む）は長さを合算して1つにまとめる
+        """
+        starts, durations, codes = _run_length_encode(*self.analyze_phoneme_codes(audio_query, speed_scale))
+        return list(zip(starts.tolist(), _codes_to_shapes(codes), durations.tolist()))
+
+    def get_mouth_shape_arrays(self, audio_query, speed_scale: float = 1.0, cache_key=None):
+        """AudioQueryから口形状シーケンスを (開始時刻配列, 長さ配列, 口形状リスト) で生成
+
+        無音音韻（口形状None）は除外し、連続する同じ口形状は1つにまとめる
+        cache_key（例: (テキスト, スタイルID)）を渡すと結果をキャッシュし、次回は解析を省く
+        """
+        if cache_key is not None:
+            cached = self._seq_cache.get((cache_key, speed_scale))
+            if cached is not None:
+                starts, durations, shapes = cached
+                print(f"♻️ 口形状シーケンスをキャッシュから取得: {len(shapes)}個")
+                return starts.copy(), durations.copy(), list(shapes)
+
+        starts, durations, merged_shapes = self._build_mouth_shape_arrays(audio_query, speed_scale)
+
+        if cache_key is not None:
+            if len(self._seq_cache) >= SEQUENCE_CACHE_SIZE:
+                # 挿入順で最も古いエントリを捨てる（FIFO）
+                del self._seq_cache[next(iter(self._seq_cache))]
+            self._seq_cache[(cache_key, speed_scale)] = (starts.copy(), durations.copy(), list(merged_shapes))
+        return starts, durations, merged_shapes
+
+    def _build_mouth_shape_arrays(self, audio_query, speed_scale):
+        """口形状シーケンスを解析して生成（キャッシュなし）"""
+        starts, durations, codes = self.analyze_phoneme_codes(audio_query, speed_scale)
+        keep = codes != 0
+        voiced_count = int(keep.sum())
+        skipped = len(codes) - voiced_count
+        if skipped:
+            print(f"⚠️  無音音韻をスキップ: {skipped}個")
+        starts, durations, merged_codes = _run_length_encode(starts[keep], durations[keep], codes[keep])
+        # タイマー分解能より短い切り替えは送っても間に合わないので1回にまとめる
+        starts, durations, merged_codes = _coalesce_within_tick(starts, durations, merged_codes)
+        print(f"🗜️ 同一口形状の連続・短すぎる切り替えを統合: {voiced_count} → {len(merged_codes)}")
+        return starts, durations, _codes_to_shapes(merged_codes)
+
+    def get_mouth_shape_sequence(self, audio_query, speed_scale: float = 1.0, cache_key=None):
         """AudioQueryから口形状シーケンスを生成"""
-        phoneme_timeline = self.analyze_from_audio_query(audio_query, speed_scale)
-        mouth_sequence = []
-
-        for time_pos, mouth_shape, duration in phoneme_timeline:
-            if mouth_shape:  # Noneでない場合のみ追加
-                mouth_sequence.append((time_pos, mouth_shape, duration))
-            else:
-                print(f"⚠️  無音音韻をスキップ: {time_pos:.2f}s (duration: {duration:.2f}s)")
+        starts, durations, shapes = self.get_mouth_shape_arrays(audio_query, speed_scale, cache_key)
+        return list(zip(starts.tolist(), shapes, durations.tolist()))
 
-        return mouth_sequence
+    def text_to_mouth_arrays(self, text):
+        """テキストから口の動きを (開始時刻配列, 長さ配列, 口形状コード配列) で生成（簡易版）
 
-    def text_to_mouth_sequence(self, text):
-        """テキストから口の動きシーケンスを生成（簡易版）"""
-        sequence = []
-        current_time = 0.0
+        口形状コードは _SHAPE_NAMES の添字（0: None, 1: mouth_a, 2: mouth_i, 3: mouth_o）。
+        漢字を含む場合はテキスト全体をpykakasiで1回だけ読みに変換し、
+        かなは文字コード表で一括変換する。同じ口形状が続く文字は1つにまとめる
+        """
         char_duration = 0.15  # 1文字あたりの時間
+        text = _text_reading(text) if text else ''
+
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        shape_codes = np.where(codes < 0x10000, _KANA_SHAPE_TABLE[np.minimum(codes, 0xffff)], 0).astype(np.uint8)
 
-        for char in text:
-            mouth_shape = self.char_to_mouth_shape(char)
-            sequence.append((current_time, mouth_shape, char_duration))
-            current_time += char_duration
+        times = np.arange(len(codes)) * char_duration
+        durations = np.full(len(codes), char_duration)
+        return _run_length_encode(times, durations, shape_codes)
 
-        return sequence
+    def text_to_mouth_sequence(self, text):
+        """テキストから口の動きシーケンスを生成（簡易版）"""
+        times, durations, shape_codes = self.text_to_mouth_arrays(text)
+        shapes = [_SHAPE_NAMES[code] for code in shape_codes.tolist()]
+        return list(zip(times.tolist(), shapes, durations.tolist()))
 
     def char_to_mouth_shape(self, char):
         """文字から口の形を推定（pykakasi漢字読み対応版）"""
         # 漢字の場合はpykakasiで読みに変換
         if self.kakasi_converter and self._is_kanji(char):
             try:
-                # 新しいpykakasiのAPI使用
-                converted = self.kakasi_converter.convert(char)
-                if converted:
-                    # 変換結果から'hira'（ひらがな）を取得
-                    hiragana_reading = ''.join([item['hira'] for item in converted])
-                    if hiragana_reading and hiragana_reading != char:
-                        # 読みの最初の文字で口の形を判定
-                        first_char = hiragana_reading[0]
-                        print(f"🔤 漢字変換: '{char}' → '{hiragana_reading}' → 判定文字:'{first_char}'")
-                        return self._hiragana_to_mouth_shape(first_char)
+                hiragana_reading = _kanji_reading(char)
+                if hiragana_reading and hiragana_reading != char:
+                    # 読みの最初の文字で口の形を判定
+                    first_char = hiragana_reading[0]
+                    print(f"🔤 漢字変換: '{char}' → '{hiragana_reading}' → 判定文字:'{first_char}'")
+                    return self._hiragana_to_mouth_shape(first_char)
             except Exception as e:
                 print(f"⚠️  漢字読み変換エラー: {char} - {e}")
 
@@ -206,16 +410,4 @@ class PhonemeAnalyzer:
 
     def _hiragana_to_mouth_shape(self, char):
         """ひらがな・カタカナから口の形を判定"""
-        # ひらがな・カタカナの母音判定
-        a_sounds = 'あかがさざただなはばぱまやらわアカガサザタダナハバパマヤラワ'
-        i_sounds = 'いきぎしじちぢにひびぴみりイキギシジチヂニヒビピミリ'
-        o_sounds = 'うえおこごそぞとどのほぼぽもよろをンウエオコゴソゾトドノホボポモヨロヲン'
-
-        if char in a_sounds:
-            return 'mouth_a'
-        elif char in i_sounds:
-            return 'mouth_i'
-        elif char in o_sounds:
-            return 'mouth_o'
-        else:
-            return None
\ No newline at end of file
+        return _SHAPE_NAMES[_kana_shape_code(char)]
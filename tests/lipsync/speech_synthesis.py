@@ -5,22 +5,34 @@ VOICEVOX Core を使用した音声合成機能
 """
 
 import os
+import copy
+import functools
+from collections import OrderedDict
 from voicevox_core.blocking import Onnxruntime, OpenJtalk, Synthesizer, VoiceModelFile
 
 # VOICEVOX Core設定
 VOICEVOX_ONNXRUNTIME_PATH = "voicevox_core/onnxruntime/lib/" + Onnxruntime.LIB_VERSIONED_FILENAME
 OPEN_JTALK_DICT_DIR = "voicevox_core/dict/open_jtalk_dic_utf_8-1.11"
 MODEL_PATH = "voicevox_core/models/vvms/13.vvm"  # 13.vvmを使用
+AUDIO_QUERY_CACHE_SIZE = 256  # (テキスト, スタイルID) ごとのAudioQueryキャッシュ件数
+
+@functools.lru_cache(maxsize=1)
+def get_onnxruntime():
+    """ONNX Runtimeを返す（プロセス内で1回だけロード）"""
+    return Onnxruntime.load_once(filename=VOICEVOX_ONNXRUNTIME_PATH)
+
+@functools.lru_cache(maxsize=1)
+def get_open_jtalk():
+    """OpenJTalk辞書を返す（辞書の読み込みはプロセス内で1回だけ）"""
+    return OpenJtalk(OPEN_JTALK_DICT_DIR)
 
 class SpeechSynthesizer:
     """VOICEVOX を使用した音声合成クラス"""
 
     def __init__(self):
         print("🚀 VOICEVOX初期化中...")
-        self.synthesizer = Synthesizer(
-            Onnxruntime.load_once(filename=VOICEVOX_ONNXRUNTIME_PATH),
-            OpenJtalk(OPEN_JTALK_DICT_DIR)
-        )
+        # ONNX RuntimeとOpenJTalk辞書はインスタンス間で共有する
+        self.synthesizer = Synthesizer(get_onnxruntime(), get_open_jtalk())
 
         # 音声モデル読み込み（13.vvmを使用）
         with VoiceModelFile.open(MODEL_PATH) as model:
@@ -33,10 +45,25 @@ class SpeechSynthesizer:
         self.default_pitch_scale = 0.0
         self.default_intonation_scale = 0.9
 
+        # AudioQueryのLRUキャッシュ（同じ文の再発話でONNX推論を省く）
+        self._audio_query_cache = OrderedDict()
+
     def create_audio_query(self, text: str, style_id: int = None):
-        """AudioQuery を作成"""
+        """AudioQuery を作成（同じテキスト・スタイルはキャッシュから返す）
+
+        呼び出し側で速度などを書き換えるので、キャッシュの複製を返す
+        """
         style_id = style_id or self.default_style_id
-        return self.synthesizer.create_audio_query(text, style_id)
+        key = (text, style_id)
+        audio_query = self._audio_query_cache.get(key)
+        if audio_query is None:
+            audio_query = self.synthesizer.create_audio_query(text, style_id)
+            self._audio_query_cache[key] = audio_query
+            if len(self._audio_query_cache) > AUDIO_QUERY_CACHE_SIZE:
+                self._audio_query_cache.popitem(last=False)
+        else:
+            self._audio_query_cache.move_to_end(key)
+        return copy.deepcopy(audio_query)
 
     def synthesize_speech(self, audio_query, style_id: int = None):
         """音声合成を実行"""
@@ -12,8 +12,17 @@ LM Studio チャットテストプログラム（非同期版）
 
 import aiohttp
 import asyncio
+import json
 import time
 
+try:
+    import orjson
+    def _json_dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    orjson = None
+    _json_dumps = json.dumps  # orjsonが無い場合は標準ライブラリ
+
 # 利用可能なモデルリスト
 MODELS = {
     "1": {"name": "mistralai/magistral-small-2509", "description": "Mistral Smallモデル"},
@@ -35,7 +44,12 @@ def select_model():
         else:
             print("無効な選択です。1 または 2 を入力してください。")
 
-async def chat_with_ai_async(user_message, model):
+def create_session():
+    """LM Studio用のキープアライブ付きセッションを作成（チャット全体で1つを使い回す）"""
+    connector = aiohttp.TCPConnector(limit=4, keepalive_timeout=60)
+    return aiohttp.ClientSession(connector=connector, json_serialize=_json_dumps)
+
+async def chat_with_ai_async(user_message, model, session):
     url = "http://localhost:1234/v1/chat/completions"
     payload = {
         "model": model,
@@ -45,18 +59,29 @@ async def chat_with_ai_async(user_message, model):
         ],
         "temperature": 0.7,
         "max_tokens": -1,
-        "stream": False
+        "stream": True  # トークンが生成されるたびに受け取る
     }
     
     start_time = time.time()
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, json=payload) as response:
-            response.raise_for_status()
-            result = await response.json()
-            end_time = time.time()
-            elapsed_time = end_time - start_time
-            ai_message = result["choices"][0]["message"]["content"]
-            return ai_message, elapsed_time
+    chunks = []
+    async with session.post(url, json=payload) as response:
+        response.raise_for_status()
+        # SSEフレームを1行ずつ読み、届いたトークンをすぐ表示する
+        async for line in response.content:
+            if not line.startswith(b"data: "):
+                continue
+            data = line[6:].strip()
+            if data == b"[DONE]":
+                break
+            delta = json.loads(data)["choices"][0].get("delta", {})
+            content = delta.get("content")
+            if content:
+                print(content, end="", flush=True)
+                chunks.append(content)
+    end_time = time.time()
+    elapsed_time = end_time - start_time
+    print()
+    return "".join(chunks), elapsed_time
 
 async def main():
     print("🤖 LM Studio チャットテスト（非同期版）")
@@ -67,19 +92,20 @@ async def main():
     selected_model = select_model()
     
     try:
-        while True:
-            user_input = input("あなた: ").strip()  # 入力は同期のまま
-            if user_input.lower() in ['quit', 'exit', 'q']:
-                print("チャットを終了します。")
-                break
-            if not user_input:
-                continue
-            
-            print("AI: ", end="", flush=True)
-            ai_response, elapsed_time = await chat_with_ai_async(user_input, selected_model)
-            print(ai_response)
-            print(f"応答時間: {elapsed_time:.2f}秒")
-            print("-" * 50)
+        # 毎ターン接続を張り直さないよう、セッションはループの外で1つだけ作る
+        async with create_session() as session:
+            while True:
+                user_input = input("あなた: ").strip()  # 入力は同期のまま
+                if user_input.lower() in ['quit', 'exit', 'q']:
+                    print("チャットを終了します。")
+                    break
+                if not user_input:
+                    continue
+                
+                print("AI: ", end="", flush=True)
+                ai_response, elapsed_time = await chat_with_ai_async(user_input, selected_model, session)  # 応答は受信しながら表示済み
+                print(f"応答時間: {elapsed_time:.2f}秒")
+                print("-" * 50)
     except KeyboardInterrupt:
         print("\nチャットを終了します。")
 
@@ -7,6 +7,9 @@ LM Studio チャットテストプログラム
 import requests
 import json
 import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # 利用可能なモデルリスト
 MODELS = {
@@ -29,8 +32,16 @@ def select_model():
         else:
             print("無効な選択です。1 または 2 を入力してください。")
 
-def chat_with_ai(user_message, model):
-    """LM Studio APIでAIとチャット"""
+def _print_token(token):
+    """届いたトークンをすぐ表示"""
+    print(token, end="", flush=True)
+
+def chat_with_ai(user_message, model, on_token=None):
+    """LM Studio APIでAIとチャット
+
+    on_tokenを指定すると、届いたトークンを表示せずにその関数へ渡す
+    """
+    emit = on_token or _print_token
     url = "http://localhost:1234/v1/chat/completions"
 
     payload = {
@@ -49,26 +60,73 @@ def chat_with_ai(user_message, model):
         ],
         "temperature": 0.7,
         "max_tokens": -1,
-        "stream": False
+        "stream": True  # トークンが生成されるたびに受け取る
     }
 
     # APIリクエストを送信
     try:
         start_time = time.time()  # 開始時間を記録
-        response = requests.post(url, json=payload) # POSTリクエストを送信
-        response.raise_for_status() # HTTPエラーがあれば例外を発生させる
+        chunks = []
+        # stream=Trueで応答全体を待たずにSSEフレームを1行ずつ読む
+        with requests.post(url, json=payload, stream=True) as response:
+            response.raise_for_status() # HTTPエラーがあれば例外を発生させる
+
+            for line in response.iter_lines():
+                if not line.startswith(b"data: "):
+                    continue
+                data = line[6:]
+                if data == b"[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {})
+                content = delta.get("content")
+                if content:
+                    emit(content)
+                    chunks.append(content)
 
-        result = response.json() # レスポンスをJSONとして解析
         end_time = time.time()  # 終了時間を記録
         elapsed_time = end_time - start_time  # 経過時間を計算
+        if on_token is None:
+            print()
 
-        ai_message = result["choices"][0]["message"]["content"] # AIの応答を取得
-
-        return ai_message, elapsed_time  # 応答と時間を返す
+        return "".join(chunks), elapsed_time  # 応答全文と時間を返す
 
     except requests.exceptions.RequestException as e:
+        emit(f"エラー: {e}")
+        if on_token is None:
+            print()
         return f"エラー: {e}", 0.0
 
+def _run_chat(user_message, model, tokens):
+    """ワーカースレッドでチャットを実行し、トークンをキューへ流す（最後にNoneで終了を知らせる）"""
+    try:
+        return chat_with_ai(user_message, model, tokens.put)
+    finally:
+        tokens.put(None)
+
+def _print_responses(jobs):
+    """送信済みの質問を受付順に取り出し、応答トークンを届いた順に表示する（Noneで終了）"""
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        tokens, future = job
+        print("AI: ", end="", flush=True)
+        while True:
+            token = tokens.get()
+            if token is None:
+                break
+            print(token, end="", flush=True)
+        try:
+            _, elapsed_time = future.result()
+        except Exception as e:
+            print(f"エラー: {e}", end="")
+            elapsed_time = 0.0
+        print()
+        print(f"応答時間: {elapsed_time:.2f}秒")
+        print("-" * 50)
+        if jobs.empty():
+            print("あなた: ", end="", flush=True)
+
 def main():
     """メイン関数"""
     print("🤖 LM Studio チャットテスト")
@@ -78,22 +136,37 @@ def main():
     # モデルを選択
     selected_model = select_model()
     
+    # 応答の表示は専用スレッドに任せ、前の応答を表示している間も次の入力を受け付けて送信する
+    # （LM Studioは複数スロットで並行に生成できるので、貼り付けた複数行はまとめて先に送られる）
+    jobs = queue.Queue()
+    printer = threading.Thread(target=_print_responses, args=(jobs,), daemon=True)
+    printer.start()
+
     try:
-        while True:
-            user_input = input("あなた: ").strip()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            print("あなた: ", end="", flush=True)
+            while True:
+                try:
+                    user_input = input().strip()
+                except EOFError:
+                    break
 
-            if user_input.lower() in ['quit', 'exit', 'q']:
-                print("チャットを終了します。")
-                break
+                if user_input.lower() in ['quit', 'exit', 'q']:
+                    break
+
+                if not user_input:
+                    if jobs.empty():
+                        print("あなた: ", end="", flush=True)
+                    continue
 
-            if not user_input:
-                continue
+                tokens = queue.SimpleQueue()
+                future = executor.submit(_run_chat, user_input, selected_model, tokens)
+                jobs.put((tokens, future))
 
-            print("AI: ", end="", flush=True)
-            ai_response, elapsed_time = chat_with_ai(user_input, selected_model)
-            print(ai_response)
-            print(f"応答時間: {elapsed_time:.2f}秒")
-            print("-" * 50)
+            # 受付済みの応答を表示し終えてから終了する
+            jobs.put(None)
+            printer.join()
+        print("\nチャットを終了します。")
     except KeyboardInterrupt:
         print("\nチャットを終了します。")
 
@@ -6,10 +6,24 @@ faster_whisper_test.pyの最適化設定を適用したリアルタイム版
 
 import pyaudio
 import numpy as np
+import os
+import sys
 import time
 import threading
-import queue
+import multiprocessing
+from multiprocessing import shared_memory
 from faster_whisper import WhisperModel
+from streaming_pipeline import StreamingPipeline, _fast_rms_f32
+
+try:
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:
+    BatchedInferencePipeline = None  # 古いfaster-whisperでは逐次推論のみ
+
+try:
+    import ctranslate2
+except ImportError:
+    ctranslate2 = None
 
 # =============================================================================
 # 🚀 高速化設定パラメータ（faster_whisper_test.pyからインポート）
@@ -19,9 +33,10 @@ from faster_whisper import WhisperModel
 MODEL_CONFIG = {
     "model_size": "small",         # リアルタイム用にsmallモデルを使用
     "device": "cpu",
-    "compute_type": "int8",
+    "compute_type": "int8",        # CPUが対応していればint8_float16を使う（_select_compute_type）
     "cpu_threads": 6,              # リアルタイム用に適度なスレッド数
-    "num_workers": 1
+    "num_workers": 1,
+    "batch_size": 2                # BatchedInferencePipelineで同時にデコードするVAD区間数
 }
 
 # 認識パラメータ（速度重視のチューニング）
@@ -32,9 +47,10 @@ TRANSCRIBE_CONFIG = {
     "compression_ratio_threshold": 2.0,
     "log_prob_threshold": -0.8,
     "no_speech_threshold": 0.4,
-    "condition_on_previous_text": True,   # リアルタイム用に文脈を維持
-    "initial_prompt": "以下は日本語の音声です。",
+    "condition_on_previous_text": False,  # 文脈は確定済みテキストをinitial_promptで渡して維持（PROMPT_CHARS）
+    "initial_prompt": "以下は日本語の音声です。",  # 確定済みテキストが無い間のプロンプト
     "word_timestamps": False,
+    "without_timestamps": True,    # 表示に使わないタイムスタンプトークンのデコードを省く
     "vad_filter": True,
     "vad_parameters": {
         "min_silence_duration_ms": 500,   # リアルタイム用に短めに
@@ -46,7 +62,7 @@ TRANSCRIBE_CONFIG = {
 # リアルタイム設定
 REALTIME_CONFIG = {
     "chunk": 1024,
-    "format": pyaudio.paInt16,
+    "format": pyaudio.paFloat32,   # Whisperへそのまま渡せるfloat32で録音（非対応のデバイスはint16で録って変換）
     "channels": 1,
     "rate": 16000,
     "buffer_seconds": 1.0,         # 1秒分のバッファ
@@ -54,56 +70,223 @@ REALTIME_CONFIG = {
     "processing_interval": 0.5     # 0.5秒ごとに処理
 }
 
+# 共有メモリのリングバッファ長（処理窓の何倍を保持するか）
+# 認識が窓1つ分より長く遅れても、最新の窓が上書きされないだけの余裕を持たせる
+RING_BUFFER_WINDOWS = 4
+
+# 音量表示の間隔（チャンク数）。1024サンプル=64msなので約100msごと
+VOLUME_PRINT_CHUNKS = max(1, round(REALTIME_CONFIG["rate"] * 0.1 / REALTIME_CONFIG["chunk"]))
+
+# 録音プロセスのSCHED_FIFO優先度（CAP_SYS_NICEが無ければniceで代用）
+CAPTURE_FIFO_PRIORITY = 10
+CAPTURE_NICE = -10
+
+# 次の窓のinitial_promptに渡す確定済みテキストの文字数（長いほどデコーダのプロンプトが増える）
+PROMPT_CHARS = 200
+
+# LocalAgreement: 前の窓の仮説と一致したとみなす最小文字数（1文字の偶然一致を除外）
+MIN_AGREEMENT_CHARS = 2
+
+def _find_agreement(pending, current):
+    """currentの先頭がpendingのどこに現れるかを探し、(位置, 一致した長さ)を返す（一致が無ければNone）
+
+    オーバーラップ区間は前後の窓の両方で認識されるので、前の窓の未確定部分の中に
+    今回の仮説の先頭と一致する箇所があれば、そこが2つの仮説で合意した部分になる。
+    """
+    for length in range(min(len(pending), len(current)), MIN_AGREEMENT_CHARS - 1, -1):
+        pos = pending.rfind(current[:length])
+        if pos >= 0:
+            return pos, length
+    return None
+
+def _select_compute_type(device, preferred):
+    """int8_float16（活性をfp16で扱い帯域を半減）が使えればそれを、無ければ指定の型を返す"""
+    if preferred == "int8" and ctranslate2 is not None:
+        try:
+            if "int8_float16" in ctranslate2.get_supported_compute_types(device):
+                return "int8_float16"
+        except Exception:
+            pass
+    return preferred
+
+# =============================================================================
+# 録音プロセス（認識側のGILと競合しないよう別プロセスで動かす）
+# =============================================================================
+
+def _reserve_capture_cpu():
+    """先頭のコアを録音プロセス用に空け、呼び出しスレッドを残りのコアへ制限する
+
+    モデルのロード前に呼ぶと、以降に作られるCTranslate2のスレッドもこの制限を引き継ぐ。
+    sched_setaffinityが無い環境（Linux以外）や1コアしか使えない場合はNoneを返す。
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return None
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < 2:
+        return None
+    try:
+        os.sched_setaffinity(0, cpus[1:])
+    except OSError:
+        return None
+    return cpus[0]
+
+def _raise_capture_priority(capture_cpu):
+    """録音プロセスを確保したコアへ固定し、推論スレッドに割り込まれないよう優先度を上げる"""
+    if capture_cpu is not None:
+        try:
+            os.sched_setaffinity(0, {capture_cpu})
+        except OSError:
+            pass
+    try:
+        # PortAudioのコールバックスレッドはこの後に作られるのでポリシーを引き継ぐ
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(CAPTURE_FIFO_PRIORITY))
+        return
+    except (AttributeError, OSError):
+        pass  # 権限が無い（CAP_SYS_NICEが必要）かLinux以外
+    try:
+        os.nice(CAPTURE_NICE)
+    except OSError:
+        pass
+
+def _capture_process(shm_name, capacity, write_head, stop_event, capture_cpu):
+    """マイク入力を共有メモリのリングバッファへ書き込む
+
+    write_headはこれまでに書き込んだ総サンプル数（単調増加）。
+    lock=FalseのValueなので、64bit整数の代入1回で認識プロセスへ公開される。
+    """
+    _raise_capture_priority(capture_cpu)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray((capacity,), dtype=np.float32, buffer=shm.buf)
+    audio = pyaudio.PyAudio()
+    chunk_counter = [0]  # コールバック内から更新するためリストで保持
+
+    # デバイスがfloat32で録れなければint16で録り、コールバック内でfloat32へ変換する
+    sample_format = REALTIME_CONFIG["format"]
+    try:
+        audio.is_format_supported(
+            REALTIME_CONFIG["rate"],
+            input_device=audio.get_default_input_device_info()["index"],
+            input_channels=REALTIME_CONFIG["channels"],
+            input_format=sample_format
+        )
+    except (ValueError, OSError):
+        sample_format = pyaudio.paInt16
+    int16_fallback = sample_format == pyaudio.paInt16
+
+    def _callback(in_data, frame_count, time_info, status):
+        if int16_fallback:
+            samples = np.frombuffer(in_data, dtype=np.int16) * np.float32(1.0 / 32768.0)
+        else:
+            samples = np.frombuffer(in_data, dtype=np.float32)
+        head = write_head.value
+        pos = head % capacity
+        first = min(len(samples), capacity - pos)
+        ring[pos:pos + first] = samples[:first]
+        ring[:len(samples) - first] = samples[first:]  # 末尾を超えた分は先頭へ
+        write_head.value = head + len(samples)
+
+        # 音量レベル表示（VOLUME_PRINT_CHUNKSチャンクごと）
+        chunk_counter[0] += 1
+        if chunk_counter[0] % VOLUME_PRINT_CHUNKS == 0:
+            sys.stdout.write(f"🎵 音量: {_fast_rms_f32(samples):.0f}\r")
+            sys.stdout.flush()
+        return (None, pyaudio.paContinue)
+
+    stream = audio.open(
+        format=sample_format,
+        channels=REALTIME_CONFIG["channels"],
+        rate=REALTIME_CONFIG["rate"],
+        input=True,
+        frames_per_buffer=REALTIME_CONFIG["chunk"],
+        stream_callback=_callback
+    )
+    print("🎙️  録音プロセス開始")
+
+    try:
+        stop_event.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stream.stop_stream()
+        stream.close()
+        audio.terminate()
+        ring = None  # コールバックが掴んでいる共有メモリのビューを外す（残っているとshm.close()がBufferErrorになる）
+        shm.close()
+        print("\n📥 録音プロセス終了")
+
 # =============================================================================
 # リアルタイム音声認識クラス
 # =============================================================================
 
-class RealtimeWhisper:
+class RealtimeWhisper(StreamingPipeline):
     def __init__(self):
+        # 録音用に1コアを空け、モデル（CTranslate2のスレッド）は残りのコアで動かす
+        self.capture_cpu = _reserve_capture_cpu()
+
         # モデル初期化
         print("🚀 Faster Whisperモデルをロード中...")
+        self.compute_type = _select_compute_type(MODEL_CONFIG["device"], MODEL_CONFIG["compute_type"])
         self.model = WhisperModel(
             MODEL_CONFIG["model_size"],
             device=MODEL_CONFIG["device"],
-            compute_type=MODEL_CONFIG["compute_type"],
+            compute_type=self.compute_type,
             cpu_threads=MODEL_CONFIG["cpu_threads"],
             num_workers=MODEL_CONFIG["num_workers"]
         )
-        print("✅ モデルロード完了")
+        # 窓内のVAD区間をまとめてデコードできるようバッチ推論パイプラインで包む
+        self.batched_model = BatchedInferencePipeline(model=self.model) if BatchedInferencePipeline else None
+        print(f"✅ モデルロード完了 (compute_type: {self.compute_type}, "
+              f"バッチ推論: {'有効' if self.batched_model else '無効'})")
 
-        # 音声設定
-        self.audio = pyaudio.PyAudio()
-        self.audio_queue = queue.Queue()
         self.is_running = False
         self.last_processed_time = 0
 
-        # バッファ管理
-        self.audio_buffer = np.array([], dtype=np.int16)
-        self.buffer_lock = threading.Lock()
+        # バッファ管理（録音プロセスと共有するリングバッファ）
+        self.process_samples = int(REALTIME_CONFIG["buffer_seconds"] * REALTIME_CONFIG["rate"])
+        self.overlap_samples = int(REALTIME_CONFIG["overlap_seconds"] * REALTIME_CONFIG["rate"])
+        self.capacity = self.process_samples * RING_BUFFER_WINDOWS
+        self.shm = shared_memory.SharedMemory(create=True, size=self.capacity * np.dtype(np.float32).itemsize)
+        self.ring = np.ndarray((self.capacity,), dtype=np.float32, buffer=self.shm.buf)  # 正規化済みfloat32
+        # 録音プロセスはspawnで起動する（CTranslate2/OpenMPのスレッドが動いているプロセスをforkしない）
+        self.mp_context = multiprocessing.get_context("spawn")
+        self.write_head = self.mp_context.Value('Q', 0, lock=False)  # 録音済みの総サンプル数
+        self.read_head = 0  # 次の窓の開始位置（総サンプル数基準）
+        self.stop_event = self.mp_context.Event()
+        self.capture_process = None
+        self.processing_thread = None
+
+        # LocalAgreement: 確定済みテキストと、次の窓で確認するまで保留する直前の窓の仮説
+        self.committed_text = ""
+        self.pending_text = ""
+
+        # transcribeの呼び先を決める（バッチ推論が使える場合はVAD区間をbatch_size個ずつまとめてデコード）
+        if self.batched_model is not None:
+            self._setup_pipeline(self.batched_model.transcribe, TRANSCRIBE_CONFIG, self.process_samples,
+                                 batch_size=MODEL_CONFIG["batch_size"])
+        else:
+            self._setup_pipeline(self.model.transcribe, TRANSCRIBE_CONFIG, self.process_samples)
+
+        # 最初の窓で初回呼び出しの遅延が出ないよう先に一度認識しておく
+        self._warmup()
 
     def start_realtime_recognition(self):
         """リアルタイム認識を開始"""
         print("🎤 リアルタイム音声認識を開始します...")
         print("💡 話しかけると自動で認識されます（Ctrl+Cで終了）")
 
-        # 音声ストリーム開始
-        self.stream = self.audio.open(
-            format=REALTIME_CONFIG["format"],
-            channels=REALTIME_CONFIG["channels"],
-            rate=REALTIME_CONFIG["rate"],
-            input=True,
-            frames_per_buffer=REALTIME_CONFIG["chunk"]
-        )
-
         self.is_running = True
 
-        # 録音スレッド開始
-        recording_thread = threading.Thread(target=self._recording_worker, daemon=True)
-        recording_thread.start()
+        # 録音プロセス開始（PortAudioのコールバックが共有メモリへ直接書き込む）
+        self.capture_process = self.mp_context.Process(
+            target=_capture_process,
+            args=(self.shm.name, self.capacity, self.write_head, self.stop_event, self.capture_cpu),
+            daemon=True
+        )
+        self.capture_process.start()
 
         # 処理スレッド開始
-        processing_thread = threading.Thread(target=self._processing_worker, daemon=True)
-        processing_thread.start()
+        self.processing_thread = threading.Thread(target=self._processing_worker, daemon=True)
+        self.processing_thread.start()
 
         try:
             # メインスレッドは待機
@@ -115,72 +298,66 @@ class RealtimeWhisper:
 
     def stop_realtime_recognition(self):
         """リアルタイム認識を停止"""
+        if self.shm is None:
+            return  # 停止済み
         self.is_running = False
 
-        if hasattr(self, 'stream'):
-            self.stream.stop_stream()
-            self.stream.close()
+        if self.capture_process is not None:
+            self.stop_event.set()
+            self.capture_process.join(timeout=2.0)
+            self.capture_process = None
 
-        self.audio.terminate()
-        print("✅ リアルタイム認識を終了しました")
+        # 処理スレッドが窓の読み出し・認識を終えるまで待つ（共有メモリの解放や保留テキストの確定と競合させない）
+        if self.processing_thread is not None:
+            self.processing_thread.join()
+            self.processing_thread = None
 
-    def _recording_worker(self):
-        """音声録音ワーカー"""
-        print("🎙️  録音スレッド開始")
-
-        while self.is_running:
-            try:
-                # 音声データを取得
-                data = self.stream.read(REALTIME_CONFIG["chunk"], exception_on_overflow=False)
-                audio_chunk = np.frombuffer(data, dtype=np.int16)
+        self._flush_pending()
 
-                # バッファに追加
-                with self.buffer_lock:
-                    self.audio_buffer = np.concatenate([self.audio_buffer, audio_chunk])
-
-                # 音量レベル表示（100msごと）
-                current_time = time.time()
-                if int(current_time * 10) % 10 == 0:  # 100msごと
-                    volume = self._calculate_volume(audio_chunk)
-                    print(f"🎵 音量: {volume:.0f}", end='\r')
-
-            except Exception as e:
-                print(f"❌ 録音エラー: {e}")
-                break
+        # 共有メモリを解放
+        self.ring = None
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+        print("✅ リアルタイム認識を終了しました")
 
-        print("\n📥 録音スレッド終了")
+    def _read_ring(self, start, end):
+        """総サンプル数基準の区間[start, end)をリングバッファからコピーして返す"""
+        capacity = self.capacity
+        begin = start % capacity
+        length = end - start
+        if begin + length <= capacity:
+            return self.ring[begin:begin + length].copy()
+        # 末尾で折り返している場合は2つに分けて読む
+        return np.concatenate((self.ring[begin:], self.ring[:begin + length - capacity]))
 
     def _processing_worker(self):
         """音声処理ワーカー"""
         print("🧠 処理スレッド開始")
 
-        while self.is_running:
-            current_time = time.time()
+        rate = REALTIME_CONFIG["rate"]
 
-            # 処理間隔チェック
-            if current_time - self.last_processed_time < REALTIME_CONFIG["processing_interval"]:
-                time.sleep(0.05)  # 短い待機
+        while self.is_running:
+            # 処理間隔が明けるまで残り時間だけ待つ
+            wait = self.last_processed_time + REALTIME_CONFIG["processing_interval"] - time.time()
+            if wait > 0:
+                time.sleep(wait)
                 continue
 
-            # 十分なバッファがあるかチェック
-            with self.buffer_lock:
-                buffer_duration = len(self.audio_buffer) / REALTIME_CONFIG["rate"]
-
-                if buffer_duration < REALTIME_CONFIG["buffer_seconds"]:
-                    time.sleep(0.05)  # バッファが足りない場合は待機
-                    continue
-
-                # 処理する音声データを抽出（オーバーラップ考慮）
-                process_samples = int(REALTIME_CONFIG["buffer_seconds"] * REALTIME_CONFIG["rate"])
-                overlap_samples = int(REALTIME_CONFIG["overlap_seconds"] * REALTIME_CONFIG["rate"])
+            # 十分なバッファがあるかチェック（録音プロセスの書き込み位置を読むだけでロック不要）
+            # 足りなければ不足サンプルが届くまでの時間だけ待つ（別プロセスなので条件変数は使えない）
+            write_head = self.write_head.value
+            missing = self.process_samples - (write_head - self.read_head)
+            if missing > 0:
+                time.sleep(missing / rate)
+                continue
+            current_time = time.time()
 
-                # 最新のデータを処理
-                audio_to_process = self.audio_buffer[-process_samples:]
+            # 最新のデータを処理
+            audio_to_process = self._read_ring(write_head - self.process_samples, write_head)
 
-                # バッファをオーバーラップ分残して更新
-                keep_samples = overlap_samples
-                if len(self.audio_buffer) > keep_samples:
-                    self.audio_buffer = self.audio_buffer[-keep_samples:]
+            # 次の窓はオーバーラップ分を残した位置から数える
+            self.read_head = write_head - self.overlap_samples
 
             # 音声認識処理
             try:
@@ -192,65 +369,47 @@ class RealtimeWhisper:
 
         print("\n🔄 処理スレッド終了")
 
+    def _commit(self, new_text):
+        """確定したテキストを追加し、次の窓のinitial_promptを確定済みテキストの末尾にする（空ならFalse）"""
+        new_text = new_text.strip()
+        if not new_text:
+            return False
+        self.committed_text += new_text
+        # 前の窓のトークンを自動で引き継ぐ代わりに、確定済みテキストの末尾だけをプロンプトにする（未確定部分は含めない）
+        self._transcribe_kwargs["initial_prompt"] = self.committed_text[-PROMPT_CHARS:]
+        return True
+
+    def _flush_pending(self):
+        """保留中の仮説を確認なしで確定する（次の窓が来ない場合）"""
+        pending, self.pending_text = self.pending_text, ""
+        if self._commit(pending):
+            print(f"\n🎯 {pending.strip()}")
+
     def _process_audio_chunk(self, audio_chunk):
         """音声チャンクを処理"""
-        # NumPy配列をfloat32に変換
-        audio_np = audio_chunk.astype(np.float32) / 32768.0
-
-        # 無音チェック
-        volume = self._calculate_volume(audio_chunk)
-        if volume < 100:  # 音量が小さすぎる場合はスキップ
+        result = self._recognize(audio_chunk)
+        if result is None:
+            self._flush_pending()  # 発話が途切れたので保留中の仮説はもう次の窓で確認できない
             return
 
-        # Whisperで認識
-        segments, info = self.model.transcribe(
-            audio_np,
-            language=TRANSCRIBE_CONFIG["language"],
-            beam_size=TRANSCRIBE_CONFIG["beam_size"],
-            temperature=TRANSCRIBE_CONFIG["temperature"],
-            compression_ratio_threshold=TRANSCRIBE_CONFIG["compression_ratio_threshold"],
-            log_prob_threshold=TRANSCRIBE_CONFIG["log_prob_threshold"],
-            no_speech_threshold=TRANSCRIBE_CONFIG["no_speech_threshold"],
-            condition_on_previous_text=TRANSCRIBE_CONFIG["condition_on_previous_text"],
-            initial_prompt=TRANSCRIBE_CONFIG["initial_prompt"],
-            word_timestamps=TRANSCRIBE_CONFIG["word_timestamps"],
-            vad_filter=TRANSCRIBE_CONFIG["vad_filter"],
-            vad_parameters=TRANSCRIBE_CONFIG["vad_parameters"]
-        )
-
-        # 結果を表示
-        segments_list = list(segments)
-        if segments_list:
-            text = "".join(segment.text for segment in segments_list).strip()
-            if text:  # 空でないテキストのみ表示
-                confidence = self._calculate_simple_confidence(segments_list, info)
-                duration = len(audio_chunk) / REALTIME_CONFIG["rate"]
-                print(f"\n🎯 [{duration:.1f}s] {text} (確信度: {confidence:.1f}%)")
-
-    def _calculate_volume(self, audio_chunk):
-        """音量を計算"""
-        if len(audio_chunk) == 0:
-            return 0
-        return np.sqrt(np.mean(audio_chunk.astype(np.float64)**2))
-
-    def _calculate_simple_confidence(self, segments, info):
-        """簡易的な信頼度計算"""
-        try:
-            if hasattr(info, 'language_probability') and info.language_probability:
-                return info.language_probability * 100
-
-            # セグメントの平均確率を使用
-            confidences = []
-            for segment in segments:
-                if hasattr(segment, 'avg_logprob') and segment.avg_logprob is not None:
-                    # 対数確率をパーセンテージに変換
-                    confidence = min(100.0, max(0.0, (segment.avg_logprob + 5.0) / 5.0 * 100))
-                    confidences.append(confidence)
-
-            return sum(confidences) / len(confidences) if confidences else 50.0
-
-        except:
-            return 50.0
+        text, segments_list, info = result
+
+        # LocalAgreement: 前の窓の仮説は、今回の仮説と合意した所までだけ確定する
+        # 合意箇所より前はオーバーラップの外（もう認識し直されない）なので一緒に確定し、
+        # 合意箇所より後ろは今回の仮説（右側の文脈が多い）で置き換える
+        agreement = _find_agreement(self.pending_text, text)
+        if agreement is None:
+            new_text = self.pending_text  # 重なりが無い（窓が空いた・認識が食い違った）ので前の仮説をそのまま確定
+            self.pending_text = text
+        else:
+            pos, length = agreement
+            new_text = self.pending_text[:pos + length]
+            self.pending_text = text[length:]
+
+        if self._commit(new_text):
+            confidence = self._calculate_simple_confidence(segments_list, info)
+            duration = len(audio_chunk) / REALTIME_CONFIG["rate"]
+            print(f"\n🎯 [{duration:.1f}s] {new_text.strip()} (確信度: {confidence:.1f}%)")
 
 # =============================================================================
 # メイン関数
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+ストリーミング音声認識の共通処理
+realtime_whisper_test.pyとwake_word_test.pyで共有する
+（窓の正規化・無音/VADゲート・transcribe呼び出し・信頼度計算・ウォームアップ）
+"""
+
+import math
+
+import numpy as np
+
+try:
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+except ImportError:
+    get_speech_timestamps = None  # 無い場合は事前VADなし（transcribe内のVADだけで判定）
+
+# この音量（int16スケールのRMS）未満の窓は認識しない
+SILENCE_VOLUME = 100
+
+def _fast_rms_i16(samples):
+    """int16チャンクの音量（RMS）を整数の二乗和から計算（int64で積算し、一時配列を作らない）"""
+    if len(samples) == 0:
+        return 0.0
+    return math.sqrt(int(np.einsum('i,i->', samples, samples, dtype=np.int64)) / len(samples))
+
+def _fast_rms_f32(samples):
+    """[-1, 1)のfloat32チャンクの音量（int16スケールのRMS）をsdot1回で計算"""
+    if len(samples) == 0:
+        return 0.0
+    return math.sqrt(float(np.dot(samples, samples)) / len(samples)) * 32768.0
+
+class StreamingPipeline:
+    """録音窓をWhisperへ渡して文字列にするまでの共通部分
+
+    サブクラスはモデルのロード後に_setup_pipeline()を呼び、
+    窓ごとに_recognize()の結果（テキスト・セグメント・info）を扱う。
+    """
+
+    def _setup_pipeline(self, transcribe, transcribe_config, window_samples, **extra_kwargs):
+        """transcribeの呼び先と引数・正規化用スクラッチ・事前VADを一度だけ用意する"""
+        # transcribeの引数は設定から一度だけ組み立てる（毎回の辞書生成を省く）
+        self._transcribe = transcribe
+        self._transcribe_kwargs = dict(transcribe_config, **extra_kwargs)
+        self._f32_scratch = np.empty(window_samples, dtype=np.float32)  # 正規化済み窓の書き込み先
+
+        # 事前VAD（発話の無い窓はエンコーダに通さない。切り出すのでtranscribe側のVADは不要）
+        self._vad_options = VadOptions(**transcribe_config["vad_parameters"]) if get_speech_timestamps else None
+        if self._vad_options is not None:
+            self._transcribe_kwargs["vad_filter"] = False
+
+    def _warmup(self):
+        """無音の窓で一度認識を走らせ、CTranslate2のカーネル解決と作業領域確保を起動時に済ませる"""
+        print("🔥 モデルをウォームアップ中...")
+        warm = np.zeros(len(self._f32_scratch), dtype=np.float32)
+        segments, _ = self._transcribe(warm, **dict(self._transcribe_kwargs, vad_filter=False))
+        list(segments)  # ジェネレータを消費してデコーダまで実行させる
+        print("✅ ウォームアップ完了")
+
+    def _transcribe_kwargs_for(self, audio_np):
+        """この窓に使うtranscribeの引数（既定ではキャッシュ済みの辞書をそのまま返す）"""
+        return self._transcribe_kwargs
+
+    def _to_float32(self, audio_chunk):
+        """int16の窓を[-1, 1)のfloat32へ正規化する（スクラッチ配列へ1パスで書き込み、毎回の確保を避ける）"""
+        if audio_chunk.dtype == np.float32:
+            return audio_chunk  # float32で録音している場合はそのまま使う
+        audio_np = self._f32_scratch[:len(audio_chunk)]
+        np.multiply(audio_chunk, np.float32(1.0 / 32768.0), out=audio_np)
+        return audio_np
+
+    def _speech_region(self, audio_np):
+        """Silero VADで発話区間を探し、最初から最後の発話までを返す（発話が無ければNone）"""
+        if self._vad_options is None:
+            return audio_np
+        speech = get_speech_timestamps(audio_np, self._vad_options)
+        if not speech:
+            return None
+        return audio_np[speech[0]["start"]:speech[-1]["end"]]
+
+    def _recognize(self, audio_chunk, stop_pattern=None):
+        """int16（またはfloat32）の窓を認識して(テキスト, セグメント一覧, info)を返す（無音・発話なしならNone）
+
+        stop_patternに一致するセグメントが出た時点で打ち切り、残りのセグメントはデコードしない。
+        """
+        # NumPy配列をfloat32に変換（スクラッチ配列を音量計算と認識で共用）
+        audio_np = self._to_float32(audio_chunk)
+
+        # 無音チェック
+        if self._calculate_volume(audio_np) < SILENCE_VOLUME:
+            return None
+
+        # 発話区間だけを切り出す（キーボード音などで音量が超えても発話が無ければスキップ）
+        audio_np = self._speech_region(audio_np)
+        if audio_np is None:
+            return None
+
+        # Whisperで認識
+        segments, info = self._transcribe(audio_np, **self._transcribe_kwargs_for(audio_np))
+
+        # セグメントは遅延生成されるので1回だけ回し、テキストも同じループで集める
+        segments_list = []
+        parts = []
+        for segment in segments:
+            segments_list.append(segment)
+            parts.append(segment.text)
+            if stop_pattern is not None and stop_pattern.search(segment.text):
+                break
+        return "".join(parts).strip(), segments_list, info
+
+    def _calculate_volume(self, audio_np):
+        """正規化済みfloat32から音量（int16スケールのRMS）を計算"""
+        if audio_np.size == 0:
+            return 0
+        return np.sqrt(np.dot(audio_np, audio_np) / audio_np.size) * 32768.0
+
+    def _calculate_simple_confidence(self, segments, info):
+        """簡易的な信頼度計算"""
+        try:
+            if hasattr(info, 'language_probability') and info.language_probability:
+                return info.language_probability * 100
+
+            # セグメントの平均確率を使用
+            confidences = []
+            for segment in segments:
+                if hasattr(segment, 'avg_logprob') and segment.avg_logprob is not None:
+                    # 対数確率をパーセンテージに変換
+                    confidence = min(100.0, max(0.0, (segment.avg_logprob + 5.0) / 5.0 * 100))
+                    confidences.append(confidence)
+
+            return sum(confidences) / len(confidences) if confidences else 50.0
+
+        except:
+            return 50.0
@@ -28,10 +28,24 @@ except ImportError:
     print("インストール方法: pip install faster-whisper")
     exit(1)
 
+try:
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:
+    BatchedInferencePipeline = None  # 古いfaster-whisperでは窓を1つずつ認識する
+
+try:
+    import sounddevice as sd
+except ImportError:
+    sd = None  # 無い場合はpyaudioの録音スレッドで読み込む
+
 import time
+import sys
 import threading
 import queue
 import os
+import re
+
+from streaming_pipeline import StreamingPipeline, _fast_rms_i16
 
 # =============================================================================
 # 🚀 高速化設定パラメータ（faster_whisper_test.pyからインポート）
@@ -43,20 +57,22 @@ MODEL_CONFIG = {
     "device": "cpu",
     "compute_type": "int8",
     "cpu_threads": 6,              # リアルタイム用に適度なスレッド数
-    "num_workers": 1
+    "num_workers": 1,
+    "batch_size": 4                # BatchedInferencePipelineで同時にエンコードするずらし窓の数
 }
 
 # 認識パラメータ（速度重視のチューニング）
 TRANSCRIBE_CONFIG = {
     "language": "ja",
-    "beam_size": 3,                # 改善: 1から3に上げて精度を向上（速度とのトレードオフ）
+    "beam_size": 1,                # 有無の判定だけなのでgreedy decodingで十分（3→1でデコード量を削減）
     "temperature": 0.0,
     "compression_ratio_threshold": 2.4,  # 改善: 2.0から2.4に上げてより自然な音声を処理
     "log_prob_threshold": -1.0,    # 改善: -0.8から-1.0に下げてより多くの候補を処理
     "no_speech_threshold": 0.3,    # 改善: 0.4から0.3に下げてより多くの音声を処理
-    "condition_on_previous_text": True,
-    "initial_prompt": "以下は日本語の音声です。ウェイクワード「シリウスくん」を聞いてください。",
+    "condition_on_previous_text": False,  # 窓ごとに独立して判定（前の窓の文をプロンプトに積まない）
+    "initial_prompt": None,        # 毎回のプロンプトトークン分のデコードを省く
     "word_timestamps": False,
+    "without_timestamps": True,    # タイムスタンプトークンを出さない（セグメントのデコード量が減る）
     "vad_filter": True,
     "vad_parameters": {
         "min_silence_duration_ms": 300,   # 改善: 500msから300msに短くして短い発話も検出
@@ -82,14 +98,46 @@ WAKE_WORD_CONFIG = {
     "confidence_threshold": 60.0,  # 検出信頼度の閾値（%）- 改善: 60%から30%に下げる
     "cooldown_seconds": 2.0,       # 検出後のクールダウン時間（秒）- 改善: 3秒から2秒に短く
     "max_detection_history": 10,   # 検出履歴の最大保持数
-    "debug_mode": False            # デバッグモード - 改善完了後はOFFに
+    "tail_chars": 20,              # 窓の境界で分かれたウェイクワードを拾うため前の窓から引き継ぐ文字数
+    "debug_mode": False,           # デバッグモード - 改善完了後はOFFに
+    # バッチ推論時に1つの窓から切り出すクリップ（先頭・末尾から削る秒数）
+    # 境界で半分だけ入ったウェイクワードも、どれかのクリップには丸ごと入るようにする
+    "window_offsets": ((0.0, 0.0), (0.2, 0.0), (0.4, 0.0), (0.0, 0.2)),
+    "min_clip_seconds": 0.3        # これより短くなるクリップは使わない
 }
 
+# ウェイクワードのバリエーション（呼び出しごとに作り直さないようモジュールで保持）
+WAKE_WORD_VARIANTS = (
+    "シリウスくん",
+    "シリウス",
+    "しりうすくん",
+    "しりうす",
+    "シリウス くん",  # スペース入り
+    "しりうす くん",
+    "シリウスさん",   # より柔軟な表現
+    "しりうすさん",
+    "ねえ，シリウスくん",  # 自然な呼びかけ
+    "ねえシリウスくん",
+    "ねえ、シリウスくん",
+    "ねえ シリウスくん",
+    "おい、シリウスくん",  # 他の呼びかけも追加
+    "おいシリウスくん",
+    "ちょっと、シリウスくん",
+    "ちょっとシリウスくん"
+)
+
+# バリエーションを1本の正規表現にまとめ、テキストを1回走査するだけで判定する
+_WAKE_WORD_RE = re.compile("|".join(map(re.escape, WAKE_WORD_VARIANTS)))
+_WAKE_WORD_STEM_RE = re.compile("シリウス|しりうす")
+
+# 音量表示の間隔（チャンク数）。1024サンプル=64msなので約100msごと
+VOLUME_PRINT_CHUNKS = max(1, round(REALTIME_CONFIG["rate"] * 0.1 / REALTIME_CONFIG["chunk"]))
+
 # =============================================================================
 # ウェイクワード検出クラス
 # =============================================================================
 
-class WakeWordDetector:
+class WakeWordDetector(StreamingPipeline):
     def __init__(self, wake_word_callback=None):
         # モデル初期化
         print("🚀 Faster Whisperモデルをロード中...")
@@ -108,9 +156,16 @@ class WakeWordDetector:
         self.is_running = False
         self.last_processed_time = 0
 
-        # バッファ管理
-        self.audio_buffer = np.array([], dtype=np.int16)
+        # バッファ管理（固定長のリングバッファ。録音ごとの再確保をしない）
+        self.process_samples = int(REALTIME_CONFIG["buffer_seconds"] * REALTIME_CONFIG["rate"])
+        self.overlap_samples = int(REALTIME_CONFIG["overlap_seconds"] * REALTIME_CONFIG["rate"])
+        self.max_samples = int(REALTIME_CONFIG["rate"] * (REALTIME_CONFIG["buffer_seconds"] + 1.0))
+        self.audio_buffer = np.zeros(self.max_samples, dtype=np.int16)
+        self.write_pos = 0      # 次に書き込む位置
+        self.valid_samples = 0  # 未処理（＋オーバーラップ）のサンプル数
+        self._scratch = np.empty(self.process_samples, dtype=np.int16)  # 処理窓の取り出し先
         self.buffer_lock = threading.Lock()
+        self._buf_cv = threading.Condition(self.buffer_lock)  # 書き込みのたびに検出スレッドを起こす
 
         # ウェイクワード設定
         self.wake_word = WAKE_WORD_CONFIG["wake_word"]
@@ -119,10 +174,22 @@ class WakeWordDetector:
         self.last_detection_time = 0
         self.detection_history = []
         self.debug_mode = WAKE_WORD_CONFIG.get("debug_mode", False)
+        self._prev_tail = ""  # 前の窓の認識結果の末尾（窓をまたいだウェイクワード用）
+
+        # transcribeの引数・正規化用スクラッチ・事前VADを用意
+        self.batched_model = BatchedInferencePipeline(model=self.model) if BatchedInferencePipeline else None
+        if self.batched_model is not None:
+            self._setup_pipeline(self.batched_model.transcribe, TRANSCRIBE_CONFIG, self.process_samples,
+                                 batch_size=MODEL_CONFIG["batch_size"])
+        else:
+            self._setup_pipeline(self.model.transcribe, TRANSCRIBE_CONFIG, self.process_samples)
 
         # コールバック関数
         self.wake_word_callback = wake_word_callback or self._default_wake_word_callback
 
+        # 最初のウェイクワードで初回呼び出しの遅延が出ないよう先に一度認識しておく
+        self._warmup()
+
     def _default_wake_word_callback(self, detected_text, confidence):
         """デフォルトのウェイクワード検出時のコールバック"""
         print(f"\n🎯 ウェイクワード検出: 「{detected_text}」 (確信度: {confidence:.1f}%)")
@@ -145,20 +212,32 @@ class WakeWordDetector:
         print(f"💡 ウェイクワード: 「{self.wake_word}」")
         print("💡 話しかけると自動で検出されます（Ctrl+Cで終了）")
 
-        # 音声ストリーム開始
-        self.stream = self.audio.open(
-            format=REALTIME_CONFIG["format"],
-            channels=REALTIME_CONFIG["channels"],
-            rate=REALTIME_CONFIG["rate"],
-            input=True,
-            frames_per_buffer=REALTIME_CONFIG["chunk"]
-        )
-
         self.is_running = True
 
-        # 録音スレッド開始
-        recording_thread = threading.Thread(target=self._recording_worker, daemon=True)
-        recording_thread.start()
+        if sd is not None:
+            # PortAudioのコールバックがリングバッファへ直接書き込む（録音スレッド不要）
+            self._chunk_counter = 0
+            self.stream = sd.InputStream(
+                samplerate=REALTIME_CONFIG["rate"],
+                channels=REALTIME_CONFIG["channels"],
+                dtype='int16',
+                blocksize=REALTIME_CONFIG["chunk"],
+                callback=self._audio_callback
+            )
+            self.stream.start()
+            print("🎙️  録音コールバック開始 (sounddevice)")
+        else:
+            # PyAudioもコールバック方式で開き、stream.readで回す録音スレッドは使わない
+            self._chunk_counter = 0
+            self.stream = self.audio.open(
+                format=REALTIME_CONFIG["format"],
+                channels=REALTIME_CONFIG["channels"],
+                rate=REALTIME_CONFIG["rate"],
+                input=True,
+                frames_per_buffer=REALTIME_CONFIG["chunk"],
+                stream_callback=self._pa_callback
+            )
+            print("🎙️  録音コールバック開始 (pyaudio)")
 
         # 検出スレッド開始
         detection_thread = threading.Thread(target=self._detection_worker, daemon=True)
@@ -177,75 +256,58 @@ class WakeWordDetector:
         self.is_running = False
 
         if hasattr(self, 'stream'):
-            self.stream.stop_stream()
+            if sd is not None:
+                self.stream.stop()
+            else:
+                self.stream.stop_stream()
             self.stream.close()
 
         self.audio.terminate()
         print("✅ ウェイクワード検出を終了しました")
 
-    def _recording_worker(self):
-        """音声録音ワーカー"""
-        print("🎙️  録音スレッド開始")
-
-        while self.is_running:
-            try:
-                # 音声データを取得
-                data = self.stream.read(REALTIME_CONFIG["chunk"], exception_on_overflow=False)
-                audio_chunk = np.frombuffer(data, dtype=np.int16)
-
-                # バッファに追加
-                with self.buffer_lock:
-                    self.audio_buffer = np.concatenate([self.audio_buffer, audio_chunk])
+    def _pa_callback(self, in_data, frame_count, time_info, status):
+        """PyAudioの録音コールバック（バイト列をゼロコピーでint16として読み、共通の書き込み処理へ渡す）"""
+        self._on_audio_block(np.frombuffer(in_data, dtype=np.int16))
+        return (None, pyaudio.paContinue)
 
-                # 音量レベル表示（100msごと）
-                current_time = time.time()
-                if int(current_time * 10) % 10 == 0:  # 100msごと
-                    volume = self._calculate_volume(audio_chunk)
-                    print(f"🎵 音量: {volume:.0f}", end='\r')
+    def _audio_callback(self, indata, frame_count, time_info, status):
+        """sounddeviceの録音コールバック（Pythonでの読み込みループを通さずリングバッファへ書く）"""
+        self._on_audio_block(indata[:, 0])
 
-            except Exception as e:
-                print(f"❌ 録音エラー: {e}")
-                break
+    def _on_audio_block(self, audio_chunk):
+        """録音コールバック共通: リングバッファへ書き込み、一定チャンクごとに音量を表示"""
+        with self.buffer_lock:
+            self._ring_write(audio_chunk)
 
-        print("\n📥 録音スレッド終了")
+        # 音量レベル表示（VOLUME_PRINT_CHUNKSチャンクごと）
+        self._chunk_counter += 1
+        if self._chunk_counter % VOLUME_PRINT_CHUNKS == 0:
+            sys.stdout.write(f"🎵 音量: {_fast_rms_i16(audio_chunk):.0f}\r")
+            sys.stdout.flush()
 
     def _detection_worker(self):
         """ウェイクワード検出ワーカー"""
         print("🧠 検出スレッド開始")
 
         while self.is_running:
+            # 処理間隔とクールダウンが明けるまで、残り時間だけ待つ
+            wait = max(self.last_processed_time + REALTIME_CONFIG["processing_interval"],
+                       self.last_detection_time + self.cooldown_seconds) - time.time()
+            if wait > 0:
+                time.sleep(wait)
+
+            # 十分なバッファが溜まるまで録音側の通知を待つ
+            with self._buf_cv:
+                while self.is_running and self.valid_samples < self.process_samples:
+                    self._buf_cv.wait(timeout=0.1)  # 停止時にも抜けられるようタイムアウト付き
+                if not self.is_running:
+                    break
+                # 最新のデータを処理（スクラッチ配列へコピーするのでロック解放後も書き換わらない）
+                audio_to_process = self._ring_read_latest()
+                # 次の窓はオーバーラップ分を残して数える
+                self.valid_samples = self.overlap_samples
             current_time = time.time()
 
-            # 処理間隔チェック
-            if current_time - self.last_processed_time < REALTIME_CONFIG["processing_interval"]:
-                time.sleep(0.05)  # 短い待機
-                continue
-
-            # クールダウンチェック
-            if current_time - self.last_detection_time < self.cooldown_seconds:
-                time.sleep(0.05)  # クールダウン中は待機
-                continue
-
-            # 十分なバッファがあるかチェック
-            with self.buffer_lock:
-                buffer_duration = len(self.audio_buffer) / REALTIME_CONFIG["rate"]
-
-                if buffer_duration < REALTIME_CONFIG["buffer_seconds"]:
-                    time.sleep(0.05)  # バッファが足りない場合は待機
-                    continue
-
-                # 処理する音声データを抽出（オーバーラップ考慮）
-                process_samples = int(REALTIME_CONFIG["buffer_seconds"] * REALTIME_CONFIG["rate"])
-                overlap_samples = int(REALTIME_CONFIG["overlap_seconds"] * REALTIME_CONFIG["rate"])
-
-                # 最新のデータを処理
-                audio_to_process = self.audio_buffer[-process_samples:]
-
-                # バッファをオーバーラップ分残して更新
-                keep_samples = overlap_samples
-                if len(self.audio_buffer) > keep_samples:
-                    self.audio_buffer = self.audio_buffer[-keep_samples:]
-
             # ウェイクワード検出処理
             try:
                 self._process_audio_for_wake_word(audio_to_process)
@@ -256,54 +318,91 @@ class WakeWordDetector:
 
         print("\n🔍 検出スレッド終了")
 
+    def _ring_write(self, audio_chunk):
+        """リングバッファへチャンクを書き込み、待機中の検出スレッドへ通知する（buffer_lockを保持して呼ぶ）"""
+        n = len(audio_chunk)
+        pos = self.write_pos
+        first = min(n, self.max_samples - pos)
+        np.copyto(self.audio_buffer[pos:pos + first], audio_chunk[:first])
+        if first < n:
+            # 末尾を超えた分は先頭から書く
+            np.copyto(self.audio_buffer[:n - first], audio_chunk[first:])
+        self.write_pos = (pos + n) % self.max_samples
+        self.valid_samples = min(self.valid_samples + n, self.max_samples)
+        self._buf_cv.notify()
+
+    def _ring_read_latest(self):
+        """最新のprocess_samples分をスクラッチ配列へコピーして返す（buffer_lockを保持して呼ぶ）"""
+        n = self.process_samples
+        start = (self.write_pos - n) % self.max_samples
+        first = min(n, self.max_samples - start)
+        np.copyto(self._scratch[:first], self.audio_buffer[start:start + first])
+        if first < n:
+            np.copyto(self._scratch[first:], self.audio_buffer[:n - first])
+        return self._scratch
+
+    def _transcribe_kwargs_for(self, audio_np):
+        """バッチ推論時は窓をずらした複数のクリップを渡し、1回のエンコードでまとめて認識する"""
+        if self.batched_model is None:
+            return self._transcribe_kwargs
+        # clip_timestampsはサンプル位置（整数）で渡す（秒のままだとcollect_chunksのスライスで失敗する）
+        rate = REALTIME_CONFIG["rate"]
+        total = len(audio_np)
+        min_samples = int(WAKE_WORD_CONFIG["min_clip_seconds"] * rate)
+        clips = []
+        for head, tail in WAKE_WORD_CONFIG["window_offsets"]:
+            start = int(head * rate)
+            end = total - int(tail * rate)
+            if end - start >= min_samples:
+                clips.append({"start": start, "end": end})
+        if not clips:
+            return self._transcribe_kwargs
+        return dict(self._transcribe_kwargs, clip_timestamps=clips)
+
     def _process_audio_for_wake_word(self, audio_chunk):
         """音声チャンクからウェイクワードを検出"""
-        # NumPy配列をfloat32に変換
-        audio_np = audio_chunk.astype(np.float32) / 32768.0
-
-        # 無音チェック
-        volume = self._calculate_volume(audio_chunk)
-        if volume < 100:  # 音量が小さすぎる場合はスキップ
-            return
-
-        # Whisperで認識
-        segments, info = self.model.transcribe(
-            audio_np,
-            language=TRANSCRIBE_CONFIG["language"],
-            beam_size=TRANSCRIBE_CONFIG["beam_size"],
-            temperature=TRANSCRIBE_CONFIG["temperature"],
-            compression_ratio_threshold=TRANSCRIBE_CONFIG["compression_ratio_threshold"],
-            log_prob_threshold=TRANSCRIBE_CONFIG["log_prob_threshold"],
-            no_speech_threshold=TRANSCRIBE_CONFIG["no_speech_threshold"],
-            condition_on_previous_text=TRANSCRIBE_CONFIG["condition_on_previous_text"],
-            initial_prompt=TRANSCRIBE_CONFIG["initial_prompt"],
-            word_timestamps=TRANSCRIBE_CONFIG["word_timestamps"],
-            vad_filter=TRANSCRIBE_CONFIG["vad_filter"],
-            vad_parameters=TRANSCRIBE_CONFIG["vad_parameters"]
-        )
-
-        # 結果を取得
-        segments_list = list(segments)
-        if not segments_list:
+        # 認識（無音・発話なしの窓はNone。「シリウス」が出たセグメントで打ち切る）
+        result = self._recognize(audio_chunk, stop_pattern=_WAKE_WORD_STEM_RE)
+        if result is None:
+            self._prev_tail = ""  # 無音・発話なしを挟んだら引き継がない
             return
 
-        text = "".join(segment.text for segment in segments_list).strip()
+        text, segments_list, info = result
         if not text:  # 空でないテキストのみ処理
+            self._prev_tail = ""
             return
 
         confidence = self._calculate_simple_confidence(segments_list, info)
         duration = len(audio_chunk) / REALTIME_CONFIG["rate"]
 
+        # バッチ推論では同じ音声をずらしたクリップごとに1セグメントずつ出るので、つなげると同じ発話が重複する
+        # 引き継ぎと境界の判定には窓全体のクリップ（先頭）だけを使い、ずらしたクリップは単独の一致だけを見る
+        matched_clip = None
+        if self.batched_model is not None and len(segments_list) > 1:
+            text = segments_list[0].text.strip()
+            matched_clip = segments_list[-1].text.strip()  # stop_patternで打ち切るので一致したクリップは最後に来る
+
         # デバッグ情報表示
         if self.debug_mode:
             print(f"\n🔍 認識結果: 「{text}」 (確信度: {confidence:.1f}%, 時間: {duration:.1f}s)")
 
         # ウェイクワード検出
-        if self._check_wake_word(text, confidence):
+        # 前の窓の末尾をつないでも判定する（「シリ」「ウスくん」のように窓の境界で分かれても検出できる）
+        detected_text = self._detect_with_tail(text, confidence)
+        if detected_text is None and matched_clip and self._check_wake_word(matched_clip, confidence):
+            detected_text = matched_clip
+
+        # 検出した窓・確信度不足で捨てた窓の末尾は次の窓へ引き継がない
+        if detected_text is not None or (not self.debug_mode and confidence < self.confidence_threshold):
+            self._prev_tail = ""
+        else:
+            self._prev_tail = text[-WAKE_WORD_CONFIG["tail_chars"]:]
+
+        if detected_text is not None:
             # 検出履歴に追加
             detection_info = {
                 'timestamp': time.time(),
-                'text': text,
+                'text': detected_text,
                 'confidence': confidence,
                 'duration': duration
             }
@@ -314,7 +413,7 @@ class WakeWordDetector:
                 self.detection_history.pop(0)
 
             # コールバック呼び出し
-            self.wake_word_callback(text, confidence)
+            self.wake_word_callback(detected_text, confidence)
             self.last_detection_time = time.time()
 
         else:
@@ -327,6 +426,23 @@ class WakeWordDetector:
                 if len(text) <= 20:
                     print(f"🎯 [{duration:.1f}s] {text}", end='\r')
 
+    def _detect_with_tail(self, text, confidence):
+        """この窓単独、または前の窓の末尾とまたがってウェイクワードが出ていれば報告用テキストを返す（無ければNone）"""
+        if self._check_wake_word(text, confidence):
+            return text
+
+        tail = self._prev_tail
+        if not tail:
+            return None
+
+        # 境界をまたぐ一致だけを採用する（前の窓の中で完結する一致はその窓で判定済み）
+        combined = tail + text
+        boundary = len(tail)
+        if any(m.start() < boundary < m.end() for m in _WAKE_WORD_STEM_RE.finditer(combined)):
+            if self._check_wake_word(combined, confidence):
+                return combined
+        return None
+
     def _check_wake_word(self, text, confidence):
         """テキストにウェイクワードが含まれているかチェック"""
         # 信頼度チェック（デバッグモードでは緩和）
@@ -349,60 +465,15 @@ class WakeWordDetector:
             return True
 
         # より柔軟なマッチング（「シリウスくん」のバリエーション）
-        wake_word_variants = [
-            "シリウスくん",
-            "シリウス",
-            "しりうすくん",
-            "しりうす",
-            "シリウス くん",  # スペース入り
-            "しりうす くん",
-            "シリウスさん",   # より柔軟な表現
-            "しりうすさん",
-            "ねえ，シリウスくん",  # 自然な呼びかけ
-            "ねえシリウスくん",
-            "ねえ、シリウスくん",
-            "ねえ シリウスくん",
-            "おい、シリウスくん",  # 他の呼びかけも追加
-            "おいシリウスくん",
-            "ちょっと、シリウスくん",
-            "ちょっとシリウスくん"
-        ]
-
-        for variant in wake_word_variants:
-            if variant in text_lower:
-                return True
+        if _WAKE_WORD_RE.search(text_lower):
+            return True
 
         # 部分一致（「シリウス」が含まれていれば検出）
-        if "シリウス" in text or "しりうす" in text:
+        if _WAKE_WORD_STEM_RE.search(text):
             return True
 
         return False
 
-    def _calculate_volume(self, audio_chunk):
-        """音量を計算"""
-        if len(audio_chunk) == 0:
-            return 0
-        return np.sqrt(np.mean(audio_chunk.astype(np.float64)**2))
-
-    def _calculate_simple_confidence(self, segments, info):
-        """簡易的な信頼度計算"""
-        try:
-            if hasattr(info, 'language_probability') and info.language_probability:
-                return info.language_probability * 100
-
-            # セグメントの平均確率を使用
-            confidences = []
-            for segment in segments:
-                if hasattr(segment, 'avg_logprob') and segment.avg_logprob is not None:
-                    # 対数確率をパーセンテージに変換
-                    confidence = min(100.0, max(0.0, (segment.avg_logprob + 5.0) / 5.0 * 100))
-                    confidences.append(confidence)
-
-            return sum(confidences) / len(confidences) if confidences else 50.0
-
-        except:
-            return 50.0
-
     def get_detection_history(self):
         """検出履歴を取得"""
         return self.detection_history.copy()